@@ -0,0 +1,49 @@
+"""Benchmark per-sample per-amplicon depth metrics and "Amplicon Depth" sheet dataframe creation.
+
+Uses synthetic SARS-CoV-2 sized per-base depth arrays and an ARTIC-like scheme of ~100 amplicons.
+
+Usage:
+
+    python benchmarks/bench_amplicon_depth.py --n-samples 2000 --n-amplicons 200
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from xlavir.io.depth_store import StoredDepths
+from xlavir.qc import create_amplicon_depth_dataframe
+from xlavir.tools.mosdepth import MosdepthDepthInfo, get_amplicon_depths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--n-samples', type=int, default=2000)
+    parser.add_argument('--n-amplicons', type=int, default=98)
+    parser.add_argument('--length', type=int, default=29903)
+    args = parser.parse_args()
+    rng = np.random.default_rng(42)
+    step = args.length // (args.n_amplicons + 1)
+    starts = np.arange(args.n_amplicons) * step + 30
+    amplicons = pd.DataFrame({'amplicon': [f'amplicon_{i + 1}' for i in range(args.n_amplicons)],
+                              'contig': 'ref',
+                              'start': starts,
+                              'end': starts + int(step * 1.2)})
+    sample_depths = {f'Sample{i}': StoredDepths.from_depths(rng.integers(0, 3000, size=args.length))
+                     for i in range(args.n_samples)}
+    t0 = time.perf_counter()
+    sample_depth_info = {}
+    for sample, stored in sample_depths.items():
+        means, medians = get_amplicon_depths({'ref': stored}, amplicons)
+        sample_depth_info[sample] = MosdepthDepthInfo.model_construct(amplicon_mean_coverage=means.tolist(),
+                                                                      amplicon_median_coverage=medians.tolist())
+    t1 = time.perf_counter()
+    df = create_amplicon_depth_dataframe(sample_depth_info, amplicons)
+    t2 = time.perf_counter()
+    print(f'{args.n_samples} samples x {args.n_amplicons} amplicons: amplicon depths {t1 - t0:.2f}s, '
+          f'sheet dataframe {t2 - t1:.2f}s ({df.shape[0]} rows)')
+
+
+if __name__ == '__main__':
+    main()
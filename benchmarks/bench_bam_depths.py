@@ -0,0 +1,97 @@
+"""Benchmark read block difference array BAM depths against the previous pysam pileup implementation.
+
+Creates a synthetic sorted and indexed amplicon-like BAM file with a fraction of low quality (Q10) bases and times
+computing per-base depths. Low quality bases are excluded from depths like in the pysam pileup.
+
+Usage:
+
+    python benchmarks/bench_bam_depths.py --n-reads 200000 --threads 4
+    python benchmarks/bench_bam_depths.py --low-quality-fraction 0
+"""
+import argparse
+import tempfile
+import time
+from array import array
+from pathlib import Path
+
+import numpy as np
+import pysam
+
+from xlavir.tools.mosdepth import parse_bam_depths
+
+
+def parse_bam_depths_pileup(bam_path: Path) -> dict:
+    """Previous implementation counting pileup reads at every pileup column"""
+    bam = pysam.AlignmentFile(bam_path)
+    contig_depths = {
+        reference_name: np.zeros(bam.get_reference_length(reference_name), dtype=np.int32)
+        for reference_name in bam.references
+    }
+    # pileup caps depth at max_depth=8000 by default
+    for pileupcolumn in bam.pileup(max_depth=10 ** 8):
+        depth = sum(
+            1
+            for pileupread in pileupcolumn.pileups
+            if not (pileupread.is_del or pileupread.is_refskip)
+        )
+        contig_depths[pileupcolumn.reference_name][pileupcolumn.reference_pos] = depth
+    return contig_depths
+
+
+def make_bam(
+        path: Path,
+        n_reads: int,
+        n_contigs: int,
+        contig_length: int,
+        read_length: int,
+        low_quality_fraction: float
+) -> None:
+    rng = np.random.default_rng(42)
+    header = {'HD': {'VN': '1.6', 'SO': 'coordinate'},
+              'SQ': [{'SN': f'contig{i}', 'LN': contig_length} for i in range(n_contigs)]}
+    unsorted_path = path.with_suffix('.unsorted.bam')
+    cigars = [f'{read_length}M', f'{read_length // 2}M5D{read_length // 2}M', f'10S{read_length - 20}M2I8M']
+    with pysam.AlignmentFile(unsorted_path, 'wb', header=header) as bam:
+        for i in range(n_reads):
+            read = pysam.AlignedSegment(bam.header)
+            read.query_name = f'read{i}'
+            read.reference_id = int(rng.integers(n_contigs))
+            read.reference_start = int(rng.integers(contig_length - read_length - 10))
+            read.cigarstring = cigars[i % len(cigars)]
+            read.query_sequence = 'A' * read.infer_query_length()
+            quals = np.where(rng.random(read.query_length) < low_quality_fraction, 10, 40).astype(np.uint8)
+            read.query_qualities = array('B', quals.tobytes())
+            read.mapping_quality = 60
+            bam.write(read)
+    pysam.sort('-o', str(path), str(unsorted_path))
+    pysam.index(str(path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--n-reads', type=int, default=200000)
+    parser.add_argument('--n-contigs', type=int, default=8)
+    parser.add_argument('--contig-length', type=int, default=3000)
+    parser.add_argument('--read-length', type=int, default=150)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--low-quality-fraction', type=float, default=0.05,
+                        help='Fraction of read bases with base quality below the pileup threshold')
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        bam_path = Path(tmpdir) / 'sample.bam'
+        make_bam(bam_path, args.n_reads, args.n_contigs, args.contig_length, args.read_length,
+                 args.low_quality_fraction)
+        results = []
+        for name, func in [('pileup', parse_bam_depths_pileup),
+                           ('read blocks', parse_bam_depths),
+                           (f'read blocks threads={args.threads}',
+                            lambda p: parse_bam_depths(p, threads=args.threads))]:
+            t0 = time.perf_counter()
+            results.append(func(bam_path))
+            print(f'{name:<24} {time.perf_counter() - t0:.2f}s')
+        for result in results[1:]:
+            assert all(np.array_equal(results[0][contig], result[contig]) for contig in results[0])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""Benchmark computing depth stats from Mosdepth per-base BED intervals against expanded per-base depth arrays.
+
+Uses a synthetic per-base BED with a large reference and few long runs of equal depth, as for a bacterial genome.
+
+Usage:
+
+    python benchmarks/bench_depth_stats.py --length 5000000 --n-intervals 100000
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from xlavir.tools import mosdepth
+
+
+def synthetic_bed(length: int, n_intervals: int) -> pd.DataFrame:
+    rng = np.random.default_rng(42)
+    bounds = np.sort(rng.choice(np.arange(1, length), size=n_intervals - 1, replace=False))
+    starts = np.concatenate(([0], bounds))
+    ends = np.concatenate((bounds, [length]))
+    depths = rng.integers(0, 200, size=n_intervals)
+    return pd.DataFrame({'genome': 'ref', 'start_idx': starts, 'end_idx': ends, 'depth': depths})
+
+
+def from_array(df: pd.DataFrame) -> mosdepth.MosdepthDepthInfo:
+    return mosdepth.get_depth_info_from_array('sample', mosdepth.depth_array(df))
+
+
+def from_intervals(df: pd.DataFrame) -> mosdepth.MosdepthDepthInfo:
+    return mosdepth.get_depth_info_from_intervals('sample', *mosdepth.depth_intervals(df))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--length', type=int, default=5000000)
+    parser.add_argument('--n-intervals', type=int, default=100000)
+    args = parser.parse_args()
+    df = synthetic_bed(args.length, args.n_intervals)
+    results = []
+    for name, func in [('per-base array', from_array), ('intervals', from_intervals)]:
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        results.append(func(df))
+        elapsed = time.perf_counter() - t0
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f'{name:<16} {elapsed * 1000:.1f} ms, peak memory {peak / 2 ** 20:.1f} MiB')
+    assert results[0] == results[1]
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Benchmark single-pass `FileIndex` discovery against per-pattern `Path.glob` discovery.
+
+Creates a synthetic Nextflow-like results tree and times finding files for all tool glob patterns.
+
+Usage:
+
+    python benchmarks/bench_file_index.py --n-files 100000
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from xlavir.tools import mosdepth, samtools, variants, fastp, pangolin, nextclade, consensus
+from xlavir.util import FileIndex, flatten_glob_patterns
+
+ALL_GLOB_PATTERNS = flatten_glob_patterns([
+    *mosdepth.GLOB_PATTERNS,
+    *samtools.GLOB_PATTERNS,
+    *variants.VCF_GLOB_PATTERNS,
+    *variants.SNPSIFT_GLOB_PATTERNS,
+    *fastp.GLOB_PATTERNS,
+    *pangolin.PANGOLIN_GLOB_PATTERNS,
+    *nextclade.NEXTCLADE_GLOB_PATTERNS,
+    *consensus.GLOB_PATTERNS,
+    '**/execution_report*.html',
+    f'**/{pangolin.PANGOLIN_CSV}',
+])
+
+FILE_TEMPLATES = [
+    'mosdepth/{sample}.per-base.bed.gz',
+    'mosdepth/{sample}.mosdepth.summary.txt',
+    'samtools/{sample}.flagstat',
+    'samtools/{sample}.idxstats',
+    'ivar/{sample}.vcf.gz',
+    'ivar/{sample}.snpsift.txt',
+    'ivar/consensus/{sample}.consensus.fa',
+    'fastp/{sample}.fastp.json',
+    'bam/{sample}.trim.sorted.bam',
+    'bam/{sample}.trim.sorted.bam.bai',
+]
+
+
+def make_tree(root: Path, n_files: int) -> None:
+    n_samples = max(1, n_files // (len(FILE_TEMPLATES) * 2))
+    count = 0
+    for i in range(n_samples):
+        sample = f'Sample{i}'
+        for template in FILE_TEMPLATES:
+            p = root / 'results' / template.format(sample=sample)
+            p.parent.mkdir(parents=True, exist_ok=True)
+            p.touch()
+            # unrelated intermediate files, e.g. logs and other outputs
+            (p.parent / f'{sample}.{p.parent.name}.log').touch()
+            count += 2
+            if count >= n_files:
+                return
+
+
+def bench_glob(root: Path) -> int:
+    return sum(len(list(root.glob(pattern))) for pattern in ALL_GLOB_PATTERNS)
+
+
+def bench_index(root: Path) -> int:
+    index = FileIndex(root)
+    return sum(len(index.glob(pattern)) for pattern in ALL_GLOB_PATTERNS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--n-files', type=int, default=100000)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        t0 = time.perf_counter()
+        make_tree(root, args.n_files)
+        print(f'Created synthetic tree with ~{args.n_files} files in {time.perf_counter() - t0:.2f}s')
+        for name, func in [('Path.glob per pattern', bench_glob), ('FileIndex single walk', bench_index)]:
+            t0 = time.perf_counter()
+            n = func(root)
+            print(f'{name:<24} {len(ALL_GLOB_PATTERNS)} patterns, {n} matches: {time.perf_counter() - t0:.2f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""Micro-benchmark vectorized `mosdepth.get_interval_coords` against the previous per-position Python loop.
+
+Uses a synthetic failed sample depth array with many short zero and low coverage runs.
+
+Usage:
+
+    python benchmarks/bench_interval_coords.py --length 30000 --missing 20000
+"""
+import argparse
+import timeit
+
+import numpy as np
+
+from xlavir.tools.mosdepth import get_interval_coords
+
+
+def get_interval_coords_loop(depths: np.ndarray, threshold: int = 0) -> str:
+    """Previous implementation looping over every below threshold position"""
+    mask = depths == 0 if threshold == 0 else depths < threshold
+    below = np.where(mask)[0]
+    coords = []
+    for x in below:
+        if coords:
+            last = coords[-1][-1]
+            if x == last + 1:
+                coords[-1].append(x)
+            else:
+                coords.append([x])
+        else:
+            coords.append([x])
+    return '; '.join([f'{xs[0] + 1}-{xs[-1] + 1}' if xs[0] != xs[-1] else f'{xs[0] + 1}' for xs in coords])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--length', type=int, default=30000)
+    parser.add_argument('--missing', type=int, default=20000, help='Number of positions with zero coverage')
+    parser.add_argument('--number', type=int, default=20)
+    args = parser.parse_args()
+    rng = np.random.default_rng(42)
+    depths = rng.integers(1, 50, size=args.length).astype(np.uint8)
+    depths[rng.choice(args.length, size=args.missing, replace=False)] = 0
+    for threshold in [0, 10]:
+        assert get_interval_coords(depths, threshold) == get_interval_coords_loop(depths, threshold)
+        for name, func in [('python loop', get_interval_coords_loop), ('vectorized', get_interval_coords)]:
+            t = timeit.timeit(lambda: func(depths, threshold), number=args.number) / args.number
+            print(f'threshold={threshold:<3} {name:<12} {t * 1000:.2f} ms per call')
+
+
+if __name__ == '__main__':
+    main()
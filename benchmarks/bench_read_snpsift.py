@@ -0,0 +1,82 @@
+"""Benchmark `variants.read_snpsift` and `simplify_snpsift` against the previous full SnpSift table read.
+
+Uses a synthetic SnpSift table with two SnpEff annotations per variant, like a multi-sample table of a large cohort.
+
+Usage:
+
+    python benchmarks/bench_read_snpsift.py --n-variants 500000
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from xlavir.tools.variants import read_snpsift, simplify_snpsift
+
+HEADER = ['CHROM', 'POS', 'REF', 'ALT', 'ANN[*].GENE', 'ANN[*].GENEID', 'ANN[*].IMPACT', 'ANN[*].EFFECT',
+          'ANN[*].FEATURE', 'ANN[*].FEATUREID', 'ANN[*].BIOTYPE', 'ANN[*].RANK', 'ANN[*].HGVS_C', 'ANN[*].HGVS_P',
+          'ANN[*].CDNA_POS', 'ANN[*].CDNA_LEN', 'ANN[*].CDS_POS', 'ANN[*].CDS_LEN', 'ANN[*].AA_POS', 'ANN[*].AA_LEN',
+          'ANN[*].DISTANCE', 'EFF[*].EFFECT', 'EFF[*].FUNCLASS', 'EFF[*].CODON', 'EFF[*].AA', 'EFF[*].AA_LEN']
+
+
+def simplify_snpsift_split(df: pd.DataFrame, sample_name: str) -> pd.DataFrame:
+    """Previous implementation splitting every annotation column of a fully parsed SnpSift table"""
+    df = df[~df.duplicated(keep='first')]
+    field_names = set()
+    series = []
+    for c in df.columns:
+        idx = c.find('[*].')
+        if idx > 0:
+            new_series_name = c[idx + 4:].lower()
+            if new_series_name in field_names:
+                continue
+            field_names.add(new_series_name)
+            dfc = df[c]
+            if dfc.dtype == 'object' and isinstance(dfc.values[0], str):
+                new_series = dfc.str.split(',', n=1, expand=True)[0]
+            else:
+                new_series = dfc.astype('str')
+            new_series.name = new_series_name
+            series.append(new_series)
+        else:
+            series.append(df[c])
+    df_out = pd.concat(series, axis=1)
+    df_out['sample'] = sample_name
+    return df_out
+
+
+def write_snpsift(path: Path, n_variants: int) -> None:
+    rng = np.random.default_rng(42)
+    positions = rng.integers(1, 29904, size=n_variants)
+    aa_pos = positions // 3
+    df = pd.DataFrame({col: f'{col.lower()}_a,{col.lower()}_b' for col in HEADER[4:]}, index=range(n_variants))
+    df.insert(0, 'CHROM', 'MN908947.3')
+    df.insert(1, 'POS', positions)
+    df.insert(2, 'REF', 'C')
+    df.insert(3, 'ALT', 'T')
+    df['ANN[*].GENE'] = 'orf1ab,CHR_START-orf1ab'
+    df['ANN[*].AA_POS'] = [f'{x},-1' for x in aa_pos.tolist()]
+    df['EFF[*].AA'] = [f'p.Thr{x}Ile,.' for x in aa_pos.tolist()]
+    df['sample'] = [f'Sample{i // 100}' for i in range(n_variants)]
+    df.to_csv(path, sep='\t', index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--n-variants', type=int, default=500000)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / 'cohort.snpsift.txt'
+        write_snpsift(path, args.n_variants)
+        for name, func in [('full read + split', lambda: simplify_snpsift_split(pd.read_table(path), 'S')),
+                           ('projected read', lambda: simplify_snpsift(read_snpsift(path), 'S'))]:
+            t0 = time.perf_counter()
+            df = func()
+            print(f'{name:<18} {df.shape[0]} variants, {df.shape[1]} columns: {time.perf_counter() - t0:.2f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Benchmark single-pass in-process `variants.read_vcf` against the previous `zcat` subprocess and double read.
+
+Creates a directory of gzipped synthetic iVar-like VCF files and times reading all of them.
+
+Usage:
+
+    python benchmarks/bench_read_vcf.py --n-files 1000 --n-variants 100
+"""
+import argparse
+import gzip
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+from xlavir.tools.variants import read_vcf
+
+VCF_HEADER = '''##fileformat=VCFv4.2
+##source=iVar
+##reference=MN908947.3.fasta
+##contig=<ID=MN908947.3,length=29903>
+##INFO=<ID=DP,Number=1,Type=Integer,Description="Total Depth">
+##FORMAT=<ID=GT,Number=1,Type=String,Description="Genotype">
+##FORMAT=<ID=ALT_FREQ,Number=1,Type=Float,Description="Frequency of ALT base">
+#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\tFORMAT\tsample
+'''
+
+
+def read_vcf_zcat(vcf_file: Path) -> Tuple[str, pd.DataFrame]:
+    """Previous implementation reading headers through a `zcat` subprocess then reparsing the whole file"""
+    gzipped = vcf_file.name.endswith('.gz')
+    with os.popen(f'zcat < {vcf_file.absolute()}') if gzipped else open(vcf_file) as fh:
+        vcf_cols = []
+        variant_caller = ''
+        for line in fh:
+            if line.startswith('##source='):
+                variant_caller = line.strip().replace('##source=', '')
+            if line.startswith('#CHROM'):
+                vcf_cols = line[1:].strip().split('\t')
+                break
+        df = pd.read_table(vcf_file, sep='\t', comment='#', header=None, names=vcf_cols)
+        df = df[~df.duplicated(['CHROM', 'POS', 'ID', 'REF', 'ALT', 'FILTER'], keep='first')]
+    return variant_caller, df
+
+
+def write_vcfs(root: Path, n_files: int, n_variants: int) -> None:
+    rng = np.random.default_rng(42)
+    for i in range(n_files):
+        positions = np.sort(rng.choice(29903, size=n_variants, replace=False)) + 1
+        lines = [f'MN908947.3\t{pos}\t.\tC\tT\t.\tPASS\tDP={rng.integers(10, 5000)}\tGT:ALT_FREQ\t1:{rng.random():.3f}'
+                 for pos in positions.tolist()]
+        with gzip.open(root / f'Sample{i}.vcf.gz', 'wt') as fh:
+            fh.write(VCF_HEADER + '\n'.join(lines) + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--n-files', type=int, default=1000)
+    parser.add_argument('--n-variants', type=int, default=100, help='Number of variants per VCF file')
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        write_vcfs(root, args.n_files, args.n_variants)
+        paths = sorted(root.glob('*.vcf.gz'))
+        for name, func in [('zcat subprocess + reread', read_vcf_zcat), ('single-pass in-process', read_vcf)]:
+            t0 = time.perf_counter()
+            n_rows = sum(func(path)[1].shape[0] for path in paths)
+            print(f'{name:<26} {len(paths)} files, {n_rows} variants: {time.perf_counter() - t0:.2f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Benchmark the sparse `variants.to_variant_pivot_table` variant matrix against the previous dense pivot table.
+
+Uses a synthetic cohort of samples each with a random subset of a pool of mutations, builds the sample by mutation
+allele frequency matrix and optionally writes it to a "Variant Matrix" sheet.
+
+Usage:
+
+    python benchmarks/bench_variant_matrix.py --n-samples 5000 --n-mutations 10000 --mutations-per-sample 100
+    python benchmarks/bench_variant_matrix.py --n-samples 500 --n-mutations 2000 --write
+"""
+import argparse
+import re
+import tempfile
+import time
+from operator import itemgetter
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from xlavir.io.xl import write_sparse_df
+from xlavir.tools.variants import to_variant_pivot_table
+
+
+def get_nt_position_int(s: str) -> int:
+    if ':' in s:
+        return int(re.sub(r'.*\([AGTC]+(\d+).*', r'\1', s))
+    else:
+        return int(re.sub(r'[AGTC]+(\d+).*', r'\1', s))
+
+
+def to_variant_pivot_table_dense(df: pd.DataFrame) -> pd.DataFrame:
+    """Previous implementation with a dense pivot table and columns sorted by position parsed from mutation names"""
+    df_vars = df.copy()
+    df_vars.reset_index(inplace=True)
+    df_pivot = pd.pivot_table(df_vars,
+                              index='Sample',
+                              columns='Mutation',
+                              values='Alternate Allele Frequency',
+                              aggfunc='first',
+                              fill_value=0.0)
+    pivot_cols = list(zip(df_pivot.columns, [get_nt_position_int(x) for x in df_pivot.columns]))
+    pivot_cols.sort(key=itemgetter(1))
+    return df_pivot[[x for x, y in pivot_cols]]
+
+
+def make_variants(n_samples: int, n_mutations: int, mutations_per_sample: int) -> pd.DataFrame:
+    rng = np.random.default_rng(42)
+    positions = np.sort(rng.choice(29903, size=n_mutations, replace=False)) + 1
+    names = np.array([f'C{pos}T' for pos in positions.tolist()], dtype=object)
+    sample_idx = np.repeat(np.arange(n_samples), mutations_per_sample)
+    mutation_idx = np.concatenate([rng.choice(n_mutations, size=mutations_per_sample, replace=False)
+                                   for _ in range(n_samples)])
+    mutations = pd.Categorical(names[mutation_idx], categories=names)
+    return pd.DataFrame({'Sample': [f'Sample{i}' for i in sample_idx.tolist()],
+                         'Mutation': mutations,
+                         'Position': positions[mutation_idx],
+                         'Alternate Allele Frequency': rng.random(sample_idx.size)}).set_index('Sample')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--n-samples', type=int, default=5000)
+    parser.add_argument('--n-mutations', type=int, default=10000, help='Number of distinct mutations in cohort')
+    parser.add_argument('--mutations-per-sample', type=int, default=100)
+    parser.add_argument('--write', action='store_true', help='Also time writing the matrix to an XLSX sheet')
+    args = parser.parse_args()
+    df = make_variants(args.n_samples, args.n_mutations, args.mutations_per_sample)
+    df_dense_input = df.assign(Mutation=df.Mutation.astype(str))
+    print(f'{args.n_samples} samples, {args.n_mutations} mutations, {df.shape[0]} variants')
+    for name, func, df_input in [('dense pivot_table', to_variant_pivot_table_dense, df_dense_input),
+                                 ('sparse', to_variant_pivot_table, df)]:
+        t0 = time.perf_counter()
+        df_pivot = func(df_input)
+        elapsed = time.perf_counter() - t0
+        mb = df_pivot.memory_usage(index=False).sum() / 1e6
+        print(f'{name:<18} pivot: {elapsed:.2f}s, {mb:.1f} MB')
+        if not args.write:
+            continue
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / 'varmat.xlsx'
+            t0 = time.perf_counter()
+            with pd.ExcelWriter(path, engine='xlsxwriter') as writer:
+                if func is to_variant_pivot_table:
+                    sheet = writer.book.add_worksheet('Variant Matrix')
+                    write_sparse_df(sheet, df_pivot, writer.book.add_format(dict(bold=True)))
+                else:
+                    df_pivot.to_excel(writer, sheet_name='Variant Matrix')
+            print(f'{name:<18} write: {time.perf_counter() - t0:.2f}s, {path.stat().st_size / 1e6:.1f} MB XLSX')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""Benchmark vectorized `variants.to_summary` against the previous groupby aggregation with Python lambdas.
+
+Uses a synthetic cohort of variant rows in the format of `variants.to_dataframe` output with a categorical Mutation
+column.
+
+Usage:
+
+    python benchmarks/bench_variant_summary.py --n-samples 10000 --n-mutations 20000 --mutations-per-sample 100
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from xlavir.tools.variants import to_summary, variant_summary_cols, variants_cols
+
+
+def to_summary_lambdas(df: pd.DataFrame) -> pd.DataFrame:
+    """Previous implementation joining samples and computing means with Python functions for each group"""
+    df_vars = df.copy()
+    df_vars.reset_index(inplace=True)
+    df_summary = df_vars.groupby('Mutation', sort=False, observed=True).agg(
+        n_samples=('Sample', 'size'),
+        samples=('Sample', lambda x: '; '.join(x)),
+        gene=('Gene', 'first'),
+        effect=('Variant Effect', 'first'),
+        impact=('Variant Impact', 'first'),
+        aa=('Amino Acid Change', 'first'),
+        min_depth=('Alternate Allele Depth', 'min'),
+        max_depth=('Alternate Allele Depth', 'max'),
+        mean_depth=('Alternate Allele Depth', lambda x: sum(x) / len(x)),
+        min_af=('Alternate Allele Frequency', 'min'),
+        max_af=('Alternate Allele Frequency', 'max'),
+        mean_af=('Alternate Allele Frequency', lambda x: sum(x) / len(x)),
+        nt_pos=('Position', 'first'),
+        aa_pos=('Amino Acid Position', 'first')
+    )
+    df_summary.sort_values('nt_pos', inplace=True)
+    return df_summary.rename(columns={x: y for x, y, _ in (variant_summary_cols + variants_cols)})
+
+
+def make_variants(n_samples: int, n_mutations: int, mutations_per_sample: int) -> pd.DataFrame:
+    rng = np.random.default_rng(42)
+    positions = np.sort(rng.choice(29903, size=n_mutations, replace=False)) + 1
+    names = np.array([f'C{pos}T' for pos in positions.tolist()], dtype=object)
+    sample_idx = np.repeat(np.arange(n_samples), mutations_per_sample)
+    mutation_idx = np.concatenate([np.sort(rng.choice(n_mutations, size=mutations_per_sample, replace=False))
+                                   for _ in range(n_samples)])
+    n_rows = sample_idx.size
+    return pd.DataFrame({
+        'Sample': np.array([f'Sample{i}' for i in range(n_samples)], dtype=object)[sample_idx],
+        'Mutation': pd.Categorical(names[mutation_idx], categories=names),
+        'Gene': 'S',
+        'Variant Effect': 'missense_variant',
+        'Variant Impact': 'MODERATE',
+        'Amino Acid Change': 'p.Asp614Gly',
+        'Alternate Allele Depth': rng.integers(1, 5000, size=n_rows),
+        'Alternate Allele Frequency': rng.random(n_rows),
+        'Position': positions[mutation_idx],
+        'Amino Acid Position': '614/1273',
+    }).set_index('Sample')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--n-samples', type=int, default=10000)
+    parser.add_argument('--n-mutations', type=int, default=20000, help='Number of distinct mutations in cohort')
+    parser.add_argument('--mutations-per-sample', type=int, default=100)
+    args = parser.parse_args()
+    df = make_variants(args.n_samples, args.n_mutations, args.mutations_per_sample)
+    print(f'{args.n_samples} samples, {args.n_mutations} mutations, {df.shape[0]} variants')
+    results = []
+    for name, func in [('groupby lambdas', to_summary_lambdas), ('vectorized', to_summary)]:
+        t0 = time.perf_counter()
+        results.append(func(df))
+        print(f'{name:<16} {results[-1].shape[0]} mutations summarized: {time.perf_counter() - t0:.2f}s')
+    pd.testing.assert_frame_equal(*results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Benchmark memory of the `variants.VARIANTS_SCHEMA` typed variants table against untyped object/int64/float64 tables.
+
+Uses a synthetic cohort of per-sample variant tables in the format of `variants.get_info` output and reports the
+memory of the cohort variants table from `variants.to_dataframe`.
+
+Usage:
+
+    python benchmarks/bench_variants_memory.py --n-samples 5000 --variants-per-sample 200
+"""
+import argparse
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from xlavir.tools.variants import apply_variants_schema, to_dataframe
+
+GENES = [('orf1ab', 1, 21555), ('S', 21563, 25384), ('ORF3a', 25393, 26220), ('E', 26245, 26472),
+         ('M', 26523, 27191), ('N', 28274, 29533)]
+EFFECTS = [('missense_variant', 'MODERATE'), ('synonymous_variant', 'LOW'), ('upstream_gene_variant', 'MODIFIER')]
+AAS = {'A': 'Ala', 'D': 'Asp', 'G': 'Gly', 'T': 'Thr', 'I': 'Ile', 'L': 'Leu'}
+
+
+def make_sample_variants(n_samples: int, variants_per_sample: int, n_mutations: int) -> List[pd.DataFrame]:
+    """Make untyped per-sample variant tables, i.e. object strings, int64 positions and depths and float64 AF"""
+    rng = np.random.default_rng(42)
+    positions = np.sort(rng.choice(np.arange(1, 29904), size=n_mutations, replace=False))
+    gene_idx = np.searchsorted([start for _, start, _ in GENES], positions, side='right') - 1
+    effect_idx = rng.integers(0, len(EFFECTS), size=n_mutations)
+    aa_codes = list(AAS.values())
+    aas = [f'p.{aa_codes[i % 6]}{(pos - GENES[g][1]) // 3 + 1}{aa_codes[(i + 1) % 6]}'
+           for i, (pos, g) in enumerate(zip(positions.tolist(), gene_idx.tolist()))]
+    dfs = []
+    for i in range(n_samples):
+        idx = np.sort(rng.choice(n_mutations, size=variants_per_sample, replace=False))
+        dp = rng.integers(10, 5000, size=idx.size)
+        alt_dp = rng.integers(0, dp + 1)
+        dfs.append(pd.DataFrame({
+            'sample': f'Sample{i}',
+            'CHROM': 'MN908947.3',
+            'POS': positions[idx],
+            'REF': 'C',
+            'ALT': 'T',
+            'REF_DP': dp - alt_dp,
+            'ALT_DP': alt_dp,
+            'DP': dp,
+            'ALT_FREQ': alt_dp / dp,
+            'gene': [GENES[g][0] for g in gene_idx[idx].tolist()],
+            'impact': [EFFECTS[e][1] for e in effect_idx[idx].tolist()],
+            'effect': [EFFECTS[e][0] for e in effect_idx[idx].tolist()],
+            'aa': [aas[j] for j in idx.tolist()],
+        }))
+    return dfs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--n-samples', type=int, default=5000)
+    parser.add_argument('--variants-per-sample', type=int, default=200)
+    parser.add_argument('--n-mutations', type=int, default=10000, help='Number of distinct mutations in cohort')
+    args = parser.parse_args()
+    dfs = make_sample_variants(args.n_samples, args.variants_per_sample, args.n_mutations)
+    print(f'{args.n_samples} samples, {args.n_samples * args.variants_per_sample} variants')
+    for name, sample_dfs in [('untyped', dfs), ('typed schema', [apply_variants_schema(df) for df in dfs])]:
+        sample_mb = sum(df.memory_usage(deep=True).sum() for df in sample_dfs) / 1e6
+        df = to_dataframe(sample_dfs) if name == 'typed schema' else pd.concat(sample_dfs)
+        cohort_mb = df.memory_usage(deep=True).sum() / 1e6
+        print(f'{name:<13} per-sample tables: {sample_mb:.1f} MB, cohort table: {cohort_mb:.1f} MB')
+        print(f'{"":<13} {", ".join(f"{k}={v}" for k, v in df.dtypes.astype(str).items())}')
+
+
+if __name__ == '__main__':
+    main()
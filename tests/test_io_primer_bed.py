@@ -0,0 +1,21 @@
+"""Tests for `xlavir.io.primer_bed` module."""
+from xlavir.io.primer_bed import read_primer_bed
+
+
+def test_read_primer_bed(tmp_path):
+    bed = tmp_path / 'scheme.bed'
+    bed.write_text('\n'.join([
+        'MN908947.3\t30\t54\tnCoV-2019_1_LEFT\t1\t+',
+        'MN908947.3\t385\t410\tnCoV-2019_1_RIGHT\t1\t-',
+        'MN908947.3\t320\t342\tnCoV-2019_2_LEFT\t2\t+',
+        'MN908947.3\t322\t346\tnCoV-2019_2_LEFT_alt1\t2\t+',
+        'MN908947.3\t704\t726\tnCoV-2019_2_RIGHT\t2\t-',
+        'MN908947.3\t690\t712\tnCoV-2019_2_RIGHT_alt2\t2\t-',
+        'MN908947.3\t900\t920\tnCoV-2019_3_LEFT\t1\t+',
+        'MN908947.3\t950\t970\tunrelated\t1\t+',
+    ]) + '\n')
+    df = read_primer_bed(bed)
+    assert df.to_dict('records') == [
+        {'amplicon': 'nCoV-2019_1', 'contig': 'MN908947.3', 'start': 54, 'end': 385},
+        {'amplicon': 'nCoV-2019_2', 'contig': 'MN908947.3', 'start': 346, 'end': 690},
+    ]
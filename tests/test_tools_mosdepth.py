@@ -0,0 +1,309 @@
+"""Tests for `xlavir.tools.mosdepth` module."""
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from xlavir.io import depth_store
+from xlavir.io.depth_store import DepthStore
+from xlavir.tools import mosdepth
+
+dirpath = Path(__file__).parent
+
+
+def test_get_info_process_pool_same_as_serial():
+    basedir = dirpath / 'data/tools'
+    serial = mosdepth.get_info(basedir, low_coverage_threshold=10)
+    parallel = mosdepth.get_info(basedir, low_coverage_threshold=10, processes=2)
+    assert list(parallel.keys()) == ['Sample1', 'Sample2', 'Sample3']
+    assert parallel == serial
+
+
+def test_interval_depth_info_same_as_array():
+    for path in sorted((dirpath / 'data/tools/mosdepth').glob('*.per-base.bed*')):
+        df = mosdepth.read_mosdepth_bed(path)
+        starts, ends, depths = mosdepth.depth_intervals(df)
+        for threshold in [0, 1, 5, 10, 1000]:
+            expected = mosdepth.get_depth_info_from_array(path.name, mosdepth.depth_array(df), threshold)
+            assert mosdepth.get_depth_info_from_intervals(path.name, starts, ends, depths, threshold) == expected
+
+
+def test_histogram_stats_same_as_per_base():
+    rng = np.random.default_rng(0)
+    arr = rng.integers(0, 120, size=1001)
+    info = mosdepth.get_depth_info_from_array('sample', arr, low_coverage_threshold=10)
+    assert info.mean_coverage == pytest.approx(arr.mean())
+    assert info.median_coverage == np.median(arr)
+    assert info.n_low_coverage == np.sum(arr < 10)
+    assert info.genome_coverage == pytest.approx(np.mean(arr >= 10))
+    assert info.coverage_breadth == pytest.approx({t: np.mean(arr >= t) for t in mosdepth.COVERAGE_THRESHOLDS})
+    # median of an even number of depths is not truncated
+    arr = np.array([1, 2, 5, 6])
+    info = mosdepth.get_depth_info_from_array('sample', arr, low_coverage_threshold=10)
+    assert info.median_coverage == 3.5
+
+
+def test_multi_contig_depth_info(tmp_path):
+    df1 = mosdepth.read_mosdepth_bed(dirpath / 'data/tools/mosdepth/Sample1.per-base.bed.gz').assign(genome='seg1')
+    df2 = mosdepth.read_mosdepth_bed(dirpath / 'data/tools/mosdepth/Sample2.per-base.bed.gz').assign(genome='seg2')
+    bed = tmp_path / 'Flu.per-base.bed.gz'
+    pd.concat([df1, df2]).to_csv(bed, sep='\t', header=False, index=False)
+    info = mosdepth.get_sample_depth_info('Flu', bed, low_coverage_threshold=10)
+    assert [x.contig for x in info.contigs] == ['seg1', 'seg2']
+    for contig_info, df in zip(info.contigs, [df1, df2]):
+        expected = mosdepth.get_depth_info_from_array('Flu', mosdepth.depth_array(df), low_coverage_threshold=10)
+        assert contig_info.mean_coverage == expected.mean_coverage
+        assert contig_info.median_coverage == expected.median_coverage
+        assert contig_info.n_low_coverage == expected.n_low_coverage
+        assert contig_info.zero_coverage_coords == expected.zero_coverage_coords
+    arr = np.concatenate([mosdepth.depth_array(df1), mosdepth.depth_array(df2)])
+    expected = mosdepth.get_depth_info_from_array('Flu', arr, low_coverage_threshold=10)
+    assert info.ref_seq_length == arr.size
+    assert info.mean_coverage == pytest.approx(expected.mean_coverage)
+    assert info.median_coverage == expected.median_coverage
+    assert info.coverage_breadth == expected.coverage_breadth
+    assert info.zero_coverage_coords == '; '.join(
+        mosdepth.prefix_coords(x.contig, x.zero_coverage_coords) for x in info.contigs
+    )
+    assert info.zero_coverage_coords.startswith('seg1:')
+
+
+def write_bam(path: Path, reads, index: bool = True) -> Path:
+    import pysam
+    header = {'HD': {'VN': '1.6', 'SO': 'coordinate'},
+              'SQ': [{'SN': 'seg1', 'LN': 20}, {'SN': 'seg2', 'LN': 10}]}
+    with pysam.AlignmentFile(path, 'wb', header=header) as bam:
+        # optional base qualities and read name and mate position of paired reads
+        for i, (reference_id, start, cigar, flag, *extra) in enumerate(reads):
+            quals, name, mate_start = extra + [None] * (3 - len(extra))
+            read = pysam.AlignedSegment(bam.header)
+            read.query_name = name or f'read{i}'
+            read.flag = flag
+            read.reference_id = reference_id
+            read.reference_start = start
+            read.cigarstring = cigar
+            if mate_start is not None:
+                read.next_reference_id = reference_id
+                read.next_reference_start = mate_start
+            read.query_sequence = 'A' * read.infer_query_length()
+            if quals:
+                read.query_qualities = pysam.qualitystring_to_array(quals)
+            bam.write(read)
+    if index:
+        pysam.index(str(path))
+    return path
+
+
+def test_parse_bam_depths(tmp_path):
+    reads = [
+        (0, 0, '5M', 0),
+        (0, 2, '2M3D2M', 0),
+        (0, 3, '2S2M1I2M2N2M', 0),
+        (0, 4, '4M', 0x400),  # duplicate
+        (0, 4, '4M', 0x100),  # secondary
+        (1, 1, '3M', 0),
+        (1, 2, '3M', 0x4),  # unmapped
+    ]
+    expected = {
+        'seg1': [1, 1, 2, 3, 2, 1, 1, 1, 1, 1, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+        'seg2': [0, 1, 1, 1, 0, 0, 0, 0, 0, 0],
+    }
+    for index, threads in [(True, 1), (True, 2), (False, 1)]:
+        bam_path = write_bam(tmp_path / f'{index}_{threads}.bam', reads, index=index)
+        depths = mosdepth.parse_bam_depths(bam_path, threads=threads)
+        assert {contig: arr.tolist() for contig, arr in depths.items()} == expected
+
+
+def test_parse_bam_depths_base_quality_same_as_pileup(tmp_path):
+    import pysam
+    # '+' is Q10, 'I' is Q40
+    reads = [
+        (0, 0, '5M', 0, 'II+II'),
+        (0, 2, '2M3D2M', 0, '+III'),
+        (0, 3, '2S2M1I2M2N2M', 0, 'II++I+II+'),
+        (0, 4, '4M', 0),  # no base qualities
+        (1, 1, '3M', 0, '+++'),
+    ]
+    for index in [True, False]:
+        bam_path = write_bam(tmp_path / f'{index}.bam', reads, index=index)
+        depths = mosdepth.parse_bam_depths(bam_path)
+        if not index:
+            pysam.index(str(bam_path))
+        with pysam.AlignmentFile(bam_path) as bam:
+            for contig, arr in depths.items():
+                expected = np.zeros(arr.size, dtype=np.int32)
+                for col in bam.pileup(contig):
+                    expected[col.reference_pos] = sum(1 for x in col.pileups if not (x.is_del or x.is_refskip))
+                assert arr.tolist() == expected.tolist(), f'Depths of "{contig}" should be same as pileup'
+        assert depths['seg1'].tolist()[:12] == [1, 1, 0, 2, 2, 1, 2, 2, 1, 1, 0, 0]
+    depths = mosdepth.parse_bam_depths(bam_path, min_base_quality=0)
+    assert depths['seg2'].tolist()[:5] == [0, 1, 1, 1, 0], 'All aligned bases should be counted without threshold'
+
+
+def test_parse_bam_depths_paired_reads_same_as_pileup(tmp_path):
+    import pysam
+    paired, proper, read1, read2 = 0x1, 0x2, 0x40, 0x80
+    reads = [
+        # overlapping proper pair, overlap counted once
+        (0, 0, '10M', paired | proper | read1, 'I' * 10, 'pair1', 5),
+        (0, 5, '3M2N5M', paired | proper | read2, 'II+IIIII', 'pair1', 0),
+        # orphans: mate unmapped and not in a proper pair
+        (0, 12, '5M', paired | 0x8, 'IIIII', 'orphan1', 12),
+        (0, 14, '5M', paired | read1, 'IIIII', 'orphan2', 19),
+        # proper pairs starting at the same position and not overlapping
+        (1, 0, '4M', paired | proper | read1, 'IIII', 'pair2', 0),
+        (1, 0, '4M', paired | proper | read2, 'I+II', 'pair2', 0),
+        (1, 2, '3M', paired | proper | read1, 'III', 'pair3', 6),
+        (1, 6, '3M', paired | proper | read2, 'III', 'pair3', 2),
+    ]
+    bam_path = write_bam(tmp_path / 'paired.bam', reads)
+    depths = mosdepth.parse_bam_depths(bam_path)
+    with pysam.AlignmentFile(bam_path) as bam:
+        for contig, arr in depths.items():
+            expected = np.zeros(arr.size, dtype=np.int32)
+            for col in bam.pileup(contig):
+                expected[col.reference_pos] = sum(1 for x in col.pileups if not (x.is_del or x.is_refskip))
+            assert arr.tolist() == expected.tolist(), f'Depths of "{contig}" should be same as pileup'
+    assert depths['seg1'].tolist()[:16] == [1] * 15 + [0]
+    assert depths['seg2'].tolist() == [1, 1, 2, 2, 1, 0, 1, 1, 1, 0]
+
+
+def write_mosdepth_summary_outputs(outdir: Path, sample: str, df: pd.DataFrame, quantize=(0, 1, 10, 50)) -> None:
+    """Write Mosdepth-like summary, global dist, quantized and 1000bp window thresholds outputs from per-base BED"""
+    contig_depths = {contig: mosdepth.depth_array(dfg) for contig, dfg in df.groupby('genome', sort=False)}
+    contig_depths['total'] = np.concatenate(list(contig_depths.values()))
+    summary = pd.DataFrame([(contig, arr.size, int(arr.sum()), round(arr.mean(), 2), arr.min(), arr.max())
+                            for contig, arr in contig_depths.items()],
+                           columns=['chrom', 'length', 'bases', 'mean', 'min', 'max'])
+    summary.to_csv(outdir / f'{sample}.mosdepth.summary.txt', sep='\t', index=False)
+    with open(outdir / f'{sample}.mosdepth.global.dist.txt', 'w') as fh:
+        for contig, arr in contig_depths.items():
+            hist = np.bincount(arr)
+            fraction_at_least = np.cumsum(hist[::-1])[::-1] / arr.size
+            for depth in range(hist.size - 1, -1, -1):
+                fh.write(f'{contig}\t{depth}\t{fraction_at_least[depth]:.2f}\n')
+    bins = [f'{lower}:{upper}' for lower, upper in zip(quantize, [*quantize[1:], 'inf'])]
+    quantized, thresholds = [], []
+    for contig, dfg in df.groupby('genome', sort=False):
+        labels = np.array(bins)[np.searchsorted(quantize, dfg.depth, side='right') - 1]
+        for start, end, label in zip(dfg.start_idx, dfg.end_idx, labels):
+            if quantized and quantized[-1][0] == contig and quantized[-1][3] == label:
+                quantized[-1][2] = end
+            else:
+                quantized.append([contig, start, end, label])
+        arr = contig_depths[contig]
+        for start in range(0, arr.size, 1000):
+            window = arr[start:start + 1000]
+            thresholds.append([contig, start, start + window.size, 'unknown',
+                               *[int(np.sum(window >= t)) for t in [1, 5, 20]]])
+    pd.DataFrame(quantized).to_csv(outdir / f'{sample}.quantized.bed.gz', sep='\t', header=False, index=False)
+    pd.DataFrame(thresholds, columns=['#chrom', 'start', 'end', 'region', '1X', '5X', '20X']) \
+        .to_csv(outdir / f'{sample}.thresholds.bed.gz', sep='\t', index=False)
+
+
+def test_get_info_from_mosdepth_summary_outputs(tmp_path):
+    summary_dir = tmp_path / 'summary/mosdepth'
+    summary_dir.mkdir(parents=True)
+    for path in sorted((dirpath / 'data/tools/mosdepth').glob('*.per-base.bed.gz')):
+        sample = path.name.split('.')[0]
+        write_mosdepth_summary_outputs(summary_dir, sample, mosdepth.read_mosdepth_bed(path))
+    per_base = mosdepth.get_info(dirpath / 'data/tools', low_coverage_threshold=10)
+    from_summary = mosdepth.get_info(tmp_path / 'summary', low_coverage_threshold=10)
+    assert from_summary.keys() == per_base.keys()
+    for sample, expected in per_base.items():
+        info = from_summary[sample]
+        # dict fields are not supported by pytest.approx; window depths need per-base depths
+        approximated = {'median_coverage', 'coverage_breadth', 'window_mean_coverage'}
+        assert info.dict(exclude=approximated) == pytest.approx(expected.dict(exclude=approximated))
+        # exact from thresholds BED and quantized bins
+        for threshold in [1, 5, 10, 20, 50]:
+            assert info.coverage_breadth[threshold] == pytest.approx(expected.coverage_breadth[threshold])
+        # approximated from global dist fractions rounded to 2 decimal places
+        assert info.coverage_breadth[100] == pytest.approx(expected.coverage_breadth[100], abs=0.005)
+        assert info.median_coverage == pytest.approx(expected.median_coverage, rel=0.05)
+    # per-base depths are used when available, even if quantized bins give exact zero and low coverage info
+    shutil.copytree(dirpath / 'data/tools/mosdepth', summary_dir / 'per-base')
+    auto = mosdepth.get_info(tmp_path / 'summary', low_coverage_threshold=10)
+    for sample, expected in per_base.items():
+        assert auto[sample].median_coverage == expected.median_coverage
+        assert auto[sample].coverage_breadth == expected.coverage_breadth
+    assert mosdepth.get_info(tmp_path / 'summary', low_coverage_threshold=5) == \
+        mosdepth.get_info(dirpath / 'data/tools', low_coverage_threshold=5)
+    assert mosdepth.get_info(tmp_path / 'summary', low_coverage_threshold=5, coverage_source='summary') != \
+        mosdepth.get_info(dirpath / 'data/tools', low_coverage_threshold=5)
+
+
+def test_get_info_depth_store(tmp_path):
+    basedir = dirpath / 'data/tools'
+    expected = mosdepth.get_info(basedir, low_coverage_threshold=10)
+    assert mosdepth.get_info(basedir, low_coverage_threshold=10, depth_store=tmp_path) == expected
+    entries = sorted(x for x in tmp_path.iterdir())
+    assert len(entries) == 3
+    # depths are loaded from the store on later runs
+    assert mosdepth.get_info(basedir, low_coverage_threshold=10, depth_store=tmp_path, processes=2) == expected
+    assert sorted(x for x in tmp_path.iterdir()) == entries
+    store = DepthStore(tmp_path)
+    bed = basedir / 'mosdepth/Sample1.per-base.bed.gz'
+    stored = store.load(bed)
+    arr = mosdepth.depth_array(mosdepth.read_mosdepth_bed(bed))
+    assert isinstance(stored['MN908947.3'].depths, np.memmap)
+    assert np.array_equal(stored['MN908947.3'].depths, arr)
+    assert stored['MN908947.3'].region_sums(np.array([100]), np.array([200]))[0] == arr[100:200].sum()
+    # depths computed with other parameters or by another store version are not used
+    assert store.load(bed, {'min_base_quality': 0}) is None
+    with pytest.MonkeyPatch.context() as m:
+        m.setattr(depth_store, 'STORE_VERSION', depth_store.STORE_VERSION + 1)
+        assert store.load(bed) is None
+
+
+def test_get_info_amplicon_depths():
+    amplicons = pd.DataFrame({'amplicon': ['a1', 'a2', 'a3', 'other'],
+                              'contig': ['MN908947.3', 'MN908947.3', 'MN908947.3', 'other'],
+                              'start': [54, 346, 29850, 0],
+                              'end': [385, 690, 29950, 100]})
+    expected = mosdepth.get_info(dirpath / 'data/tools', low_coverage_threshold=10)
+    infos = mosdepth.get_info(dirpath / 'data/tools', low_coverage_threshold=10, amplicons=amplicons)
+    bed = dirpath / 'data/tools/mosdepth/Sample1.per-base.bed.gz'
+    arr = mosdepth.depth_array(mosdepth.read_mosdepth_bed(bed))
+    info = infos['Sample1']
+    amplicon_fields = {'amplicon_mean_coverage', 'amplicon_median_coverage'}
+    assert info.dict(exclude=amplicon_fields) == expected['Sample1'].dict(exclude=amplicon_fields)
+    assert info.amplicon_mean_coverage[:2] == pytest.approx([arr[54:385].mean(), arr[346:690].mean()])
+    assert info.amplicon_median_coverage[:2] == [np.median(arr[54:385]), np.median(arr[346:690])]
+    # amplicon past the end of the reference and amplicon on another contig
+    assert info.amplicon_mean_coverage[2] == pytest.approx(arr[29850:].mean())
+    assert np.isnan(info.amplicon_mean_coverage[3])
+
+
+def test_get_info_window_depths():
+    infos = mosdepth.get_info(dirpath / 'data/tools', low_coverage_threshold=10, coverage_window=100)
+    bed = dirpath / 'data/tools/mosdepth/Sample1.per-base.bed.gz'
+    arr = mosdepth.depth_array(mosdepth.read_mosdepth_bed(bed))
+    windows = infos['Sample1'].window_mean_coverage
+    assert len(windows) == -(-arr.size // 100)
+    assert list(windows)[:2] == ['1-100', '101-200']
+    assert windows['101-200'] == pytest.approx(arr[100:200].mean())
+    last = f'{(arr.size - 1) // 100 * 100 + 1}-{arr.size}'
+    assert windows[last] == pytest.approx(arr[(arr.size - 1) // 100 * 100:].mean())
+
+
+def test_low_coverage_bed_and_summarized_coords(tmp_path):
+    infos = mosdepth.get_info(dirpath / 'data/tools', low_coverage_threshold=10)
+    bed = tmp_path / 'low_coverage.bed'
+    mosdepth.write_low_coverage_bed(infos, bed)
+    df = pd.read_table(bed)
+    df_sample1 = df[df['sample'] == 'Sample1']
+    assert df_sample1['#contig'].unique().tolist() == ['MN908947.3']
+    assert df_sample1[['start', 'end']].values.tolist() == [[0, 2], [29812, 29903], [0, 10], [29799, 29903]]
+    assert df_sample1.coverage.tolist() == ['0X', '0X', '<10X', '<10X']
+    # many low coverage regions are summarized to fit in an Excel cell
+    coords = mosdepth.format_coords(np.arange(0, 100000, 2), np.arange(1, 100001, 2))
+    summary = mosdepth.summarize_coords(coords)
+    assert summary.startswith('1; 3; 5; ')
+    assert summary.endswith('; ... (50000 regions, 50000 bp total)')
+    assert summary.count('; ') == mosdepth.MAX_COORDS_REGIONS
+    summary = mosdepth.summarize_coords(coords, max_regions=100000)
+    assert len(summary) <= mosdepth.EXCEL_MAX_CELL_CHARS
+    assert summary.endswith('; ... (50000 regions, 50000 bp total)')
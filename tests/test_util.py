@@ -0,0 +1,101 @@
+"""Tests for `xlavir.util` module."""
+from pathlib import Path
+
+from xlavir.tools import mosdepth, samtools, variants, consensus
+from xlavir.util import FileIndex, flatten_glob_patterns, find_file_for_each_sample
+
+dirpath = Path(__file__).parent
+
+
+def test_file_index_glob_matches_pathlib_glob():
+    basedir = dirpath / 'data'
+    index = FileIndex(basedir)
+    patterns = flatten_glob_patterns([
+        *mosdepth.GLOB_PATTERNS,
+        *samtools.GLOB_PATTERNS,
+        *variants.VCF_GLOB_PATTERNS,
+        *variants.SNPSIFT_GLOB_PATTERNS,
+        *consensus.GLOB_PATTERNS,
+        '**/execution_report*.html',
+        'io/ct.*',
+    ])
+    for pattern in patterns:
+        assert sorted(index.glob(pattern)) == sorted(basedir.glob(pattern)), \
+            f'FileIndex.glob should give the same files as Path.glob for pattern "{pattern}"'
+
+
+def test_file_index_excludes_and_deduplicates(tmp_path):
+    results = tmp_path / 'results'
+    (results / 'ivar').mkdir(parents=True)
+    (results / 'ivar' / 'Sample1.vcf.gz').touch()
+    (results / 'ivar' / 'Sample1.tmp.vcf.gz').touch()
+    (tmp_path / 'work' / 'ab' / 'cdef').mkdir(parents=True)
+    (tmp_path / 'work' / 'ab' / 'cdef' / 'Sample2.vcf.gz').touch()
+    (results / 'variants').mkdir()
+    (results / 'variants' / 'Sample1.vcf.gz').symlink_to(results / 'ivar' / 'Sample1.vcf.gz')
+    (tmp_path / '.xlavirignore').write_text('# temporary files\n*.tmp.vcf.gz\n')
+    # top-level conda cache is excluded, but not an output directory named "conda"
+    (tmp_path / 'conda' / 'env').mkdir(parents=True)
+    (tmp_path / 'conda' / 'env' / 'Sample3.vcf.gz').touch()
+    (results / 'conda').mkdir()
+    (results / 'conda' / 'Sample4.vcf.gz').touch()
+
+    index = FileIndex(tmp_path)
+    assert index.glob('**/*.vcf.gz') == [results / 'conda' / 'Sample4.vcf.gz', results / 'ivar' / 'Sample1.vcf.gz']
+    assert index.n_duplicates == 1
+
+    index = FileIndex(tmp_path, exclude=['results/ivar/', 'conda/'])
+    assert index.glob('**/*.vcf.gz') == [results / 'variants' / 'Sample1.vcf.gz']
+
+
+def test_find_file_for_each_sample_stops_at_first_matching_tier(tmp_path):
+    (tmp_path / 'ivar').mkdir()
+    (tmp_path / 'ivar' / 'Sample1.vcf.gz').touch()
+    (tmp_path / 'other').mkdir()
+    for sample in ['Sample1', 'Sample2']:
+        (tmp_path / 'other' / f'{sample}.vcf').touch()
+    selected = []
+    sample_vcf = find_file_for_each_sample(tmp_path,
+                                           glob_patterns=['**/ivar/*.vcf.gz', ['**/*.vcf', '**/*.vcf.gz']],
+                                           sample_name_cleanup=['.vcf', '.gz'],
+                                           single_entry_selector_func=lambda xs: selected.append(xs) or xs[0])
+    assert sample_vcf == {
+        'Sample1': tmp_path / 'ivar' / 'Sample1.vcf.gz',
+        'Sample2': tmp_path / 'other' / 'Sample2.vcf',
+    }
+    assert selected == [], 'Lower tier files should not be candidates for samples found in a higher tier'
+
+
+def test_count_data_lines():
+    import gzip
+    from xlavir.util import count_data_lines
+    for vcf in (dirpath / 'data').glob('**/*.vcf*'):
+        with (gzip.open(vcf, 'rt') if vcf.suffix == '.gz' else open(vcf)) as fh:
+            expected = sum(1 for line in fh if not line.startswith('#'))
+        assert count_data_lines(vcf) == expected, f'Should count the same number of records in "{vcf}"'
+        assert count_data_lines(vcf, chunk_size=7) == expected, 'Comment lines across chunks should be handled'
+
+
+def test_select_flagstat_records_counts(tmp_path):
+    paths = []
+    for subdir, total in [('a', 100), ('b', 1000)]:
+        (tmp_path / subdir).mkdir()
+        path = tmp_path / subdir / 'Sample1.flagstat'
+        path.write_text(f'{total} + 0 in total (QC-passed reads + QC-failed reads)\n'
+                        f'{total // 2} + 0 mapped (50.00% : N/A)\n')
+        paths.append(path)
+    counts = {}
+    assert samtools.select_flagstat(paths, counts=counts) == paths[1]
+    assert counts == {paths[0]: (100, 50), paths[1]: (1000, 500)}
+    assert samtools.get_info(tmp_path)['Sample1'].n_total_reads == 1000
+    assert samtools.select_flagstat([]) is None
+
+
+def test_mosdepth_sample_name_cleanup_only_removes_suffixes():
+    from xlavir.util import extract_sample_name
+    for filename, expected in [('S1.genome.mosdepth.summary.txt', 'S1'),
+                               ('S1.amplicon.thresholds.bed.gz', 'S1'),
+                               ('S1.genome.per-base.bed.gz', 'S1'),
+                               ('X.amplicon_run2.mosdepth.global.dist.txt', 'X.amplicon_run2'),
+                               ('X.genome_b.quantized.bed.gz', 'X.genome_b')]:
+        assert extract_sample_name(filename, mosdepth.SAMPLE_NAME_CLEANUP) == expected
@@ -1,8 +1,9 @@
+import re
 from pathlib import Path
 
 import pandas as pd
 
-from xlavir.qc import QualityRequirements
+from xlavir.qc import QualityRequirements, VariantFilters
 from xlavir.tools import variants
 
 clair3_basedir = Path('tests/data/vcfs/clair3')
@@ -13,6 +14,14 @@ expected_columns = [
 ]
 
 
+def get_nt_position_int(s: str) -> int:
+    """Get the nucleotide position from the mutation string, e.g. 21992 from 'S:Y145_H146del (TATTACC21992T)'"""
+    if ':' in s:
+        return int(re.sub(r'.*\([AGTC]+(\d+).*', r'\1', s))
+    else:
+        return int(re.sub(r'[AGTC]+(\d+).*', r'\1', s))
+
+
 def test_parse_clair3_vcf():
     clair3_variants = variants.get_info(basedir=clair3_basedir, qc_reqs=QualityRequirements())
     assert 'Sample1' in clair3_variants
@@ -35,3 +44,145 @@ def test_parse_ivar_vcf():
     assert isinstance(ivar_variants['Sample1'], pd.DataFrame)
     assert ivar_variants['Sample1'].shape == (78, 9)
     assert ivar_variants['Sample1'].columns.tolist() == expected_columns
+
+
+def test_get_info_process_pool_same_as_serial():
+    basedir = Path('tests/data/tools')
+    serial = variants.get_info(basedir, qc_reqs=QualityRequirements())
+    parallel = variants.get_info(basedir, qc_reqs=QualityRequirements(), processes=2)
+    assert list(parallel.keys()) == list(serial.keys()) == ['Sample1', 'Sample2', 'Sample3']
+    for sample, df in serial.items():
+        assert df.equals(parallel[sample])
+
+
+def test_parse_bcftools_vcf_multiple_alleles_at_same_position():
+    bcftools_variants = variants.get_info(basedir=bcftools_basedir, qc_reqs=QualityRequirements())
+    df = bcftools_variants['Sample1']
+    df_pos = df[df.POS == 95034]
+    assert df_pos.ALT.tolist() == ['A', 'T']
+    assert df_pos.ALT_DP.tolist() == [47, 1]
+    assert df_pos.ALT_FREQ.tolist() == [47 / 48, 1 / 48]
+
+
+def test_variant_filters():
+    filters = VariantFilters(min_depth=100, min_alt_freq=0.5)
+    unfiltered = variants.get_info(basedir=ivar_basedir, qc_reqs=QualityRequirements())['Sample1']
+    filtered = variants.get_info(basedir=ivar_basedir, qc_reqs=QualityRequirements(), filters=filters)['Sample1']
+    expected = unfiltered[(unfiltered.DP >= 100) & (unfiltered.ALT_FREQ >= 0.5)]
+    assert 0 < filtered.shape[0] < unfiltered.shape[0]
+    assert filtered.reset_index(drop=True).equals(expected.reset_index(drop=True))
+    # only records that passed all filters
+    clair3_filtered = variants.get_info(basedir=clair3_basedir,
+                                        qc_reqs=QualityRequirements(),
+                                        filters=VariantFilters(pass_only=True))
+    _, df_vcf = variants.read_vcf(clair3_basedir / 'Sample1.clair3.vcf', pass_only=True)
+    assert set(df_vcf.FILTER) == {'PASS'}
+    assert clair3_filtered['Sample1'].POS.isin(df_vcf.POS).all()
+
+
+def test_variant_filters_parsed_in_chunks(monkeypatch, tmp_path):
+    filters = VariantFilters(min_depth=100, min_alt_freq=0.5, pass_only=True)
+    for basedir in [ivar_basedir, bcftools_basedir, clair3_basedir]:
+        expected = variants.get_info(basedir=basedir, qc_reqs=QualityRequirements(), filters=filters)
+        lines = next(basedir.glob('*.vcf')).read_text().splitlines(keepends=True)
+        header = [x for x in lines if x.startswith('#')]
+        records = [x for x in lines if not x.startswith('#')]
+        # duplicate records across chunk boundaries should be dropped
+        (tmp_path / basedir.name).mkdir()
+        (tmp_path / basedir.name / 'Sample1.vcf').write_text(''.join(header + records[:3] + records[2:]))
+        with monkeypatch.context() as m:
+            m.setattr(variants, 'VCF_CHUNK_SIZE', 3)
+            chunked = variants.get_info(basedir=tmp_path / basedir.name, qc_reqs=QualityRequirements(),
+                                        filters=filters)
+        assert chunked.keys() == expected.keys()
+        for sample, df in expected.items():
+            pd.testing.assert_frame_equal(chunked[sample].reset_index(drop=True), df.reset_index(drop=True))
+
+
+def test_vcf_format_check_independent_of_chunks(monkeypatch, tmp_path):
+    lines = (clair3_basedir / 'Sample1.clair3.vcf').read_text().splitlines(keepends=True)
+    header = [x for x in lines if x.startswith('#')]
+    records = [x for x in lines if not x.startswith('#')]
+    # a Clair3 VCF with a record without DP INFO in a later chunk isn't the right file
+    records[-1] = records[-1].replace(';DP=', ';XDP=')
+    (tmp_path / 'Sample1.clair3.vcf').write_text(''.join(header + records))
+    filters = VariantFilters(min_depth=1)
+    assert variants.get_info(basedir=tmp_path, qc_reqs=QualityRequirements()) == {}
+    with monkeypatch.context() as m:
+        m.setattr(variants, 'VCF_CHUNK_SIZE', 3)
+        assert variants.get_info(basedir=tmp_path, qc_reqs=QualityRequirements(), filters=filters) == {}
+
+
+def test_to_dataframe_interns_mutations():
+    sample_variants = variants.get_info(Path('tests/data/tools'), qc_reqs=QualityRequirements())
+    df = variants.to_dataframe(sample_variants.values())
+    assert isinstance(df.Mutation.dtype, pd.CategoricalDtype)
+    categories = df.Mutation.cat.categories.tolist()
+    assert len(set(categories)) == len(categories) == df.Mutation.nunique()
+    positions = [get_nt_position_int(x) for x in categories]
+    assert positions == sorted(positions)
+    df_pivot = variants.to_variant_pivot_table(df)
+    assert df_pivot.columns.tolist() == categories
+    assert all(isinstance(dtype, pd.SparseDtype) for dtype in df_pivot.dtypes)
+    # only observed variants are stored
+    assert sum(df_pivot[x].array.sp_values.size for x in df_pivot.columns) == df.shape[0]
+    variant = df.loc['Sample1'].iloc[0]
+    assert df_pivot.loc['Sample1', variant.Mutation] == variant['Alternate Allele Frequency']
+
+
+def test_intern_mutations_with_missing_annotation_values():
+    sample_variants = variants.get_info(Path('tests/data/tools'), qc_reqs=QualityRequirements())
+    df = variants.apply_variants_schema(pd.concat(list(sample_variants.values()), ignore_index=True))
+    # same mutations with missing gene or effect in every sample that has them
+    df.loc[df.POS == df.POS.iloc[0], 'gene'] = None
+    df.loc[df.POS == df.POS.iloc[-1], 'effect'] = None
+    assert df.gene.isna().any() and df.effect.isna().any()
+    expected = [variants.parse_aa(gene=row.gene,
+                                  ref=row.REF,
+                                  alt=row.ALT,
+                                  nt_pos=row.POS,
+                                  aa_pos=None,
+                                  snpeff_aa=row.aa,
+                                  effect=row.effect) for row in df.itertuples()]
+    assert variants.intern_mutations(df).tolist() == expected
+
+
+def test_multi_sample_snpsift_table(tmp_path):
+    tools_basedir = Path('tests/data/tools')
+    per_sample = variants.get_info(tools_basedir, qc_reqs=QualityRequirements())
+    snpsift_table = tmp_path / 'snpsift.tsv'
+    pd.concat([pd.read_table(path).assign(sample=path.name.split('.')[0])
+               for path in sorted(tools_basedir.glob('**/*.snpsift.txt'))]).to_csv(snpsift_table, sep='\t', index=False)
+    multi_sample = variants.get_info(tools_basedir, qc_reqs=QualityRequirements(), snpsift_table=snpsift_table)
+    assert multi_sample.keys() == per_sample.keys()
+    for sample, df in per_sample.items():
+        assert multi_sample[sample].reset_index(drop=True).equals(df.reset_index(drop=True))
+
+
+def test_read_snpsift_keeps_na_strings(tmp_path):
+    path = tmp_path / 'Sample1.snpsift.txt'
+    path.write_text('CHROM\tPOS\tREF\tALT\tDP\tAF\tANN[*].GENE\tANN[*].IMPACT\tANN[*].EFFECT\tEFF[*].AA\n'
+                    'NA\t100\tA\tG\t.\t0.5\tNA,NA\tMODERATE\tmissense_variant\tp.Asp10Gly\n'
+                    'NA\t200\tC\tT\t50\t.\tNA\tLOW\tsynonymous_variant\t\n')
+    df = variants.read_snpsift(path)
+    # influenza segment 6 and its gene are both named "NA"
+    assert df.CHROM.tolist() == ['NA', 'NA']
+    assert df.gene.tolist() == ['NA', 'NA']
+    assert df.DP.isna().tolist() == [True, False]
+    assert df.AF.isna().tolist() == [False, True]
+    assert df.aa.isna().tolist() == [False, True]
+    df_variants = variants.to_dataframe([variants.apply_variants_schema(variants.simplify_snpsift(df, 'Sample1'))])
+    assert df_variants.Mutation.tolist()[0] == 'NA:D10G (A100G)'
+
+
+def test_read_snpsift_multi_allelic_af(tmp_path, caplog):
+    path = tmp_path / 'snpsift.tsv'
+    path.write_text('sample\tCHROM\tPOS\tREF\tALT\tDP\tAF\n'
+                    'Sample1\tMN908947.3\t100\tA\tG,T\t100\t0.4,0.3\n'
+                    'Sample2\tMN908947.3\t200\tC\tT\t50\t0.999308\n')
+    df = variants.read_snpsift(path)
+    assert df.AF.dtype == 'float64'
+    assert df.AF.isna().tolist() == [True, False]
+    assert df.AF.iloc[1] == 0.999308
+    assert '"0.4,0.3"' in caplog.text
+    assert variants.read_multi_sample_snpsift(path).keys() == {'Sample1', 'Sample2'}
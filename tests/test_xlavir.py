@@ -4,9 +4,11 @@
 from pathlib import Path
 
 import pandas as pd
+import pytest
 from typer.testing import CliRunner
 
 from xlavir.cli import app
+from xlavir.xlavir import collect
 
 runner = CliRunner()
 
@@ -32,3 +34,23 @@ def test_command_line_interface():
         assert Path(out_report).exists()
         df = pd.read_excel(out_report)
         assert df.shape[0] == 3, 'First sheet in Excel report should have 3 entries'
+        # allele frequencies are written as in the VCF, e.g. "0.999308" in the Sample3 iVar VCF at position 241
+        df_variants = pd.read_excel(out_report, sheet_name='Variants')
+        variant = df_variants[(df_variants.Sample == 'Sample3') & (df_variants.Position == 241)].iloc[0]
+        assert variant['Alternate Allele Frequency'] == 0.999308
+        df_matrix = pd.read_excel(out_report, sheet_name='Variant Matrix', index_col=0)
+        assert df_matrix.loc['Sample3', variant.Mutation] == 0.999308
+        df_summary = pd.read_excel(out_report, sheet_name='Variants Summary', index_col=0)
+        assert df_summary.loc[variant.Mutation, 'Max AF'] == 0.999308
+
+
+def test_collect_reports_errors_per_collector():
+
+    def fail():
+        raise ValueError('bad input')
+
+    collectors = {'ok': lambda: 1, 'bad': fail, 'also_bad': fail}
+    for threads in [1, 4]:
+        with pytest.raises(RuntimeError, match='2 of 3 collectors: bad: .*; also_bad: '):
+            collect(collectors, threads=threads)
+    assert collect({'a': lambda: 1, 'b': lambda: 2}, threads=2) == {'a': 1, 'b': 2}
@@ -12,7 +12,9 @@ import pandas as pd
 from xlavir.__about__ import __version__
 from xlavir.images import get_images_for_sheets
 from xlavir.io.excel_sheet_dataframe import ExcelSheetDataFrame, SheetName
-from xlavir.qc import QualityRequirements
+from xlavir.qc import QualityRequirements, VariantFilters
+from xlavir.tools.mosdepth import CoverageSource, MAX_COORDS_REGIONS
+from xlavir.util import IGNORE_FILENAME
 from xlavir.xlavir import run
 from xlavir.io.xl import write_xlsx_report
 
@@ -65,13 +67,60 @@ def main(
                                                                         'Used for calculation of % genome coverage.'),
         min_genome_coverage: Optional[float] = typer.Option(None, help='Min genome coverage. e.g. 0.95 == 95%'),
         min_median_depth: Optional[int] = typer.Option(None, help='Min median coverage depth'),
+        coverage_threshold: Optional[List[int]] = typer.Option(None, help='Depth threshold for reporting % genome '
+                                                                          'covered at or above that depth. Can '
+                                                                          'specify multiple. '
+                                                                          '[default: 1, 5, 10, 20, 50, 100]'),
         major_allele_freq: float = typer.Option(0.75, help='Major alternate allele fraction'),
+        min_variant_depth: int = typer.Option(0, help='Exclude variants with total depth below this value'),
+        min_variant_freq: float = typer.Option(0.0, help='Exclude variants with alternate allele frequency below '
+                                                         'this value, e.g. 0.05 to exclude low frequency variants '
+                                                         'from low allele frequency variant calling outputs'),
+        pass_variants_only: bool = typer.Option(False, help='Exclude VCF records with a FILTER value other than '
+                                                            '"PASS" or "."'),
+        snpsift_table: Optional[Path] = typer.Option(None, help='SnpSift table of variants of all samples, with a '
+                                                                'single header line and a "sample" column of the '
+                                                                'sample name of each row, instead of per-sample '
+                                                                'SnpSift tables in the input directory'),
         spreadsheet: Optional[List[Path]] = typer.Option(None, help='Copy Excel worksheet from workbook. '
                                                                     'Can specify multiple.'),
         image: Optional[List[Path]] = typer.Option(None, help="Image path for image to add to sheet. "
                                                               "Can specify multiple."),
         image_title: Optional[List[str]] = typer.Option(None, help="Image sheet title"),
         image_description: Optional[List[str]] = typer.Option(None, help="Image description."),
+        exclude: Optional[List[str]] = typer.Option(None, help='Exclude files or directories matching glob pattern '
+                                                               'from input directory search. Can specify multiple. '
+                                                               'Nextflow "work/", ".nextflow/" and top-level '
+                                                               'conda/Singularity cache directories are always '
+                                                               'excluded. A leading "/" anchors a pattern to the '
+                                                               'input directory. Patterns can '
+                                                               f'also be added to a "{IGNORE_FILENAME}" file in the '
+                                                               f'input directory.'),
+        threads: int = typer.Option(1, min=1, help='Number of threads for collecting info from tool outputs '
+                                                   'concurrently and for computing depths from BAM files'),
+        processes: int = typer.Option(1, min=1, help='Number of processes for parsing per-sample Mosdepth depths '
+                                                     'and variant calling outputs in parallel'),
+        coverage_source: CoverageSource = typer.Option(CoverageSource.auto.value,
+                                                       help='Source of sample depth information. "auto" uses '
+                                                            'Mosdepth per-base BED or BAM files, or Mosdepth '
+                                                            'summary, global distribution and quantized outputs '
+                                                            'for samples without them. Median depth from summary '
+                                                            'outputs is approximate.'),
+        depth_store: Optional[Path] = typer.Option(None, help='Directory to store memory-mapped per-sample depth '
+                                                              'arrays in for reuse by later runs. Depths are '
+                                                              'reparsed if a Mosdepth per-base BED or BAM file '
+                                                              'changes.'),
+        primer_bed: Optional[Path] = typer.Option(None, help='Primer scheme BED file (e.g. ARTIC scheme) for '
+                                                             'reporting mean and median depth of each amplicon '
+                                                             'in an "Amplicon Depth" sheet'),
+        coverage_window: Optional[int] = typer.Option(None, min=1,
+                                                      help='Reference sequence window width (bp) for reporting mean '
+                                                           'depth of each sample and window in a "Coverage Matrix" '
+                                                           'sheet, e.g. 100'),
+        low_coverage_bed: Optional[Path] = typer.Option(None, help='Write all zero and low coverage regions of each '
+                                                                   'sample to this BED file. At most '
+                                                                   f'{MAX_COORDS_REGIONS} regions per sample '
+                                                                   'are listed in the report'),
         verbose: bool = typer.Option(default=False, help='Verbose logging'),
         version: Optional[bool] = typer.Option(None, callback=version_callback,
                                                help=f'Print "xlavir version {__version__}" and exit'),
@@ -116,11 +165,27 @@ def main(
         quality_reqs.min_median_depth = min_median_depth
     if major_allele_freq:
         quality_reqs.major_allele_freq = major_allele_freq
+    if coverage_threshold:
+        quality_reqs.coverage_thresholds = sorted(set(coverage_threshold))
+
+    variant_filters = VariantFilters(min_depth=min_variant_depth,
+                                     min_alt_freq=min_variant_freq,
+                                     pass_only=pass_variants_only)
 
     dfs = run(input_dir=input_dir,
               pangolin_lineage_csv=pangolin_lineage_csv,
               ct_values_table=ct_table,
-              quality_reqs=quality_reqs)
+              quality_reqs=quality_reqs,
+              exclude=exclude,
+              threads=threads,
+              processes=processes,
+              coverage_source=coverage_source,
+              depth_store=depth_store,
+              primer_bed=primer_bed,
+              coverage_window=coverage_window,
+              low_coverage_bed=low_coverage_bed,
+              variant_filters=variant_filters,
+              snpsift_table=snpsift_table)
     dfs.append(ExcelSheetDataFrame(
         sheet_name=SheetName.xlavir_info.value,
         df=pd.DataFrame([
@@ -128,6 +193,7 @@ def main(
             ('Python version', f'{version_info.major}.{version_info.minor}.{version_info.micro}'),
             ('Input directory', input_dir.absolute()),
             ('QC Requirements', quality_reqs),
+            ('Variant Filters', variant_filters),
         ], columns=['Attribute', 'Value']).set_index('Attribute')
     ))
     write_xlsx_report(dfs=dfs,
@@ -0,0 +1,143 @@
+"""On-disk store of memory-mapped per-sample depth arrays
+
+Per-base depth arrays and their cumulative sums are saved as `.npy` files for each depth source file (Mosdepth
+per-base BED or BAM), keyed by a fingerprint of the source file path, size and modification time, the parameters
+used to compute the depths (e.g. BAM read filters) and the store version. Stored depths are loaded memory-mapped,
+so region depth sums are O(1) and zero-copy, and later stages or runs do not need to reparse the source file.
+
+Store layout::
+
+    <root>/<fingerprint>/meta.json
+    <root>/<fingerprint>/<contig index>.depth.npy
+    <root>/<fingerprint>/<contig index>.cumsum.npy
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional, Union, Any
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+META_FILENAME = 'meta.json'
+# version of stored depths; bump when the store layout or how depths are computed changes so that entries saved by
+# earlier versions are not used
+STORE_VERSION = 2
+
+
+def fingerprint(path: Path, params: Optional[Dict[str, Any]] = None) -> str:
+    """Get fingerprint of a file from its resolved path, size and modification time, depth computation parameters
+    and the store version"""
+    path = Path(path).resolve()
+    stat = path.stat()
+    params_json = json.dumps(params or {}, sort_keys=True)
+    key = f'{STORE_VERSION}\0{path}\0{stat.st_size}\0{stat.st_mtime_ns}\0{params_json}'
+    return hashlib.sha256(key.encode()).hexdigest()[:24]
+
+
+class StoredDepths:
+    """Per-base depths of a contig with cumulative sums for O(1) region depth sums
+
+    `cumsum` has one more element than `depths` with `cumsum[i]` being the sum of depths before position `i`.
+
+    >>> stored = StoredDepths.from_depths(np.array([0, 2, 4, 6]))
+    >>> stored.region_sums(np.array([0, 1]), np.array([4, 3]))
+    array([12,  6])
+    >>> stored.region_means(np.array([0, 1]), np.array([4, 3]))
+    array([3., 3.])
+    """
+
+    def __init__(self, depths: np.ndarray, cumsum: np.ndarray):
+        self.depths = depths
+        self.cumsum = cumsum
+
+    @classmethod
+    def from_depths(cls, depths: np.ndarray) -> 'StoredDepths':
+        cumsum = np.zeros(depths.size + 1, dtype=np.int64)
+        np.cumsum(depths, dtype=np.int64, out=cumsum[1:])
+        return cls(depths, cumsum)
+
+    def __len__(self) -> int:
+        return self.depths.size
+
+    def region_sums(self, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        """Get sums of depths for 0-based start and end (exclusive) positions of regions"""
+        return self.cumsum[ends] - self.cumsum[starts]
+
+    def region_means(self, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        """Get mean depths for 0-based start and end (exclusive) positions of regions"""
+        return self.region_sums(starts, ends) / np.maximum(ends - starts, 1)
+
+
+class DepthStore:
+    """Store of per-contig depth arrays for each depth source file
+
+    `params` are the parameters used to compute depths from a source file, e.g. BAM read filters. Depths computed
+    with different parameters are stored separately.
+    """
+
+    def __init__(self, root: Union[str, Path]):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def __str__(self) -> str:
+        return f'DepthStore(root="{self.root}")'
+
+    def entry_dir(self, source: Path, params: Optional[Dict[str, Any]] = None) -> Path:
+        return self.root / fingerprint(source, params)
+
+    def load(self, source: Path, params: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, StoredDepths]]:
+        """Load memory-mapped depths for each contig of a source file
+
+        Returns:
+            Dict of contig name to stored depths or None if the source file, or this version of it, is not stored
+            with these `params`
+        """
+        entry_dir = self.entry_dir(source, params)
+        meta_path = entry_dir / META_FILENAME
+        if not meta_path.exists():
+            return None
+        with open(meta_path) as fh:
+            meta = json.load(fh)
+        logger.debug(f'Loading stored depths for "{source}" from "{entry_dir}"')
+        return {contig: StoredDepths(np.load(entry_dir / f'{i}.depth.npy', mmap_mode='r'),
+                                     np.load(entry_dir / f'{i}.cumsum.npy', mmap_mode='r'))
+                for i, contig in enumerate(meta['contigs'])}
+
+    def save(
+            self,
+            source: Path,
+            contig_depths: Dict[str, np.ndarray],
+            params: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, StoredDepths]:
+        """Save depths for each contig of a source file and load them memory-mapped
+
+        Files are written to a temporary directory that is renamed into place, so concurrent workers saving depths
+        for the same source file do not see partially written entries.
+        """
+        entry_dir = self.entry_dir(source, params)
+        tmp_dir = Path(tempfile.mkdtemp(prefix=f'.{entry_dir.name}.', dir=self.root))
+        try:
+            for i, depths in enumerate(contig_depths.values()):
+                stored = StoredDepths.from_depths(depths)
+                np.save(tmp_dir / f'{i}.depth.npy', stored.depths)
+                np.save(tmp_dir / f'{i}.cumsum.npy', stored.cumsum)
+            with open(tmp_dir / META_FILENAME, 'w') as fh:
+                json.dump({'source': str(Path(source).resolve()),
+                           'version': STORE_VERSION,
+                           'params': params or {},
+                           'contigs': list(contig_depths.keys())}, fh)
+            os.rename(tmp_dir, entry_dir)
+            logger.debug(f'Stored depths for "{source}" in "{entry_dir}"')
+        except OSError:
+            # another worker stored depths for the same source file first
+            if not (entry_dir / META_FILENAME).exists():
+                raise
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        return self.load(source, params)
@@ -7,6 +7,9 @@ from enum import Enum
 class SheetName(str, Enum):
     workflow_info = 'Workflow Info'
     qc_stats = 'Stats & QC'
+    segment_depth = 'Segment Depth'
+    amplicon_depth = 'Amplicon Depth'
+    covmat = 'Coverage Matrix'
     consensus = 'Consensus'
     pangolin = 'Pangolin Lineage'
     variants = 'Variants'
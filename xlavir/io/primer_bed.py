@@ -0,0 +1,54 @@
+import logging
+import re
+from pathlib import Path
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# primer names like "nCoV-2019_1_LEFT", "nCoV-2019_1_RIGHT" or alternate primer "nCoV-2019_1_LEFT_alt1"
+PRIMER_NAME_REGEX = re.compile(r'^(?P<amplicon>.+?)_(?P<side>LEFT|RIGHT)(?:_.*)?$', re.IGNORECASE)
+
+
+def read_primer_bed(path: Path) -> pd.DataFrame:
+    """Read primer scheme BED file (e.g. ARTIC scheme) into amplicon insert regions
+
+    Primers are grouped into amplicons by name, e.g. "nCoV-2019_1_LEFT", "nCoV-2019_1_LEFT_alt1" and
+    "nCoV-2019_1_RIGHT" are primers of amplicon "nCoV-2019_1". Amplicon insert regions span from the end of the
+    rightmost left primer to the start of the leftmost right primer, i.e. the region remaining after primer trimming.
+
+    Args:
+        path: Primer scheme BED file path
+
+    Returns:
+        DataFrame of amplicon name, contig and 0-based start and end (exclusive) of amplicon insert regions, in
+        order of contig and start position
+    """
+    df = pd.read_table(path,
+                       header=None,
+                       comment='#',
+                       usecols=[0, 1, 2, 3],
+                       names=['contig', 'start', 'end', 'name'],
+                       dtype={'contig': str, 'name': str})
+    df = pd.concat([df, df.name.str.extract(PRIMER_NAME_REGEX)], axis=1)
+    unmatched = df.amplicon.isna()
+    if unmatched.any():
+        logger.warning(f'Skipping {unmatched.sum()} primers in "{path}" without "_LEFT" or "_RIGHT" in name, '
+                       f'e.g. "{df.name[unmatched].iloc[0]}"')
+        df = df[~unmatched]
+    df['side'] = df.side.str.upper()
+    left = df[df.side == 'LEFT'].groupby(['contig', 'amplicon'], sort=False).end.max()
+    right = df[df.side == 'RIGHT'].groupby(['contig', 'amplicon'], sort=False).start.min()
+    df_amplicons = pd.concat([left.rename('start'), right.rename('end')], axis=1)
+    incomplete = df_amplicons.isna().any(axis=1)
+    if incomplete.any():
+        logger.warning(f'Skipping {incomplete.sum()} amplicons in "{path}" without both left and right primers: '
+                       f'{", ".join(df_amplicons.index.get_level_values("amplicon")[incomplete])}')
+        df_amplicons = df_amplicons[~incomplete]
+    df_amplicons = df_amplicons.astype(int).reset_index()
+    df_amplicons['end'] = df_amplicons[['start', 'end']].max(axis=1)
+    df_amplicons['contig'] = pd.Categorical(df_amplicons.contig, categories=df.contig.unique())
+    df_amplicons.sort_values(['contig', 'start'], inplace=True)
+    df_amplicons['contig'] = df_amplicons.contig.astype(str)
+    logger.info(f'Read {df_amplicons.shape[0]} amplicons from primer scheme BED "{path}"')
+    return df_amplicons[['amplicon', 'contig', 'start', 'end']].reset_index(drop=True)
@@ -8,12 +8,13 @@ from typing import List, Optional, Set, Tuple, Dict, Union
 
 import openpyxl
 import pandas as pd
+from xlsxwriter.format import Format
 from xlsxwriter.workbook import Workbook
 from xlsxwriter.worksheet import Worksheet
 
 from xlavir.images import SheetImage
 from xlavir.io.excel_sheet_dataframe import ExcelSheetDataFrame, SheetName
-from xlavir.qc import QualityRequirements
+from xlavir.qc import QualityRequirements, coverage_breadth_columns
 from xlavir.util import get_col_widths, get_row_heights
 from xlavir.__about__ import __version__
 
@@ -94,11 +95,14 @@ def write_xlsx_report(dfs: List[ExcelSheetDataFrame],
                                                 'border': 1,
                                                 'align': 'center',
                                                 'valign': 'top'})
+        header_fmt = book.add_format(dict(bold=True, border=1, align='center', valign='top'))
         varmap_header_fmt = book.add_format(dict(border=1,
                                                  align='left',
                                                  valign='bottom',
                                                  rotation=45,
                                                  font_name='Courier New'))
+        # default minimum colour of 3-colour scale conditional formatting
+        varmap_blank_fmt = book.add_format(dict(bg_color='F8696B'))
         fail_qc_fmt = book.add_format(dict(bg_color='FC9295',
                                            font_name='Courier New',
                                            bold=True))
@@ -106,7 +110,8 @@ def write_xlsx_report(dfs: List[ExcelSheetDataFrame],
                                            font_name='Courier New',
                                            bold=False))
         float_cols = {'Mean Coverage Depth', 'Mean Depth'}
-        perc_cols = {'% Genome Coverage'}
+        coverage_breadth_cols = [y for _, y, _ in coverage_breadth_columns(quality_reqs.coverage_thresholds)]
+        perc_cols = {'% Genome Coverage', *coverage_breadth_cols}
         perc_2dec_cols = {'Alternate Allele Frequency', 'Min AF', 'Max AF', 'Mean AF'}
 
         images_added = False
@@ -115,9 +120,13 @@ def write_xlsx_report(dfs: List[ExcelSheetDataFrame],
             if images_for_sheets and esdf.sheet_name == SheetName.workflow_info.value:
                 add_images(images_for_sheets, book)
                 images_added = True
-            esdf.df.to_excel(writer, sheet_name=esdf.sheet_name, **esdf.pd_to_excel_kwargs)
-
-            sheet: Worksheet = book.get_worksheet_by_name(esdf.sheet_name)
+            sparse = is_sparse_df(esdf.df)
+            if sparse:
+                sheet: Worksheet = book.add_worksheet(esdf.sheet_name)
+                write_sparse_df(sheet, esdf.df, header_fmt, **esdf.pd_to_excel_kwargs)
+            else:
+                esdf.df.to_excel(writer, sheet_name=esdf.sheet_name, **esdf.pd_to_excel_kwargs)
+                sheet: Worksheet = book.get_worksheet_by_name(esdf.sheet_name)
 
             idx_and_cols = [esdf.df.index.name] + list(esdf.df.columns)
 
@@ -154,7 +163,8 @@ def write_xlsx_report(dfs: List[ExcelSheetDataFrame],
                     sheet.set_column(i, i, width, monospace_wrap_fmt)
 
                 for i, idx in enumerate(esdf.df.index, start=1):
-                    sheet.set_row(i, get_row_heights(esdf.df, idx), monospace_wrap_fmt)
+                    # sparse matrix values are numbers without newlines
+                    sheet.set_row(i, 15 if sparse else get_row_heights(esdf.df, idx), monospace_wrap_fmt)
 
             if esdf.sheet_name == SheetName.varmat.value:
                 sheet.write_comment(row=0,
@@ -165,7 +175,8 @@ def write_xlsx_report(dfs: List[ExcelSheetDataFrame],
                                             f'frequency values where a major variant '
                                             f'(e.g. alternate allele frequency >={quality_reqs.major_allele_freq}) '
                                             f'is highlighted in green. Red indicates where the allele variant is not '
-                                            f'observed in the sample (e.g. alternate allele frequency equals 0.0).')
+                                            f'observed in the sample (i.e. empty cells with an alternate allele '
+                                            f'frequency of 0.0).')
                 sheet.set_row(0, max(len(x) for x in idx_and_cols) * 5)
                 for i, col_name in enumerate(idx_and_cols):
                     if i == 0:
@@ -182,11 +193,54 @@ def write_xlsx_report(dfs: List[ExcelSheetDataFrame],
                                                       min_value=0.0,
                                                       mid_value=quality_reqs.major_allele_freq,
                                                       max_value=1.0))
+                # unobserved variants are not written, so give empty cells the 0.0 colour of the colour scale
+                sheet.conditional_format(first_row=1,
+                                         first_col=1,
+                                         last_row=esdf.df.shape[0],
+                                         last_col=esdf.df.shape[1],
+                                         options=dict(type='blanks', format=varmap_blank_fmt))
+
+            if esdf.sheet_name == SheetName.covmat.value:
+                sheet.write_comment(row=0,
+                                    col=0,
+                                    comment=f'This sheet contains a matrix of mean sequencing coverage depth values '
+                                            f'for samples and reference sequence windows. 3-colour conditional '
+                                            f'formatting is applied to the mean depth values where red indicates no '
+                                            f'coverage, yellow indicates the minimum median depth required to pass '
+                                            f'QC ({quality_reqs.min_median_depth}X) and green indicates the maximum '
+                                            f'mean depth.')
+                sheet.set_row(0, max(len(x) for x in idx_and_cols) * 5)
+                for i, col_name in enumerate(idx_and_cols):
+                    if i == 0:
+                        continue
+                    sheet.write_string(0, i, string=col_name, cell_format=varmap_header_fmt)
+                sheet.conditional_format(first_row=1,
+                                         first_col=1,
+                                         last_row=esdf.df.shape[0],
+                                         last_col=esdf.df.shape[1],
+                                         options=dict(type='3_color_scale',
+                                                      min_type='num',
+                                                      mid_type='num',
+                                                      max_type='max',
+                                                      min_value=0,
+                                                      mid_value=quality_reqs.min_median_depth))
 
             if esdf.sheet_name == SheetName.consensus.value:
                 sheet.hide_gridlines(2)
                 sheet.hide_row_col_headers()
 
+            if esdf.sheet_name == SheetName.amplicon_depth.value:
+                for column in ['Median Coverage Depth', 'Mean Coverage Depth']:
+                    add_cond_fmt(sheet,
+                                 esdf.df,
+                                 column,
+                                 dict(type='3_color_scale',
+                                      min_type='num',
+                                      mid_type='num',
+                                      max_type='max',
+                                      min_value=0,
+                                      mid_value=quality_reqs.min_median_depth))
+
             if esdf.sheet_name == SheetName.qc_stats.value:
                 columns = esdf.df.columns.tolist()
                 qc_status_column = 'QC Status'
@@ -206,12 +260,13 @@ def write_xlsx_report(dfs: List[ExcelSheetDataFrame],
                                        mid_type='num',
                                        max_type='num', )
 
-                add_cond_fmt(sheet,
-                             esdf.df,
-                             '% Genome Coverage',
-                             {**cond_fmt_3color, **dict(min_value=0.0,
-                                                        mid_value=quality_reqs.min_genome_coverage,
-                                                        max_value=1.0)})
+                for column in ['% Genome Coverage', *coverage_breadth_cols]:
+                    add_cond_fmt(sheet,
+                                 esdf.df,
+                                 column,
+                                 {**cond_fmt_3color, **dict(min_value=0.0,
+                                                            mid_value=quality_reqs.min_genome_coverage,
+                                                            max_value=1.0)})
                 for column in ['Median Coverage Depth', 'Mean Coverage Depth']:
                     add_cond_fmt(sheet,
                                  esdf.df,
@@ -256,6 +311,41 @@ def write_xlsx_report(dfs: List[ExcelSheetDataFrame],
     add_comments(xlsx_path=output_xlsx, failed_samples=failed_samples, esdfs=dfs)
 
 
+def is_sparse_df(df: pd.DataFrame) -> bool:
+    """Check if all columns of a DataFrame are sparse arrays, e.g. the variant matrix"""
+    return df.shape[1] > 0 and all(isinstance(dtype, pd.SparseDtype) for dtype in df.dtypes)
+
+
+def write_sparse_df(sheet: Worksheet,
+                    df: pd.DataFrame,
+                    header_fmt: Format,
+                    freeze_panes: Optional[Tuple[int, int]] = None,
+                    **kwargs) -> None:
+    """Write a DataFrame of sparse columns to a worksheet, writing only cells that are not the fill value
+
+    Like `pd.DataFrame.to_excel`, the index is written to the first column and column names to the first row. Cells
+    of sparse array fill values (e.g. 0.0 for unobserved variants) are left empty, so the number of cells written is
+    the number of stored values rather than rows times columns.
+
+    Args:
+        sheet: Worksheet to write to
+        df: DataFrame with sparse columns
+        header_fmt: Format for index and column names
+        freeze_panes: Row and column to freeze panes at
+        **kwargs: Other `pd.DataFrame.to_excel` keyword arguments, which are ignored
+    """
+    sheet.write_string(0, 0, str(df.index.name or ''), header_fmt)
+    for i, idx in enumerate(df.index, start=1):
+        sheet.write_string(i, 0, str(idx), header_fmt)
+    for j, (col_name, values) in enumerate(df.items(), start=1):
+        sheet.write_string(0, j, str(col_name), header_fmt)
+        array: pd.arrays.SparseArray = values.array
+        for i, value in zip(array.sp_index.indices.tolist(), array.sp_values.tolist()):
+            sheet.write_number(i + 1, j, value)
+    if freeze_panes:
+        sheet.freeze_panes(*freeze_panes)
+
+
 def add_cond_fmt(sheet: Worksheet,
                  df: pd.DataFrame,
                  column: str,
@@ -318,7 +408,10 @@ def add_comments(xlsx_path: Path,
     logger.info(f'Loaded "{xlsx_path.name}" using openpyxl. Sheets: {book.sheetnames}')
     logger.info('Adjusting comment textbox sizes to fit text')
     for sheetname in book.sheetnames:
-        for row in book[sheetname]:
+        sheet: Worksheet = book[sheetname]
+        # only the header of the sparse variant matrix has comments before value comments are added below
+        rows = sheet.iter_rows(max_row=1) if sheetname == SheetName.varmat.value else sheet.rows
+        for row in rows:
             for cell in row:
                 if cell.comment:
                     comment: Comment = cell.comment
@@ -327,6 +420,9 @@ def add_comments(xlsx_path: Path,
                     comment.author = f'xlavir version {__version__}'
 
     sheet_names = [
+        SheetName.segment_depth.value,
+        SheetName.amplicon_depth.value,
+        SheetName.covmat.value,
         SheetName.pangolin.value,
         SheetName.variants.value,
         SheetName.varmat.value,
@@ -336,10 +432,7 @@ def add_comments(xlsx_path: Path,
         with contextlib.suppress(KeyError):
             sheet: Worksheet = book[sheet_name]
             logger.info(f'Highlighting failed samples in sheet "{sheet_name}".')
-            for i, row in enumerate(sheet.rows):
-                if i == 0:
-                    continue
-                cell = row[0]
+            for (cell,) in sheet.iter_rows(min_row=2, max_col=1):
                 if cell.value in failed_samples:
                     cell.comment = Comment(f'Warning: Sample "{cell.value}" has failed general NGS QC',
                                            author='xlavir')
@@ -352,28 +445,24 @@ def add_comments(xlsx_path: Path,
             sheet: Worksheet = book[SheetName.varmat.value]
             logger.info('Adding additional comments to variant matrix values')
             df_varmat = esd_varmat.df
+            sample_rows = {sample: i for i, sample in enumerate(df_varmat.index, start=2)}
+            mutation_cols = {mutation: j for j, mutation in enumerate(df_varmat.columns, start=2)}
             variants: Dict[Tuple[str, str], Dict[str, Union[str, float, int]]] = esd_variants \
                 .df.reset_index() \
                 .set_index(['Sample', 'Mutation']) \
                 .to_dict(orient='index')
-
-            for i, row in enumerate(sheet.rows):
-                if i == 0:
+            # only observed variants have values in the sparse matrix, so comment only on those cells
+            for (sample, mutation), variant in variants.items():
+                row = sample_rows.get(sample)
+                col = mutation_cols.get(mutation)
+                if row is None or col is None:
                     continue
-                sample = df_varmat.index.values[i - 1]
-                for j, cell in enumerate(row):
-                    if j == 0:
-                        continue
-                    mutation = df_varmat.columns.values[j - 1]
-                    if variant := variants.get((sample, mutation), None):
-                        variant_str = '\n'.join(f'{k}: {v}' for k, v in variant.items())
-                        comment_text = f'Sample: {sample}\nMutation: {mutation}\n{variant_str}'
-                    else:
-                        comment_text = f'Mutation "{mutation}" not found in sample "{sample}"'
-                    cell.comment = Comment(comment_text,
-                                           author=f'xlavir version {__version__}',
-                                           width=300,
-                                           height=len(comment_text))
+                variant_str = '\n'.join(f'{k}: {v}' for k, v in variant.items())
+                comment_text = f'Sample: {sample}\nMutation: {mutation}\n{variant_str}'
+                sheet.cell(row=row, column=col).comment = Comment(comment_text,
+                                                                  author=f'xlavir version {__version__}',
+                                                                  width=300,
+                                                                  height=len(comment_text))
     with contextlib.suppress(KeyError):
         sheet: Worksheet = book[SheetName.consensus.value]
 
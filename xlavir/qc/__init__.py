@@ -1,15 +1,40 @@
 import logging
-from typing import Dict, List, Tuple
+from typing import Dict, List, Tuple, Sequence
 
+import numpy as np
 import pandas as pd
 
-from xlavir.qc.quality_requirements import QualityRequirements
+from xlavir.qc.quality_requirements import QualityRequirements, VariantFilters  # noqa: F401
 from xlavir.tools import mosdepth, samtools
 
 logger = logging.getLogger(__name__)
 
 
-def columns(low_coverage_threshold: int = 5, has_ct = False) -> List[Tuple[str, str, str]]:
+def coverage_breadth_column(threshold: int) -> str:
+    """Get the column id for the breadth of coverage at a depth threshold
+
+    >>> coverage_breadth_column(10)
+    'coverage_breadth_10x'
+    """
+    return f'coverage_breadth_{threshold}x'
+
+
+def coverage_breadth_columns(coverage_thresholds: Sequence[int] = ()) -> List[Tuple[str, str, str]]:
+    return [
+        (
+            coverage_breadth_column(t),
+            f'% Genome >={t}X',
+            f'Percent of reference genome sequence with at least {t}X coverage depth'
+        )
+        for t in coverage_thresholds
+    ]
+
+
+def columns(
+        low_coverage_threshold: int = 5,
+        has_ct=False,
+        coverage_thresholds: Sequence[int] = ()
+) -> List[Tuple[str, str, str]]:
     cols = [
         ('sample', 'Sample', 'Sample name'),
         ('ct_value', 'Ct Value', 'Real-time PCR Ct value') if has_ct else None,
@@ -40,6 +65,7 @@ def columns(low_coverage_threshold: int = 5, has_ct = False) -> List[Tuple[str,
             'Median Coverage Depth',
             'Median sequencing coverage depth across entire reference genome sequence.',
         ),
+        *coverage_breadth_columns(coverage_thresholds),
         (
             'n_total_reads',
             '# Total Reads',
@@ -70,20 +96,114 @@ def columns(low_coverage_threshold: int = 5, has_ct = False) -> List[Tuple[str,
         (
             'zero_coverage_coords',
             '0X Coverage Regions',
-            'A list of reference sequence 1-based regions with no coverage (0X).'
+            f'A list of reference sequence 1-based regions with no coverage (0X). At most '
+            f'{mosdepth.MAX_COORDS_REGIONS} regions are listed followed by the total number of regions and positions.'
         ),
         (
             'low_coverage_coords',
             f'<{low_coverage_threshold}X Coverage Regions',
             f'A list of reference sequence 1-based regions with less than {low_coverage_threshold}'
-            f' coverage depth.'
+            f' coverage depth. At most {mosdepth.MAX_COORDS_REGIONS} regions are listed followed by the total number'
+            f' of regions and positions.'
         ),
     ]
     return [x for x in cols if x is not None]
 
 
-def report_format(df: pd.DataFrame, low_coverage_threshold: int = 5) -> pd.DataFrame:
-    output_cols = columns(low_coverage_threshold)
+def segment_columns(low_coverage_threshold: int = 5) -> List[Tuple[str, str, str]]:
+    segment_cols = {'sample', 'genome_coverage', 'mean_coverage', 'median_coverage', 'n_zero_coverage',
+                    'n_low_coverage', 'ref_seq_length', 'zero_coverage_coords', 'low_coverage_coords'}
+    cols = [x for x in columns(low_coverage_threshold) if x[0] in segment_cols]
+    return [cols[0], ('contig', 'Segment', 'Reference sequence segment or contig name'), *cols[1:]]
+
+
+def create_segment_depth_dataframe(sample_depth_info: Dict[str, mosdepth.MosdepthDepthInfo],
+                                   low_coverage_threshold: int = 5) -> pd.DataFrame:
+    """Create a dataframe with a row of depth info for each sample and reference segment
+
+    Only samples with depth info for more than one reference sequence contig, e.g. segments of influenza virus
+    genomes, are included.
+    """
+    rows = []
+    for sample in sorted(sample_depth_info.keys()):
+        for contig_info in sample_depth_info[sample].contigs:
+            row = {'sample': sample, **contig_info.dict()}
+            for key in ['zero_coverage_coords', 'low_coverage_coords']:
+                row[key] = mosdepth.summarize_coords(row[key])
+            rows.append(row)
+    output_cols = segment_columns(low_coverage_threshold)
+    df = pd.DataFrame(rows, columns=[x for x, _, _ in output_cols])
+    df.rename(columns={x: y for x, y, _ in output_cols}, inplace=True)
+    df.set_index('Sample', inplace=True)
+    return df
+
+
+amplicon_columns = [
+    ('sample', 'Sample', 'Sample name'),
+    ('amplicon', 'Amplicon', 'Amplicon name from primer scheme BED'),
+    ('contig', 'Contig', 'Reference sequence contig of amplicon'),
+    ('start', 'Start', '1-based start position of amplicon insert region, i.e. excluding primers'),
+    ('end', 'End', '1-based end position of amplicon insert region, i.e. excluding primers'),
+    ('mean_coverage', 'Mean Coverage Depth', 'Mean sequencing coverage depth across amplicon insert region'),
+    ('median_coverage', 'Median Coverage Depth', 'Median sequencing coverage depth across amplicon insert region'),
+]
+
+
+def create_amplicon_depth_dataframe(sample_depth_info: Dict[str, mosdepth.MosdepthDepthInfo],
+                                    amplicons: pd.DataFrame) -> pd.DataFrame:
+    """Create a long format dataframe of mean and median depth for each sample and amplicon
+
+    Args:
+        sample_depth_info: Sample depth info with amplicon depths
+        amplicons: Amplicon insert regions from `xlavir.io.primer_bed.read_primer_bed`
+
+    Returns:
+        Dataframe with a row for each sample and amplicon
+    """
+    samples = [sample for sample in sorted(sample_depth_info.keys())
+               if sample_depth_info[sample].amplicon_mean_coverage]
+    n_amplicons = amplicons.shape[0]
+    df = pd.DataFrame({
+        'sample': np.repeat(samples, n_amplicons),
+        'amplicon': np.tile(amplicons.amplicon.to_numpy(), len(samples)),
+        'contig': np.tile(amplicons.contig.to_numpy(), len(samples)),
+        'start': np.tile(amplicons.start.to_numpy() + 1, len(samples)),
+        'end': np.tile(amplicons.end.to_numpy(), len(samples)),
+        'mean_coverage': np.concatenate([sample_depth_info[x].amplicon_mean_coverage for x in samples] or [[]]),
+        'median_coverage': np.concatenate([sample_depth_info[x].amplicon_median_coverage for x in samples] or [[]]),
+    })
+    if amplicons.contig.nunique() == 1:
+        df.drop(columns='contig', inplace=True)
+    df.rename(columns={x: y for x, y, _ in amplicon_columns}, inplace=True)
+    df.set_index('Sample', inplace=True)
+    return df
+
+
+def create_coverage_matrix_dataframe(sample_depth_info: Dict[str, mosdepth.MosdepthDepthInfo]) -> pd.DataFrame:
+    """Create a matrix dataframe of mean depth rounded to the nearest integer for each sample (rows) and reference
+    sequence window (columns)
+
+    Args:
+        sample_depth_info: Sample depth info with window mean depths
+
+    Returns:
+        Dataframe with a row for each sample and a column for each reference sequence window
+    """
+    df = pd.DataFrame.from_dict({sample: sample_depth_info[sample].window_mean_coverage
+                                 for sample in sorted(sample_depth_info.keys())
+                                 if sample_depth_info[sample].window_mean_coverage},
+                                orient='index')
+    df = df.round(0)
+    df.index.name = 'Sample'
+    return df
+
+
+def report_format(
+        df: pd.DataFrame,
+        low_coverage_threshold: int = 5,
+        coverage_thresholds: Sequence[int] = ()
+) -> pd.DataFrame:
+    output_cols = columns(low_coverage_threshold, coverage_thresholds=coverage_thresholds)
     df.rename(columns={x: y for x, y, _ in output_cols}, inplace=True)
     df.set_index('Sample', inplace=True)
     return df
@@ -98,6 +218,17 @@ def create_qc_stats_dataframe(sample_depth_info: Dict[str, mosdepth.MosdepthDept
     merged_stats_info = {}
     for sample in sample_names:
         depth_info = sample_depth_info[sample].dict() if sample in sample_depth_info else {}
+        # flatten breadth of coverage at each depth threshold into separate columns
+        for threshold, breadth in depth_info.pop('coverage_breadth', {}).items():
+            depth_info[coverage_breadth_column(threshold)] = breadth
+        # contig names, per-contig, amplicon and window depth info are not reported in this sheet
+        for key in ['ref_seq_names', 'contigs', 'amplicon_mean_coverage', 'amplicon_median_coverage',
+                    'window_mean_coverage']:
+            depth_info.pop(key, None)
+        # full region lists can be written to a BED file with `mosdepth.write_low_coverage_bed`
+        for key in ['zero_coverage_coords', 'low_coverage_coords']:
+            if key in depth_info:
+                depth_info[key] = mosdepth.summarize_coords(depth_info[key])
         mapping_info = sample_mapping_info[sample].dict() if sample in sample_mapping_info else {}
         merged_stats_info[sample] = {**depth_info, **mapping_info}
         sample_ct = sample_cts.get(sample)
@@ -124,7 +255,8 @@ def create_qc_stats_dataframe(sample_depth_info: Dict[str, mosdepth.MosdepthDept
     present_cols = set(df_stats.columns)
     output_cols = columns(
         quality_reqs.low_coverage_threshold,
-        has_ct=bool(sample_cts)
+        has_ct=bool(sample_cts),
+        coverage_thresholds=quality_reqs.coverage_thresholds
     )
     df_stats = df_stats.loc[:, [x for x, y, _ in output_cols if x in present_cols]]
 
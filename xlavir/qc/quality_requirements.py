@@ -1,8 +1,24 @@
+from typing import List
+
 from pydantic import BaseModel
 
+from xlavir.tools.mosdepth import COVERAGE_THRESHOLDS
+
 
 class QualityRequirements(BaseModel):
     min_genome_coverage: float = 0.95
     min_median_depth: int = 30
     low_coverage_threshold: int = 10
     major_allele_freq: float = 0.75
+    coverage_thresholds: List[int] = list(COVERAGE_THRESHOLDS)
+
+
+class VariantFilters(BaseModel):
+    """Variant filters applied while parsing VCF files and SnpSift tables
+
+    Variants with a total depth below `min_depth` or an alternate allele frequency below `min_alt_freq` are removed.
+    If `pass_only`, VCF records with a FILTER value other than "PASS" or "." (no filters applied) are removed.
+    """
+    min_depth: int = 0
+    min_alt_freq: float = 0.0
+    pass_only: bool = False
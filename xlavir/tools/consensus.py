@@ -1,13 +1,13 @@
 import logging
 import re
 from pathlib import Path
-from typing import List, Mapping
+from typing import List, Mapping, Union
 
 import pandas as pd
 from Bio import SeqIO
 from Bio.SeqRecord import SeqRecord
 
-from xlavir.util import find_file_for_each_sample
+from xlavir.util import find_file_for_each_sample, FileIndex
 
 SAMPLE_NAME_CLEANUP = [
     re.compile(r'\.AF0\.\d+'),
@@ -62,7 +62,7 @@ def fasta_dataframe(sample_fasta: Mapping[str, Path]) -> pd.DataFrame:
     return df
 
 
-def get_info(basedir: Path) -> pd.DataFrame:
+def get_info(basedir: Union[Path, FileIndex]) -> pd.DataFrame:
     sample_fasta = find_file_for_each_sample(basedir,
                                              glob_patterns=GLOB_PATTERNS,
                                              sample_name_cleanup=SAMPLE_NAME_CLEANUP)
@@ -2,9 +2,9 @@ import json
 import logging
 import re
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Union
 
-from xlavir.util import find_file_for_each_sample
+from xlavir.util import find_file_for_each_sample, FileIndex
 
 logger = logging.getLogger(__name__)
 
@@ -27,7 +27,7 @@ def parse_total_reads(p: Path) -> int:
     return total
 
 
-def get_info(basedir: Path) -> Dict[str, int]:
+def get_info(basedir: Union[Path, FileIndex]) -> Dict[str, int]:
     out = {}
     sample_fastp = find_file_for_each_sample(basedir,
                                              glob_patterns=GLOB_PATTERNS,
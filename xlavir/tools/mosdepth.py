@@ -1,13 +1,28 @@
+import logging
+import re
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from functools import partial
+from itertools import groupby
+from operator import attrgetter
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Union, Tuple, Optional, Sequence, List, Any, Iterator
 
 import numpy as np
 import pandas as pd
 from pydantic import BaseModel
 
-from xlavir.util import find_file_for_each_sample
+from xlavir.io.depth_store import DepthStore, StoredDepths
+from xlavir.util import find_file_for_each_sample, get_file_index, FileIndex, map_samples
+
+logger = logging.getLogger(__name__)
 
 SAMPLE_NAME_CLEANUP = [
+    # Mosdepth output suffixes with optional nf-core/viralrecon ".genome" or ".amplicon" region prefix, only removed
+    # from the end of filenames so that sample names like "X.amplicon_run2" are kept
+    re.compile(r'(\.genome|\.amplicon)?(\.per-base\.bed\.gz|\.mosdepth\.summary\.txt|\.mosdepth\.global\.dist\.txt|'
+               r'\.quantized\.bed\.gz|\.thresholds\.bed\.gz)$'),
     '.genome.per-base.bed.gz',
     '.per-base.bed.gz',
     '.bam',
@@ -21,13 +36,93 @@ SAMPLE_NAME_CLEANUP = [
     '.bam',
 ]
 
-GLOB_PATTERNS = [
+# default depth thresholds for breadth of coverage
+COVERAGE_THRESHOLDS = [1, 5, 10, 20, 50, 100]
+
+# maximum number of regions listed in zero and low coverage coordinates report cells
+MAX_COORDS_REGIONS = 50
+# maximum number of characters in an Excel cell
+EXCEL_MAX_CELL_CHARS = 32767
+
+# unmapped, secondary, QC fail and duplicate reads are excluded from BAM depths, same as pysam pileup and
+# samtools depth by default
+BAM_EXCLUDE_FLAGS = 0x4 | 0x100 | 0x200 | 0x400
+# paired, proper pair and supplementary alignment BAM flags; orphan reads (paired reads that are not in a proper
+# pair) are excluded and bases in the overlap of the two reads of a proper pair are counted once, same as pysam
+# pileup by default (ignore_orphans=True, ignore_overlaps=True)
+BAM_FLAG_PAIRED = 0x1
+BAM_FLAG_PROPER_PAIR = 0x2
+BAM_FLAG_SUPPLEMENTARY = 0x800
+# bases below this base quality are not counted in BAM depths, same as pysam pileup by default
+BAM_MIN_BASE_QUALITY = 13
+# CIGAR operations consuming both query and reference (M, =, X), query only (I, S) and reference only (D, N)
+CIGAR_MATCH_OPS = {0, 7, 8}
+CIGAR_QUERY_OPS = {1, 4}
+CIGAR_REF_OPS = {2, 3}
+
+# priority-ordered tiers of glob patterns
+PER_BASE_GLOB_PATTERNS = [
     '**/mosdepth/**/*.genome.per-base.bed.gz',
     '**/mosdepth/**/*.per-base.bed.gz',
-    # fallback to parsing BAM files
+]
+BAM_GLOB_PATTERNS = [
     '**/*.trim*.bam',
     '**/*.bam',
 ]
+# fallback to parsing BAM files only for samples without Mosdepth output
+GLOB_PATTERNS = PER_BASE_GLOB_PATTERNS + BAM_GLOB_PATTERNS
+
+SUMMARY_GLOB_PATTERNS = [
+    '**/mosdepth/**/*.genome.mosdepth.summary.txt',
+    '**/mosdepth/**/*.mosdepth.summary.txt',
+]
+GLOBAL_DIST_GLOB_PATTERNS = [
+    '**/mosdepth/**/*.genome.mosdepth.global.dist.txt',
+    '**/mosdepth/**/*.mosdepth.global.dist.txt',
+]
+QUANTIZED_GLOB_PATTERNS = [
+    '**/mosdepth/**/*.genome.quantized.bed.gz',
+    '**/mosdepth/**/*.quantized.bed.gz',
+]
+THRESHOLDS_GLOB_PATTERNS = [
+    '**/mosdepth/**/*.genome.thresholds.bed.gz',
+    '**/mosdepth/**/*.thresholds.bed.gz',
+]
+
+
+class CoverageSource(str, Enum):
+    """Source of sample depth information
+
+    - auto: Mosdepth per-base BED or BAM file, or Mosdepth summary outputs for samples without per-base depths
+    - summary: Mosdepth summary, global distribution, quantized and thresholds outputs
+    - per_base: Mosdepth per-base BED, or BAM file if there is no Mosdepth output
+    - bam: BAM file
+    """
+    auto = 'auto'
+    summary = 'summary'
+    per_base = 'per-base'
+    bam = 'bam'
+
+
+class MosdepthSummaryFiles(BaseModel):
+    """Mosdepth summary output files for a sample"""
+    summary: Path
+    global_dist: Path
+    quantized: Optional[Path] = None
+    thresholds: Optional[Path] = None
+
+
+class ContigDepthInfo(BaseModel):
+    """Depth information for a reference sequence contig of a sample, e.g. a segment of a segmented virus genome."""
+    contig: str
+    n_zero_coverage: int
+    zero_coverage_coords: str
+    n_low_coverage: int
+    low_coverage_coords: str
+    genome_coverage: float
+    mean_coverage: float
+    median_coverage: float
+    ref_seq_length: int
 
 
 class MosdepthDepthInfo(BaseModel):
@@ -40,8 +135,19 @@ class MosdepthDepthInfo(BaseModel):
     low_coverage_coords: str
     genome_coverage: float
     mean_coverage: float
-    median_coverage: int
+    # median of an even number of depths can be halfway between two depths, same as for contigs and amplicons
+    median_coverage: float
     ref_seq_length: int
+    # reference sequence contig names; coverage coordinates are prefixed with contig names if more than one contig
+    ref_seq_names: List[str] = []
+    coverage_breadth: Dict[int, float] = {}
+    # per-contig depth information if the reference has more than one contig
+    contigs: List[ContigDepthInfo] = []
+    # mean and median depth of each amplicon insert region of a primer scheme, in primer scheme amplicon order
+    amplicon_mean_coverage: List[float] = []
+    amplicon_median_coverage: List[float] = []
+    # mean depth of each reference sequence window, keyed by window label, e.g. "1-100" or "<contig>:1-100"
+    window_mean_coverage: Dict[str, float] = {}
 
 
 def read_mosdepth_bed(p: Path) -> pd.DataFrame:
@@ -67,18 +173,90 @@ def get_interval_coords(depths: np.ndarray, threshold: int = 0) -> str:
         Coordinates of intervals where depth is zero or below threshold
     """
     mask = depths == 0 if threshold == 0 else depths < threshold
-    below = np.where(mask)[0]
-    coords: list[list[int]] = []
-    for x in below:
-        if coords:
-            last = coords[-1][-1]
-            if x == last + 1:
-                coords[-1].append(x)
-            else:
-                coords.append([x])
-        else:
-            coords.append([x])
-    return '; '.join([f'{xs[0] + 1}-{xs[-1] + 1}' if xs[0] != xs[-1] else f'{xs[0] + 1}' for xs in coords])
+    starts, ends = get_mask_runs(mask)
+    return format_coords(starts, ends)
+
+
+def get_mask_runs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Get 0-based start and end (exclusive) indices of runs of True values in a boolean mask
+
+    >>> get_mask_runs(np.array([True, False, False, True, True]))
+    (array([0, 3]), array([1, 5]))
+    """
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def format_coords(starts: np.ndarray, ends: np.ndarray) -> str:
+    """Format 0-based start and end (exclusive) indices of intervals as 1-based coordinates string
+
+    >>> format_coords(np.array([0, 5, 14]), np.array([1, 8, 16]))
+    '1; 6-8; 15-16'
+    """
+    return '; '.join([f'{start + 1}-{end}' if end - start > 1 else f'{end}'
+                      for start, end in zip(starts.tolist(), ends.tolist())])
+
+
+def coords_regions(coords: str) -> List[Tuple[str, int, int]]:
+    """Parse a coordinates string into contig name (empty if not prefixed), 0-based start and end (exclusive) of
+    each region
+
+    >>> coords_regions('1; 6-8')
+    [('', 0, 1), ('', 5, 8)]
+    >>> coords_regions('seg4:1; seg4:6-8')
+    [('seg4', 0, 1), ('seg4', 5, 8)]
+    >>> coords_regions('')
+    []
+    """
+    regions = []
+    for region in coords.split('; ') if coords else []:
+        contig, _, positions = region.rpartition(':')
+        start, _, end = positions.partition('-')
+        regions.append((contig, int(start) - 1, int(end or start)))
+    return regions
+
+
+def summarize_coords(coords: str, max_regions: int = MAX_COORDS_REGIONS) -> str:
+    """Summarize coordinates with more than `max_regions` regions as the first `max_regions` regions followed by
+    the total number of regions and positions
+
+    Summaries are truncated to fewer regions if needed to fit in an Excel cell.
+
+    >>> summarize_coords('1; 6-8; 15-16', max_regions=2)
+    '1; 6-8; ... (3 regions, 6 bp total)'
+    >>> summarize_coords('1; 6-8', max_regions=2)
+    '1; 6-8'
+    """
+    regions = coords.split('; ') if coords else []
+    if len(regions) <= max_regions and len(coords) <= EXCEL_MAX_CELL_CHARS:
+        return coords
+    total_bp = sum(end - start for _, start, end in coords_regions(coords))
+    suffix = f'; ... ({len(regions)} regions, {total_bp} bp total)'
+    head = '; '.join(regions[:max_regions])
+    if len(head) + len(suffix) > EXCEL_MAX_CELL_CHARS:
+        head = head[:EXCEL_MAX_CELL_CHARS - len(suffix) + 2].rpartition('; ')[0]
+    return head + suffix
+
+
+def write_low_coverage_bed(sample_depth_info: Dict[str, MosdepthDepthInfo], path: Path) -> None:
+    """Write all zero and low coverage regions of each sample to a BED file
+
+    Unlike the report, where at most `MAX_COORDS_REGIONS` regions are listed per cell, all regions are written.
+    Columns are contig, 0-based start, end (exclusive), sample and coverage class, e.g. "0X" or "<5X". Regions are
+    written line by line in sample order without building a table of all samples' regions.
+    """
+    n_regions = 0
+    with open(path, 'w') as fh:
+        fh.write('#contig\tstart\tend\tsample\tcoverage\n')
+        for sample in sorted(sample_depth_info.keys()):
+            info = sample_depth_info[sample]
+            ref_seq_name = info.ref_seq_names[0] if len(info.ref_seq_names) == 1 else ''
+            for coverage, coords in [('0X', info.zero_coverage_coords),
+                                     (f'<{info.low_coverage_threshold}X', info.low_coverage_coords)]:
+                for contig, start, end in coords_regions(coords):
+                    fh.write(f'{contig or ref_seq_name}\t{start}\t{end}\t{sample}\t{coverage}\n')
+                    n_regions += 1
+    logger.info(f'Wrote {n_regions} zero and low coverage regions of {len(sample_depth_info)} samples to "{path}"')
 
 
 def get_genome_coverage(depths: np.ndarray, low_coverage_threshold: int = 5) -> float:
@@ -101,66 +279,861 @@ def get_genome_coverage(depths: np.ndarray, low_coverage_threshold: int = 5) ->
     return 1.0 - (np.count_nonzero(depths < low_coverage_threshold) / len(depths))
 
 
+def depth_dtype(max_depth: int) -> np.dtype:
+    """Get the smallest unsigned integer dtype that can hold the max depth
+
+    >>> depth_dtype(200)
+    dtype('uint8')
+    >>> depth_dtype(40000)
+    dtype('uint16')
+    """
+    return np.min_scalar_type(max(int(max_depth), 0))
+
+
 def depth_array(df: pd.DataFrame) -> np.ndarray:
     """Convert Mosdepth per-base bed file to depth array.
 
+    The array has the smallest unsigned integer dtype that can hold the max depth. Positions not covered by any
+    interval have a depth of 0.
+
     >>> depth_array(pd.DataFrame({'start_idx': [0, 3, 6], 'end_idx': [3, 6, 10], 'depth': [1, 2, 3]}))
-    array([1, 1, 1, 2, 2, 2, 3, 3, 3, 3])
+    array([1, 1, 1, 2, 2, 2, 3, 3, 3, 3], dtype=uint8)
+    >>> depth_array(pd.DataFrame({'start_idx': [2, 6], 'end_idx': [4, 8], 'depth': [300, 1]}))
+    array([  0,   0, 300, 300,   0,   0,   1,   1], dtype=uint16)
     """
-    arr = np.zeros(df.end_idx.max())
-    for row in df.itertuples():
-        arr[row.start_idx:row.end_idx] = row.depth
+    starts = df.start_idx.to_numpy(dtype=np.int64)
+    ends = df.end_idx.to_numpy(dtype=np.int64)
+    depths = df.depth.to_numpy()
+    dtype = depth_dtype(depths.max() if depths.size else 0)
+    if starts.size and starts[0] == 0 and np.array_equal(starts[1:], ends[:-1]):
+        # Mosdepth per-base BED intervals are contiguous, so run-length expand the depths
+        return np.repeat(depths.astype(dtype), ends - starts)
+    arr = np.zeros(ends.max() if ends.size else 0, dtype=dtype)
+    lengths = ends - starts
+    # index of the interval for each position covered by an interval
+    interval_idx = np.repeat(np.arange(starts.size), lengths)
+    # position offsets within each interval
+    offsets = np.arange(interval_idx.size) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    arr[starts[interval_idx] + offsets] = depths[interval_idx]
     return arr
 
 
-def parse_bam_depths(bam_path: Path) -> np.ndarray:
-    """Parse BAM file for depths of coverage across first reference genome using pysam
+def block_depths(starts: Sequence[int], ends: Sequence[int], length: int) -> np.ndarray:
+    """Get per-base depths from 0-based start and end (exclusive) positions of aligned read blocks
+
+    Block starts and ends are counted into a difference array whose cumulative sum is the depth at each position.
+    A reversed block, i.e. with start > end, subtracts one from the depths from end to start (exclusive), which is
+    used to count overlapping bases of read pairs once.
+
+    >>> block_depths([0, 2, 3], [4, 3, 6], 7)
+    array([1, 1, 2, 2, 1, 1, 0], dtype=int32)
+    >>> block_depths([0, 2, 4], [4, 6, 2], 7)
+    array([1, 1, 1, 1, 1, 1, 0], dtype=int32)
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    diff = np.bincount(starts, minlength=length + 1) - np.bincount(ends, minlength=length + 1)
+    return np.cumsum(diff[:length]).astype(np.int32)
+
+
+def quality_blocks(read, low_quality: Sequence[int]) -> Iterator[Tuple[int, int]]:
+    """Get reference start and end positions of aligned blocks of a read split around low quality bases
 
     Args:
-        bam_path: Path to BAM file
+        read: pysam aligned segment
+        low_quality: Sorted query positions of low quality bases
+
+    Yields:
+        0-based start and end (exclusive) reference positions of aligned blocks without low quality bases
+    """
+    ref_pos = read.reference_start
+    query_pos = 0
+    i = 0
+    for op, length in read.cigartuples:
+        if op in CIGAR_MATCH_OPS:
+            start = ref_pos
+            query_end = query_pos + length
+            while i < len(low_quality) and low_quality[i] < query_end:
+                if low_quality[i] >= query_pos:
+                    low_ref_pos = ref_pos + low_quality[i] - query_pos
+                    if low_ref_pos > start:
+                        yield start, low_ref_pos
+                    start = low_ref_pos + 1
+                i += 1
+            if ref_pos + length > start:
+                yield start, ref_pos + length
+            ref_pos += length
+            query_pos = query_end
+        elif op in CIGAR_QUERY_OPS:
+            query_pos += length
+        elif op in CIGAR_REF_OPS:
+            ref_pos += length
+
+
+def blocks_overlaps(
+        blocks: Sequence[Tuple[int, int]],
+        other: Sequence[Tuple[int, int]]
+) -> Iterator[Tuple[int, int]]:
+    """Get overlapping intervals of two sorted lists of non-overlapping start and end (exclusive) positions
+
+    >>> list(blocks_overlaps([(0, 5), (8, 12)], [(3, 10), (11, 20)]))
+    [(3, 5), (8, 10), (11, 12)]
+    """
+    i = j = 0
+    while i < len(blocks) and j < len(other):
+        start = max(blocks[i][0], other[j][0])
+        end = min(blocks[i][1], other[j][1])
+        if start < end:
+            yield start, end
+        if blocks[i][1] < other[j][1]:
+            i += 1
+        else:
+            j += 1
+
+
+def add_read_blocks(reads, starts: array, ends: array, min_base_quality: int = BAM_MIN_BASE_QUALITY) -> None:
+    """Add reference start and end positions of aligned blocks of reads passing the BAM flag filter
+
+    Aligned blocks do not include deletions or reference skips so depths are the same as counting pileup reads
+    that are not deletions or reference skips. Blocks are split around bases below `min_base_quality` like the
+    pileup base quality filter. Reads without base qualities are counted in full. Orphan reads are skipped and
+    the overlap of the blocks of the two reads of a proper pair is added as reversed blocks so that overlapping
+    bases are counted once, like the pileup defaults. Unlike the pileup, which sums the base qualities of agreeing
+    overlapping bases, an overlapping position where both bases are below `min_base_quality` is not counted.
+    `reads` must be sorted by position.
+    """
+    # blocks of the first read of proper pairs that may overlap their mate, keyed by read name
+    mate_blocks: Dict[str, List[Tuple[int, int]]] = {}
+    for read in reads:
+        flag = read.flag
+        if flag & BAM_EXCLUDE_FLAGS:
+            continue
+        if flag & BAM_FLAG_PAIRED and not flag & BAM_FLAG_PROPER_PAIR:
+            continue
+        quals = read.query_qualities if min_base_quality > 0 else None
+        low_quality = np.flatnonzero(np.frombuffer(quals, dtype=np.uint8) < min_base_quality) if quals else None
+        if low_quality is not None and low_quality.size:
+            blocks = list(quality_blocks(read, low_quality.tolist()))
+        else:
+            blocks = read.get_blocks()
+        for start, end in blocks:
+            starts.append(start)
+            ends.append(end)
+        if not flag & BAM_FLAG_PAIRED or flag & BAM_FLAG_SUPPLEMENTARY:
+            continue
+        first_blocks = mate_blocks.pop(read.query_name, None)
+        if first_blocks is not None:
+            for start, end in blocks_overlaps(first_blocks, blocks):
+                starts.append(end)
+                ends.append(start)
+        elif (read.next_reference_id == read.reference_id
+              and read.reference_start <= read.next_reference_start < read.reference_end):
+            mate_blocks[read.query_name] = blocks
+
+
+def parse_bam_contig_depths(
+        bam_path: Path,
+        contig: str,
+        threads: int = 1,
+        min_base_quality: int = BAM_MIN_BASE_QUALITY
+) -> np.ndarray:
+    """Parse indexed BAM file for depths of coverage across a reference sequence contig
+
+    Args:
+        bam_path: Path to indexed BAM file
+        contig: Reference sequence name
+        threads: Number of BGZF decompression threads
+        min_base_quality: Minimum base quality of bases counted in depths
 
     Returns:
         Coverage depths
     """
     import pysam
-    bam = pysam.AlignmentFile(bam_path)
-    reference_name = bam.references[0]
-    reference_length = bam.get_reference_length(reference_name)
-    depths = np.zeros(reference_length, dtype=np.int32)
-    for pileupcolumn in bam.pileup():
-        depth = sum(
-            1
-            for pileupread in pileupcolumn.pileups
-            if not (pileupread.is_del or pileupread.is_refskip)
-        )
-        depths[pileupcolumn.reference_pos] = depth
-    return depths
-
-
-def get_info(basedir: Path, low_coverage_threshold: int = 5) -> Dict[str, MosdepthDepthInfo]:
-    """Get depth information for each sample in a Nextflow output directory."""
-    sample_paths = find_file_for_each_sample(basedir,
-                                             glob_patterns=GLOB_PATTERNS,
-                                             sample_name_cleanup=SAMPLE_NAME_CLEANUP)
-    out = {}
-    for sample, path in sample_paths.items():
-        # fallback to parsing BAM files if Mosdepth BED files are not found
-        if path.suffix == '.bam':
-            arr = parse_bam_depths(path)
-        else:  # Mosdepth BED file
-            df = read_mosdepth_bed(path)
-            arr = depth_array(df)
-        mean_cov = arr.mean()
-        median_cov = pd.Series(arr).median()
-        depth_info = MosdepthDepthInfo(sample=sample,
+    starts, ends = array('q'), array('q')
+    with pysam.AlignmentFile(bam_path, threads=threads) as bam:
+        add_read_blocks(bam.fetch(contig), starts, ends, min_base_quality)
+        return block_depths(starts, ends, bam.get_reference_length(contig))
+
+
+def parse_bam_depths(
+        bam_path: Path,
+        threads: int = 1,
+        min_base_quality: int = BAM_MIN_BASE_QUALITY
+) -> Dict[str, np.ndarray]:
+    """Parse BAM file for depths of coverage across each reference sequence using pysam
+
+    Depths are computed from the aligned blocks of each read rather than a pileup, but with the same flag and base
+    quality filters as the pysam pileup defaults. Contigs of indexed BAM files are parsed concurrently if
+    `threads` > 1, otherwise `threads` are used for BGZF decompression. Unindexed BAM files are read once in file
+    order.
+
+    Args:
+        bam_path: Path to BAM file
+        threads: Number of threads
+        min_base_quality: Minimum base quality of bases counted in depths
+
+    Returns:
+        Dict of reference sequence name to coverage depths
+    """
+    import pysam
+    with pysam.AlignmentFile(bam_path, threads=threads) as bam:
+        references = bam.references
+        if not bam.has_index():
+            contig_blocks = {reference: (array('q'), array('q')) for reference in references}
+            mapped_reads = (read for read in bam.fetch(until_eof=True) if not read.is_unmapped)
+            for reference_id, contig_reads in groupby(mapped_reads, key=attrgetter('reference_id')):
+                add_read_blocks(contig_reads, *contig_blocks[references[reference_id]], min_base_quality)
+            return {reference: block_depths(*contig_blocks[reference], length)
+                    for reference, length in zip(references, bam.lengths)}
+    if threads > 1 and len(references) > 1:
+        with ThreadPoolExecutor(max_workers=min(threads, len(references))) as executor:
+            contig_depths = list(executor.map(partial(parse_bam_contig_depths, bam_path,
+                                                      min_base_quality=min_base_quality), references))
+    else:
+        contig_depths = [parse_bam_contig_depths(bam_path, reference, threads, min_base_quality)
+                         for reference in references]
+    return dict(zip(references, contig_depths))
+
+
+def depth_intervals(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Get contiguous depth intervals starting at position 0 from a Mosdepth per-base BED DataFrame
+
+    Gaps between intervals are filled with zero depth intervals so the intervals represent the same per-base depths
+    as `depth_array` without expanding them to one value per position.
+
+    >>> depth_intervals(pd.DataFrame({'start_idx': [2, 6], 'end_idx': [4, 8], 'depth': [3, 1]}))
+    (array([0, 2, 4, 6]), array([2, 4, 6, 8]), array([0, 3, 0, 1]))
+
+    Returns:
+        0-based interval start indices, end indices (exclusive) and depths
+    """
+    starts = df.start_idx.to_numpy(dtype=np.int64)
+    ends = df.end_idx.to_numpy(dtype=np.int64)
+    depths = df.depth.to_numpy(dtype=np.int64)
+    prev_ends = np.concatenate(([0], ends[:-1]))
+    gaps = starts > prev_ends
+    if not gaps.any():
+        return starts, ends, depths
+    n_gaps = int(gaps.sum())
+    order = np.argsort(np.concatenate((starts, prev_ends[gaps])), kind='stable')
+    return (np.concatenate((starts, prev_ends[gaps]))[order],
+            np.concatenate((ends, starts[gaps]))[order],
+            np.concatenate((depths, np.zeros(n_gaps, dtype=np.int64)))[order])
+
+
+def depth_histogram(depths: np.ndarray, lengths: Optional[np.ndarray] = None) -> np.ndarray:
+    """Get number of positions at each depth from per-base depths or depth intervals with `lengths`
+
+    >>> depth_histogram(np.array([0, 2, 2, 1, 0, 2]))
+    array([2, 1, 3])
+    >>> depth_histogram(np.array([0, 2, 1]), lengths=np.array([2, 3, 1]))
+    array([2, 1, 3])
+    """
+    if lengths is None:
+        return np.bincount(depths)
+    return np.bincount(depths, weights=lengths).astype(np.int64)
+
+
+def histogram_median(hist: np.ndarray) -> float:
+    """Get median depth from depth histogram, same as median of per-base depths
+
+    >>> histogram_median(np.array([0, 3, 3, 4]))
+    2.0
+    >>> histogram_median(np.array([0, 2, 0, 0, 0, 2]))
+    3.0
+    """
+    total = int(hist.sum())
+    cum_counts = np.cumsum(hist)
+    lower = np.searchsorted(cum_counts, (total - 1) // 2, side='right')
+    upper = np.searchsorted(cum_counts, total // 2, side='right')
+    return (float(lower) + float(upper)) / 2
+
+
+def histogram_breadth(hist: np.ndarray, thresholds: Sequence[int]) -> Dict[int, float]:
+    """Get fraction of positions with depth >= each threshold from depth histogram
+
+    >>> histogram_breadth(np.array([2, 1, 3, 0, 4]), [1, 3, 10])
+    {1: 0.8, 3: 0.4, 10: 0.0}
+    """
+    total = int(hist.sum())
+    # number of positions with depth below each depth value
+    n_below = np.concatenate(([0], np.cumsum(hist)))
+    return {t: 1.0 - int(n_below[min(max(t, 0), hist.size)]) / total for t in thresholds}
+
+
+def get_intervals_coords(
+        starts: np.ndarray,
+        ends: np.ndarray,
+        depths: np.ndarray,
+        threshold: int = 0
+) -> str:
+    """Get coordinates of regions where interval depth is zero or below threshold if specified.
+
+    Same output as `get_interval_coords` on the expanded per-base depths.
+
+    >>> get_intervals_coords(np.array([0, 1, 5, 8, 14]), np.array([1, 5, 8, 14, 16]), np.array([0, 3, 0, 4, 0]))
+    '1; 6-8; 15-16'
+    """
+    mask = depths == 0 if threshold == 0 else depths < threshold
+    run_starts, run_ends = get_mask_runs(mask)
+    return format_coords(starts[run_starts], ends[run_ends - 1])
+
+
+def prefix_coords(contig: str, coords: str) -> str:
+    """Prefix each region in a coordinates string with the contig name
+
+    >>> prefix_coords('seg4', '1; 6-8')
+    'seg4:1; seg4:6-8'
+    >>> prefix_coords('seg4', '')
+    ''
+    """
+    return '; '.join(f'{contig}:{x}' for x in coords.split('; ')) if coords else ''
+
+
+def histogram_depth_stats(hist: np.ndarray, low_coverage_threshold: int = 5) -> Dict[str, Any]:
+    """Get whole genome or contig depth stats from a depth histogram"""
+    ref_seq_length = int(hist.sum())
+    n_low_coverage = int(hist[:low_coverage_threshold].sum())
+    return dict(n_zero_coverage=int(hist[0]) if hist.size else 0,
+                n_low_coverage=n_low_coverage,
+                genome_coverage=1.0 - (n_low_coverage / ref_seq_length),
+                mean_coverage=int(np.dot(np.arange(hist.size), hist)) / ref_seq_length,
+                median_coverage=histogram_median(hist),
+                ref_seq_length=ref_seq_length)
+
+
+def summarize_intervals(
+        starts: np.ndarray,
+        ends: np.ndarray,
+        depths: np.ndarray,
+        low_coverage_threshold: int = 5
+) -> Tuple[np.ndarray, str, str]:
+    """Get depth histogram and zero and low coverage coordinates from contiguous depth intervals
+
+    Interval lengths are used as weights so memory use is O(intervals) rather than O(reference length).
+    """
+    return (depth_histogram(depths, lengths=ends - starts),
+            get_intervals_coords(starts, ends, depths),
+            get_intervals_coords(starts, ends, depths, low_coverage_threshold))
+
+
+def summarize_array(arr: np.ndarray, low_coverage_threshold: int = 5) -> Tuple[np.ndarray, str, str]:
+    """Get depth histogram and zero and low coverage coordinates from per-base depths array"""
+    return (depth_histogram(arr),
+            get_interval_coords(arr),
+            get_interval_coords(arr, low_coverage_threshold))
+
+
+def get_depth_info_from_contigs(
+        sample: str,
+        contig_summaries: Dict[str, Tuple[np.ndarray, str, str]],
+        low_coverage_threshold: int = 5,
+        coverage_thresholds: Sequence[int] = COVERAGE_THRESHOLDS
+) -> MosdepthDepthInfo:
+    """Get depth information for a sample from the depth histogram and coverage coordinates of each contig
+
+    Mean, median and breadth of coverage stats all come from depth histograms so the per-base depths only need to
+    be counted once. Whole genome stats come from the sum of contig histograms. If there is more than one contig,
+    e.g. for segmented viruses, per-contig depth information is included and coverage coordinates are prefixed
+    with the contig name.
+
+    Args:
+        sample: Sample name
+        contig_summaries: Dict of contig name to depth histogram, zero coverage coords and low coverage coords
+        low_coverage_threshold: Low coverage depth threshold
+        coverage_thresholds: Depth thresholds to get breadth of coverage for
+
+    Returns:
+        Sample depth information
+    """
+    hist = np.zeros(max(h.size for h, _, _ in contig_summaries.values()), dtype=np.int64)
+    for contig_hist, _, _ in contig_summaries.values():
+        hist[:contig_hist.size] += contig_hist
+    if len(contig_summaries) == 1:
+        ((_, zero_coverage_coords, low_coverage_coords),) = contig_summaries.values()
+        contigs = []
+    else:
+        zero_coverage_coords = '; '.join(prefix_coords(contig, zero_coords)
+                                         for contig, (_, zero_coords, _) in contig_summaries.items() if zero_coords)
+        low_coverage_coords = '; '.join(prefix_coords(contig, low_coords)
+                                        for contig, (_, _, low_coords) in contig_summaries.items() if low_coords)
+        contigs = [ContigDepthInfo(contig=contig,
+                                   zero_coverage_coords=zero_coords,
+                                   low_coverage_coords=low_coords,
+                                   **histogram_depth_stats(contig_hist, low_coverage_threshold))
+                   for contig, (contig_hist, zero_coords, low_coords) in contig_summaries.items()]
+    return MosdepthDepthInfo(sample=sample,
+                             low_coverage_threshold=low_coverage_threshold,
+                             zero_coverage_coords=zero_coverage_coords,
+                             low_coverage_coords=low_coverage_coords,
+                             ref_seq_names=list(contig_summaries.keys()),
+                             coverage_breadth=histogram_breadth(hist, coverage_thresholds),
+                             contigs=contigs,
+                             **histogram_depth_stats(hist, low_coverage_threshold))
+
+
+def get_depth_info_from_intervals(
+        sample: str,
+        starts: np.ndarray,
+        ends: np.ndarray,
+        depths: np.ndarray,
+        low_coverage_threshold: int = 5,
+        coverage_thresholds: Sequence[int] = COVERAGE_THRESHOLDS
+) -> MosdepthDepthInfo:
+    """Get depth information from contiguous depth intervals of a single contig
+
+    Results are identical to `get_depth_info_from_array` on the expanded per-base depths.
+    """
+    return get_depth_info_from_contigs(sample,
+                                       {'': summarize_intervals(starts, ends, depths, low_coverage_threshold)},
+                                       low_coverage_threshold=low_coverage_threshold,
+                                       coverage_thresholds=coverage_thresholds)
+
+
+def get_depth_info_from_array(
+        sample: str,
+        arr: np.ndarray,
+        low_coverage_threshold: int = 5,
+        coverage_thresholds: Sequence[int] = COVERAGE_THRESHOLDS
+) -> MosdepthDepthInfo:
+    """Get depth information from per-base depths array of a single contig"""
+    return get_depth_info_from_contigs(sample,
+                                       {'': summarize_array(arr, low_coverage_threshold)},
                                        low_coverage_threshold=low_coverage_threshold,
-                                       n_low_coverage=np.sum(arr < low_coverage_threshold),
-                                       n_zero_coverage=np.sum(arr == 0),
-                                       zero_coverage_coords=get_interval_coords(arr),
-                                       low_coverage_coords=get_interval_coords(arr, low_coverage_threshold),
-                                       genome_coverage=get_genome_coverage(arr, low_coverage_threshold),
-                                       mean_coverage=mean_cov,
-                                       median_coverage=median_cov,
-                                       ref_seq_length=len(arr))
-        out[sample] = depth_info
+                                       coverage_thresholds=coverage_thresholds)
+
+
+def get_contig_depths(path: Path, bam_threads: int = 1) -> Dict[str, np.ndarray]:
+    """Get per-base depths for each contig from a Mosdepth per-base BED file or a BAM file"""
+    if path.suffix == '.bam':
+        return parse_bam_depths(path, threads=bam_threads)
+    df = read_mosdepth_bed(path)
+    return {str(contig): depth_array(df_contig) for contig, df_contig in df.groupby('genome', sort=False)}
+
+
+def depth_params(path: Path) -> Dict[str, Any]:
+    """Get the parameters used to compute per-base depths from a Mosdepth per-base BED or BAM file
+
+    >>> depth_params(Path('Sample1.per-base.bed.gz'))
+    {}
+    >>> depth_params(Path('Sample1.bam'))['min_base_quality']
+    13
+    """
+    if path.suffix != '.bam':
+        return {}
+    return dict(exclude_flags=BAM_EXCLUDE_FLAGS,
+                min_base_quality=BAM_MIN_BASE_QUALITY,
+                ignore_orphans=True,
+                ignore_overlaps=True)
+
+
+def get_stored_depths(path: Path, depth_store: DepthStore, bam_threads: int = 1) -> Dict[str, StoredDepths]:
+    """Get memory-mapped per-base depths for each contig from the depth store, parsing and storing them first if
+    the Mosdepth per-base BED or BAM file is not in the store with the same depth computation parameters"""
+    params = depth_params(path)
+    stored = depth_store.load(path, params)
+    if stored is None:
+        stored = depth_store.save(path, get_contig_depths(path, bam_threads), params)
+    return stored
+
+
+def region_medians(depths: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Get median depth of each non-empty region with a single sort of all region depths
+
+    Region depths are sorted by region index and depth together so each region's sorted depths are contiguous.
+
+    >>> region_medians(np.array([5, 1, 3, 2, 8, 0]), np.array([0, 1, 2]), np.array([3, 5, 6]))
+    array([3. , 2.5, 2.5])
+    """
+    lengths = ends - starts
+    offsets = np.cumsum(lengths) - lengths
+    region_idx = np.repeat(np.arange(lengths.size), lengths)
+    positions = np.arange(region_idx.size) - offsets[region_idx] + starts[region_idx]
+    values = np.asarray(depths[positions], dtype=np.int64)
+    scale = int(values.max()) + 1 if values.size else 1
+    sorted_values = np.sort(region_idx * scale + values) - region_idx * scale
+    return (sorted_values[offsets + (lengths - 1) // 2] + sorted_values[offsets + lengths // 2]) / 2
+
+
+def get_amplicon_depths(
+        contig_depths: Dict[str, StoredDepths],
+        amplicons: pd.DataFrame
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Get mean and median depth of each amplicon insert region
+
+    Mean depths come from cumulative sums of depths in O(1) per amplicon.
+
+    Args:
+        contig_depths: Dict of contig name to per-base depths with cumulative sums
+        amplicons: Amplicon insert regions from `xlavir.io.primer_bed.read_primer_bed`
+
+    Returns:
+        Mean and median depth of each amplicon, NaN for amplicons on contigs without depths
+    """
+    means = np.full(amplicons.shape[0], np.nan)
+    medians = np.full(amplicons.shape[0], np.nan)
+    for contig, idx in amplicons.groupby('contig', sort=False).indices.items():
+        stored = contig_depths.get(contig)
+        if stored is None:
+            continue
+        starts = np.clip(amplicons.start.to_numpy()[idx], 0, len(stored))
+        ends = np.clip(amplicons.end.to_numpy()[idx], 0, len(stored))
+        nonempty = ends > starts
+        means[idx[nonempty]] = stored.region_means(starts[nonempty], ends[nonempty])
+        medians[idx[nonempty]] = region_medians(stored.depths, starts[nonempty], ends[nonempty])
+    return means, medians
+
+
+def window_mean_depths(depths: np.ndarray, window: int) -> np.ndarray:
+    """Get mean depth of consecutive windows of per-base depths in a single pass with `np.add.reduceat`
+
+    The last window is shorter if the number of positions is not a multiple of the window width.
+
+    >>> window_mean_depths(np.array([1, 2, 3, 4, 255], dtype=np.uint8), 2)
+    array([  1.5,   3.5, 255. ])
+    """
+    if depths.size == 0:
+        return np.empty(0)
+    starts = np.arange(0, depths.size, window)
+    sums = np.add.reduceat(depths, starts, dtype=np.int64)
+    return sums / np.diff(np.append(starts, depths.size))
+
+
+def get_window_depths(contig_depths: Dict[str, StoredDepths], window: int) -> Dict[str, float]:
+    """Get mean depth of each window of each contig keyed by 1-based window coordinates
+
+    Window labels are prefixed with the contig name if there is more than one contig.
+    """
+    out = {}
+    for contig, stored in contig_depths.items():
+        means = window_mean_depths(stored.depths, window)
+        starts = np.arange(means.size) * window
+        ends = np.minimum(starts + window, len(stored))
+        for start, end, mean in zip(starts.tolist(), ends.tolist(), means.tolist()):
+            coords = f'{start + 1}-{end}'
+            out[prefix_coords(contig, coords) if len(contig_depths) > 1 else coords] = mean
     return out
+
+
+def get_sample_depth_info(
+        sample: str,
+        path: Path,
+        low_coverage_threshold: int = 5,
+        coverage_thresholds: Sequence[int] = COVERAGE_THRESHOLDS,
+        bam_threads: int = 1,
+        depth_store: Optional[Path] = None,
+        amplicons: Optional[pd.DataFrame] = None,
+        coverage_window: Optional[int] = None
+) -> MosdepthDepthInfo:
+    """Get depth information for a sample from a Mosdepth per-base BED file or a BAM file
+
+    Depth stats are computed directly from Mosdepth per-base BED intervals unless per-base depths are needed for
+    `amplicons` depths or mean depths of `coverage_window` width windows. BAM file depths are computed per-base.
+    Each reference contig is summarized separately from a single read of the file. If a `depth_store` directory is
+    given, per-base depths are read from or saved to the depth store.
+    """
+    if depth_store is not None:
+        contig_depths = get_stored_depths(path, DepthStore(depth_store), bam_threads)
+    # fallback to parsing BAM files if Mosdepth BED files are not found
+    elif path.suffix == '.bam' or amplicons is not None or coverage_window:
+        contig_depths = {contig: StoredDepths.from_depths(arr)
+                         for contig, arr in get_contig_depths(path, bam_threads).items()}
+    else:
+        df = read_mosdepth_bed(path)
+        contig_summaries = {str(contig): summarize_intervals(*depth_intervals(df_contig), low_coverage_threshold)
+                            for contig, df_contig in df.groupby('genome', sort=False)}
+        return get_depth_info_from_contigs(sample, contig_summaries, low_coverage_threshold, coverage_thresholds)
+    contig_summaries = {contig: summarize_array(stored.depths, low_coverage_threshold)
+                        for contig, stored in contig_depths.items()}
+    depth_info = get_depth_info_from_contigs(sample, contig_summaries, low_coverage_threshold, coverage_thresholds)
+    if amplicons is not None:
+        means, medians = get_amplicon_depths(contig_depths, amplicons)
+        depth_info.amplicon_mean_coverage = means.tolist()
+        depth_info.amplicon_median_coverage = medians.tolist()
+    if coverage_window:
+        depth_info.window_mean_coverage = get_window_depths(contig_depths, coverage_window)
+    return depth_info
+
+
+def read_mosdepth_summary(p: Path) -> pd.DataFrame:
+    """Read Mosdepth summary file of length and total bases for each contig and the whole genome ("total")
+
+    Region summary rows ("<contig>_region") are skipped.
+    """
+    df = pd.read_table(p, index_col='chrom')
+    return df[~df.index.str.endswith('_region')]
+
+
+def read_mosdepth_global_dist(p: Path) -> Dict[str, pd.Series]:
+    """Read Mosdepth global distribution file
+
+    Returns:
+        Dict of contig name (or "total") to fraction of bases with at least each depth (indexed by depth)
+    """
+    df = pd.read_table(p, header=None, names=['genome', 'depth', 'fraction'])
+    return {str(contig): dfg.set_index('depth').fraction.sort_index()
+            for contig, dfg in df.groupby('genome', sort=False)}
+
+
+def quantized_bin_bounds(label: str) -> Optional[Tuple[int, float]]:
+    """Get depth lower and upper bounds of Mosdepth quantized bin from its default label, e.g. "5:10" or "100:inf"
+
+    >>> quantized_bin_bounds('5:10')
+    (5, 10.0)
+    >>> quantized_bin_bounds('100:inf')
+    (100, inf)
+    >>> quantized_bin_bounds('LOW_COVERAGE') is None
+    True
+    """
+    lower, sep, upper = label.partition(':')
+    if not (sep and lower.isdigit() and (upper.isdigit() or upper == 'inf')):
+        return None
+    return int(lower), float(upper)
+
+
+def read_mosdepth_quantized(p: Path) -> Optional[pd.DataFrame]:
+    """Read Mosdepth quantized BED file with bin depth lower bounds as depths
+
+    Returns:
+        Quantized intervals or None if bins have custom labels (e.g. set with MOSDEPTH_Q0 env variables)
+    """
+    df = pd.read_table(p, header=None, names=['genome', 'start_idx', 'end_idx', 'label'], dtype={'label': str})
+    bounds = df.label.map(quantized_bin_bounds)
+    if bounds.isna().any():
+        logger.warning(f'Mosdepth quantized BED "{p}" has custom bin labels. Cannot get depth bins from labels.')
+        return None
+    return df.assign(depth=bounds.str[0].astype(np.int64), upper=bounds.str[1])
+
+
+def read_mosdepth_thresholds(p: Path, summary: pd.DataFrame) -> Optional[pd.DataFrame]:
+    """Read Mosdepth thresholds BED file of number of bases in each region with at least each threshold depth
+
+    Returns:
+        Number of bases with at least each threshold depth (columns) for each contig (index) or None if regions do
+        not cover each contig exactly once, e.g. amplicon regions
+    """
+    df = pd.read_table(p)
+    df.rename(columns={'#chrom': 'chrom'}, inplace=True)
+    threshold_cols = [x for x in df.columns if x.endswith('X') and x[:-1].isdigit()]
+    df['length'] = df.end - df.start
+    dfg = df.groupby('chrom', sort=False)[['length', *threshold_cols]].sum()
+    contig_lengths = summary.length.drop('total', errors='ignore')
+    if not dfg.length.reindex(contig_lengths.index).equals(contig_lengths):
+        logger.warning(f'Mosdepth thresholds BED "{p}" regions do not cover the reference genome. Skipping.')
+        return None
+    dfg.columns = ['length', *[int(x[:-1]) for x in threshold_cols]]
+    dfg.index = dfg.index.astype(str)
+    return dfg.drop(columns='length')
+
+
+def quantized_boundaries(df_quantized: Optional[pd.DataFrame]) -> set:
+    """Get depth boundaries of Mosdepth quantized bins, i.e. depths that every bin is entirely above or below"""
+    if df_quantized is None:
+        return set()
+    upper = df_quantized.upper[np.isfinite(df_quantized.upper)].astype(np.int64)
+    return set(df_quantized.depth.tolist()) | set(upper.tolist())
+
+
+def dist_median(fraction: pd.Series) -> float:
+    """Get median depth from Mosdepth global distribution fractions of bases with at least each depth
+
+    Mosdepth rounds fractions to 2 decimal places so the median is approximate.
+
+    >>> dist_median(pd.Series([1.0, 0.8, 0.51, 0.3, 0.0], index=[0, 1, 2, 3, 4]))
+    2
+    """
+    at_least_half = fraction.index[fraction >= 0.5]
+    return int(at_least_half.max()) if at_least_half.size else 0
+
+
+def get_summary_depth_stats(
+        contig: str,
+        summary: pd.DataFrame,
+        dist: Dict[str, pd.Series],
+        df_quantized: Optional[pd.DataFrame],
+        df_thresholds: Optional[pd.DataFrame],
+        low_coverage_threshold: int = 5,
+        coverage_thresholds: Sequence[int] = (),
+) -> Dict[str, Any]:
+    """Get depth stats for a contig or the whole genome ("total") from Mosdepth summary outputs
+
+    Length and mean depth come from the summary. Zero and low coverage counts, regions and breadth of coverage are
+    exact where a quantized bin boundary or thresholds BED column is at the depth threshold, otherwise counts and
+    breadth are approximated from the global distribution and regions are empty. The median is approximated from
+    the global distribution.
+    """
+    ref_seq_length = int(summary.length[contig])
+    fraction = dist[contig]
+    if df_quantized is not None and contig != 'total':
+        df_quantized = df_quantized[df_quantized.genome.astype(str) == contig]
+    boundaries = quantized_boundaries(df_quantized)
+
+    def n_bases_at_least(depth: int) -> int:
+        if depth <= 0:
+            return ref_seq_length
+        if df_thresholds is not None and depth in df_thresholds.columns:
+            return int(df_thresholds[depth].sum() if contig == 'total' else df_thresholds.at[contig, depth])
+        if depth in boundaries:
+            covered = df_quantized.depth >= depth
+            return int((df_quantized.end_idx[covered] - df_quantized.start_idx[covered]).sum())
+        return round(float(fraction.get(depth, 0.0)) * ref_seq_length)
+
+    def coords_below(depth: int) -> str:
+        if depth not in boundaries or contig == 'total':
+            return ''
+        return get_intervals_coords(*depth_intervals(df_quantized), threshold=depth)
+
+    n_low_coverage = ref_seq_length - n_bases_at_least(low_coverage_threshold)
+    return dict(n_zero_coverage=ref_seq_length - n_bases_at_least(1),
+                zero_coverage_coords=coords_below(1),
+                n_low_coverage=n_low_coverage,
+                low_coverage_coords=coords_below(low_coverage_threshold),
+                genome_coverage=1.0 - (n_low_coverage / ref_seq_length),
+                mean_coverage=int(summary.bases[contig]) / ref_seq_length,
+                median_coverage=dist_median(fraction),
+                ref_seq_length=ref_seq_length,
+                coverage_breadth={t: n_bases_at_least(t) / ref_seq_length for t in coverage_thresholds})
+
+
+def get_depth_info_from_summary(
+        sample: str,
+        files: MosdepthSummaryFiles,
+        low_coverage_threshold: int = 5,
+        coverage_thresholds: Sequence[int] = COVERAGE_THRESHOLDS
+) -> MosdepthDepthInfo:
+    """Get depth information for a sample from Mosdepth summary outputs without reading per-base depths
+
+    Args:
+        sample: Sample name
+        files: Mosdepth summary output files
+        low_coverage_threshold: Low coverage depth threshold
+        coverage_thresholds: Depth thresholds to get breadth of coverage for
+
+    Returns:
+        Sample depth information with approximate median depth
+    """
+    df_quantized = read_mosdepth_quantized(files.quantized) if files.quantized else None
+    if not {1, low_coverage_threshold} <= quantized_boundaries(df_quantized):
+        logger.warning(f'Zero and low coverage info for sample "{sample}" is approximated from Mosdepth global '
+                       f'distribution "{files.global_dist}" since there are no Mosdepth quantized bins at 1X and '
+                       f'{low_coverage_threshold}X.')
+    summary = read_mosdepth_summary(files.summary)
+    summary.index = summary.index.astype(str)
+    dist = read_mosdepth_global_dist(files.global_dist)
+    df_thresholds = read_mosdepth_thresholds(files.thresholds, summary) if files.thresholds else None
+    stats_args = (summary, dist, df_quantized, df_thresholds, low_coverage_threshold)
+    contig_stats = {contig: get_summary_depth_stats(contig, *stats_args)
+                    for contig in summary.index if contig != 'total'}
+    stats = get_summary_depth_stats('total', *stats_args, coverage_thresholds=coverage_thresholds)
+    if len(contig_stats) == 1:
+        ((contig, single_contig_stats),) = contig_stats.items()
+        stats['zero_coverage_coords'] = single_contig_stats['zero_coverage_coords']
+        stats['low_coverage_coords'] = single_contig_stats['low_coverage_coords']
+        contigs = []
+    else:
+        for key in ['zero_coverage_coords', 'low_coverage_coords']:
+            stats[key] = '; '.join(prefix_coords(contig, x[key]) for contig, x in contig_stats.items() if x[key])
+        contigs = [ContigDepthInfo(contig=contig, **{k: v for k, v in x.items() if k != 'coverage_breadth'})
+                   for contig, x in contig_stats.items()]
+    return MosdepthDepthInfo(sample=sample,
+                             low_coverage_threshold=low_coverage_threshold,
+                             ref_seq_names=list(contig_stats.keys()),
+                             contigs=contigs,
+                             **stats)
+
+
+def get_sample_depth_info_from_sources(
+        sample: str,
+        summary_files: Optional[MosdepthSummaryFiles],
+        path: Optional[Path],
+        low_coverage_threshold: int = 5,
+        coverage_thresholds: Sequence[int] = COVERAGE_THRESHOLDS,
+        bam_threads: int = 1,
+        depth_store: Optional[Path] = None,
+        amplicons: Optional[pd.DataFrame] = None,
+        coverage_window: Optional[int] = None
+) -> MosdepthDepthInfo:
+    """Get depth information for a sample from the Mosdepth per-base BED or BAM file, or from Mosdepth summary
+    outputs if there is no per-base depths file
+
+    Median depth and breadth of coverage at depths that are not quantized bin boundaries or thresholds BED
+    columns are approximate from summary outputs, so summary outputs are only used when there are no per-base
+    depths. Amplicon and window depths need per-base depths so they are not available for samples with only
+    Mosdepth summary outputs.
+    """
+    if path is None and summary_files is not None:
+        if amplicons is not None or coverage_window:
+            logger.warning(f'Sample "{sample}" has no per-base depths. Cannot get amplicon or window depths.')
+        return get_depth_info_from_summary(sample, summary_files, low_coverage_threshold, coverage_thresholds)
+    return get_sample_depth_info(sample,
+                                 path,
+                                 low_coverage_threshold,
+                                 coverage_thresholds,
+                                 bam_threads,
+                                 depth_store,
+                                 amplicons,
+                                 coverage_window)
+
+
+def find_summary_files(basedir: Union[Path, FileIndex]) -> Dict[str, MosdepthSummaryFiles]:
+    """Find Mosdepth summary and global distribution files and optional quantized and thresholds BED files for each
+    sample"""
+    index = get_file_index(basedir)
+    sample_files = {
+        key: find_file_for_each_sample(index, glob_patterns=glob_patterns, sample_name_cleanup=SAMPLE_NAME_CLEANUP)
+        for key, glob_patterns in [('summary', SUMMARY_GLOB_PATTERNS),
+                                   ('global_dist', GLOBAL_DIST_GLOB_PATTERNS),
+                                   ('quantized', QUANTIZED_GLOB_PATTERNS),
+                                   ('thresholds', THRESHOLDS_GLOB_PATTERNS)]
+    }
+    return {sample: MosdepthSummaryFiles(**{key: paths.get(sample) for key, paths in sample_files.items()})
+            for sample in sample_files['summary'].keys() & sample_files['global_dist'].keys()}
+
+
+def get_info(
+        basedir: Union[Path, FileIndex],
+        low_coverage_threshold: int = 5,
+        coverage_thresholds: Sequence[int] = COVERAGE_THRESHOLDS,
+        processes: int = 1,
+        bam_threads: int = 1,
+        coverage_source: CoverageSource = CoverageSource.auto,
+        depth_store: Optional[Path] = None,
+        amplicons: Optional[pd.DataFrame] = None,
+        coverage_window: Optional[int] = None
+) -> Dict[str, MosdepthDepthInfo]:
+    """Get depth information for each sample in a Nextflow output directory.
+
+    With the default "auto" `coverage_source`, depth information comes from the Mosdepth per-base BED or BAM file
+    and from the small Mosdepth summary outputs only for samples without per-base depths. Summary outputs are used
+    for all samples with the "summary" `coverage_source`.
+
+    Samples are processed in parallel in a process pool if `processes` > 1. Depths from BAM files for samples
+    without Mosdepth output are parsed with `bam_threads` threads. Per-base depths are read from or saved to the
+    `depth_store` directory if given. Mean and median depths of `amplicons` insert regions from a primer scheme BED
+    (see `xlavir.io.primer_bed.read_primer_bed`) and mean depths of `coverage_window` width reference sequence
+    windows are computed from per-base depths if given.
+    """
+    coverage_source = CoverageSource(coverage_source)
+    index = get_file_index(basedir)
+    sample_summary_files = {}
+    if coverage_source in (CoverageSource.auto, CoverageSource.summary):
+        sample_summary_files = find_summary_files(index)
+    sample_paths = {}
+    if coverage_source != CoverageSource.summary:
+        sample_paths = find_file_for_each_sample(index,
+                                                 glob_patterns=BAM_GLOB_PATTERNS
+                                                 if coverage_source == CoverageSource.bam else GLOB_PATTERNS,
+                                                 sample_name_cleanup=SAMPLE_NAME_CLEANUP)
+    samples = sorted(sample_summary_files.keys() | sample_paths.keys())
+    depth_infos = map_samples(get_sample_depth_info_from_sources,
+                              [(sample,
+                                sample_summary_files.get(sample),
+                                sample_paths.get(sample),
+                                low_coverage_threshold,
+                                coverage_thresholds,
+                                bam_threads,
+                                depth_store,
+                                amplicons,
+                                coverage_window) for sample in samples],
+                              processes=processes)
+    return dict(zip(samples, depth_infos))
@@ -1,11 +1,11 @@
 import logging
 import re
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Union
 
 import pandas as pd
 
-from xlavir.util import find_file_for_each_sample
+from xlavir.util import find_file_for_each_sample, FileIndex
 
 logger = logging.getLogger(__name__)
 
@@ -239,7 +239,7 @@ def read_nextclade_csv(path: Path, sample_name: str) -> pd.DataFrame:
     return df
 
 
-def get_info(basedir: Path) -> Dict[str, pd.DataFrame]:
+def get_info(basedir: Union[Path, FileIndex]) -> Dict[str, pd.DataFrame]:
     sample_nextclade = find_file_for_each_sample(basedir=basedir,
                                                  glob_patterns=NEXTCLADE_GLOB_PATTERNS,
                                                  sample_name_cleanup=NEXTCLADE_SAMPLE_NAME_CLEANUP)
@@ -1,5 +1,5 @@
 import re
-from typing import Optional
+from typing import Optional, Union
 
 import pandas as pd
 from bs4 import BeautifulSoup
@@ -7,6 +7,8 @@ import logging
 from pydantic import BaseModel
 from pathlib import Path
 
+from xlavir.util import get_file_index, FileIndex
+
 logger = logging.getLogger(__name__)
 
 
@@ -24,14 +26,14 @@ class NextflowWorkflowExecInfo(BaseModel):
     nextflow_version: str
 
 
-def find_exec_report(basedir: Path) -> Path:
+def find_exec_report(basedir: Union[Path, FileIndex]) -> Path:
     """Find most recently modified Nextflow execution report in a directory
 
     It is assumed that there will be at least one Nextflow execution report
     in the directory if it is a Nextflow output directory.
 
     Args:
-        basedir (Path): Directory to search for Nextflow execution reports
+        basedir (Union[Path, FileIndex]): Directory (or index of directory) to search for Nextflow execution reports
 
     Returns:
         Path: Path to most recently modified Nextflow execution report
@@ -39,7 +41,7 @@ def find_exec_report(basedir: Path) -> Path:
     Raises:
         FileNotFoundError: If no Nextflow execution report is found in the directory
     """
-    reports = list(basedir.rglob('execution_report*.html'))
+    reports = get_file_index(basedir).glob('**/execution_report*.html')
     if reports:
         reports.sort(key=lambda x: x.stat().st_mtime, reverse=True)
         return reports[0]
@@ -87,7 +89,7 @@ def parse(path: Path) -> NextflowWorkflowExecInfo:
                                         workflow_profile=workflow_profile)
 
 
-def get_info(basedir: Path) -> Optional[NextflowWorkflowExecInfo]:
+def get_info(basedir: Union[Path, FileIndex]) -> Optional[NextflowWorkflowExecInfo]:
     exec_report_path = find_exec_report(basedir)
     if exec_report_path:
         logger.info(f'Found Nextflow execution report "{exec_report_path}"')
@@ -1,11 +1,11 @@
 import re
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Union
 import logging
 
 import pandas as pd
 
-from xlavir.util import find_file_for_each_sample
+from xlavir.util import find_file_for_each_sample, get_file_index, FileIndex
 
 logger = logging.getLogger(__name__)
 
@@ -70,8 +70,8 @@ pangolin_cols = [
 ]
 
 
-def find_pangolin_lineage_csv(basedir: Path) -> Optional[Path]:
-    for p in basedir.rglob(PANGOLIN_CSV):
+def find_pangolin_lineage_csv(basedir: Union[Path, FileIndex]) -> Optional[Path]:
+    for p in get_file_index(basedir).glob(f'**/{PANGOLIN_CSV}'):
         return p
 
 
@@ -86,12 +86,13 @@ def read_pangolin_csv(path: Path, sample_name: str = None) -> pd.DataFrame:
 
 
 def get_info(
-        basedir: Path,
+        basedir: Union[Path, FileIndex],
         pangolin_lineage_csv: Optional[Path] = None
 ) -> Optional[pd.DataFrame]:
     if pangolin_lineage_csv:
         return read_pangolin_csv(pangolin_lineage_csv)
     else:
+        basedir = get_file_index(basedir)
         path = find_pangolin_lineage_csv(basedir)
         if path:
             return read_pangolin_csv(path)
@@ -1,11 +1,12 @@
 import re
+from functools import partial
 from operator import itemgetter
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional, Union
 
 from pydantic import BaseModel
 
-from xlavir.util import find_file_for_each_sample
+from xlavir.util import find_file_for_each_sample, FileIndex
 
 GLOB_PATTERNS = ['**/*.flagstat']
 
@@ -31,23 +32,34 @@ def parse_samtools_flagstat(p: Path) -> Tuple[int, int]:
     return total, mapped
 
 
-def select_flagstat(paths: List[Path]) -> Optional[Path]:
-    xs = [(p, parse_samtools_flagstat(p)) for p in paths]
-    xs.sort(key=itemgetter(1), reverse=True)
-    try:
-        return xs[0][0]
-    except KeyError:
+def select_flagstat(paths: List[Path], counts: Optional[Dict[Path, Tuple[int, int]]] = None) -> Optional[Path]:
+    """Select the flagstat file with the largest total and mapped number of reads
+
+    Args:
+        paths: Candidate flagstat files
+        counts: Optional dict to store the parsed total and mapped number of reads of each candidate in
+
+    Returns:
+        Flagstat file with the largest total and mapped number of reads or None if there are no candidates
+    """
+    if not paths:
         return None
+    ranked = [(parse_samtools_flagstat(p), p) for p in paths]
+    if counts is not None:
+        counts.update((p, c) for c, p in ranked)
+    return max(ranked, key=itemgetter(0))[1]
 
 
-def get_info(basedir: Path) -> Dict[str, SamtoolsFlagstat]:
+def get_info(basedir: Union[Path, FileIndex]) -> Dict[str, SamtoolsFlagstat]:
     out = {}
+    # read counts of candidates parsed during selection so that the selected file is not parsed again
+    counts: Dict[Path, Tuple[int, int]] = {}
     flagstats = find_file_for_each_sample(basedir,
                                           glob_patterns=GLOB_PATTERNS,
-                                          single_entry_selector_func=select_flagstat)
+                                          single_entry_selector_func=partial(select_flagstat, counts=counts))
     # if multiple flagstat files are present, get stats from the one with the largest total number of reads
     for sample, flagstat_path in flagstats.items():
-        n_total_reads, n_mapped_reads = parse_samtools_flagstat(flagstat_path)
+        n_total_reads, n_mapped_reads = counts.get(flagstat_path) or parse_samtools_flagstat(flagstat_path)
         samtools_flagstat = SamtoolsFlagstat(sample=sample,
                                              n_mapped_reads=n_mapped_reads,
                                              n_total_reads=n_total_reads)
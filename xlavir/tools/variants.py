@@ -1,17 +1,26 @@
 """VCF and SnpEff/SnpSift parsing functions"""
+import gzip
+import io
 import logging
-import os
 import re
 from dataclasses import dataclass
-from operator import itemgetter
+from functools import partial
 from pathlib import Path
-from typing import Dict, Tuple, List, Optional, Iterable, Union
+from typing import Dict, Tuple, List, Optional, Iterable, Union, Callable, Iterator, TextIO
 
+import numpy as np
 import pandas as pd
+from pandas._libs.sparse import IntIndex
 from pydantic import BaseModel
 
-from xlavir.qc import QualityRequirements
-from xlavir.util import try_parse_number, find_file_for_each_sample
+from xlavir.qc import QualityRequirements, VariantFilters
+from xlavir.util import (
+    find_file_for_each_sample,
+    get_file_index,
+    FileIndex,
+    count_data_lines,
+    map_samples,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -173,14 +182,14 @@ class VariantCaller:
     Bcftools = 'bcftools'
 
 
+# priority-ordered tiers of glob patterns; catch-all patterns are only used for samples without a more specific match
 VCF_GLOB_PATTERNS = [
     '**/nanopolish/*.pass.vcf.gz',
     '**/ivar/*.vcf.gz',
     '**/bcftools/*.vcf.gz',
     '**/*.filt.no_fs.vcf',
     '**/*.longshot.vcf',
-    '**/*.vcf',
-    '**/*.vcf.gz',
+    ['**/*.vcf', '**/*.vcf.gz'],
 ]
 
 VCF_SAMPLE_NAME_CLEANUP = [
@@ -196,15 +205,62 @@ VCF_SAMPLE_NAME_CLEANUP = [
     re.compile(r'\.filtered'),
 ]
 
+# columns identifying a unique mutation across samples
+MUTATION_KEY_COLS = ['CHROM', 'POS', 'REF', 'ALT', 'gene', 'aa', 'effect']
+
+# dtypes of variant table columns; repeated strings are categorical and allele depths are nullable since samples
+# with only a SnpSift table have no VCF allele depths. Allele frequencies are kept as float64 so that values written
+# to the report are the same as in the VCF or SnpSift table (float32 would write e.g. 0.999308 as 0.9993079900741577)
+VARIANTS_SCHEMA = {
+    'sample': 'category',
+    'CHROM': 'category',
+    'POS': 'int32',
+    'REF_DP': 'Int32',
+    'ALT_DP': 'Int32',
+    'DP': 'Int32',
+    'ALT_FREQ': 'float64',
+    'gene': 'category',
+    'impact': 'category',
+    'effect': 'category',
+}
+
+# VCF FILTER values of records that passed all filters or had no filters applied
+PASS_FILTER_VALUES = ['PASS', '.']
+# number of VCF records parsed at a time when records are filtered while reading
+VCF_CHUNK_SIZE = 100000
+# columns identifying duplicate VCF records
+VCF_DUPLICATE_COLS = ['CHROM', 'POS', 'ID', 'REF', 'ALT', 'FILTER']
+
 SNPSIFT_GLOB_PATTERNS = [
-    '**/ivar/**/*.snpSift.table.txt',
-    '**/ivar/**/*.snpsift.table.txt',
+    ['**/ivar/**/*.snpSift.table.txt', '**/ivar/**/*.snpsift.table.txt'],
     '**/ivar/**/*.snpsift.txt',
-    '**/*.snpSift.table.txt',
-    '**/*.snpsift.table.txt',
+    ['**/*.snpSift.table.txt', '**/*.snpsift.table.txt'],
     '**/*.snpsift.txt',
 ]
 
+# SnpSift table columns read for variant tables and their dtypes; AF is read as strings since multi-allelic
+# variants have a list of allele frequencies, e.g. "0.4,0.3", and is converted to numbers by `read_snpsift`
+SNPSIFT_DTYPES = {
+    'sample': str,
+    'CHROM': str,
+    'POS': 'int32',
+    'REF': str,
+    'ALT': str,
+    'FILTER': str,
+    'DP': 'Int32',
+    'AF': str,
+    'AC': str,
+    'SR': str,
+}
+# SnpEff annotation fields read from the first SnpSift table column for each field, e.g. "ANN[*].GENE" for "gene"
+SNPSIFT_ANN_FIELDS = ['gene', 'impact', 'effect', 'aa', 'aa_pos', 'aa_len']
+# column of sample names in a multi-sample SnpSift table
+SNPSIFT_SAMPLE_COLUMN = 'sample'
+# missing values of SnpSift table columns other than empty values; pandas default NA strings such as "NA" are not
+# used since they can be valid values, e.g. the influenza NA (neuraminidase) gene
+SNPSIFT_NA_VALUES = {'DP': ['.', ''], 'AF': ['.', '']}
+FIRST_LIST_VALUE_REGEX = re.compile(r'^([^,\n]*)[^\n]*$', re.MULTILINE)
+
 SNPSIFT_SAMPLE_NAME_CLEANUP = [
     re.compile(r'\.snp[sS]ift\.table\.txt$'),
     re.compile(r'\.snp[sS]ift\.txt$'),
@@ -215,58 +271,103 @@ SNPSIFT_SAMPLE_NAME_CLEANUP = [
 
 
 def vcf_selector(paths: List[Path]) -> Optional[Path]:
-    xs = []
-    for path in paths:
-        variant_caller, df = read_vcf(path)
-        xs.append((df.shape[0], path))
-    xs.sort(reverse=True)
-    try:
-        return xs[0][1]
-    except KeyError:
+    """Select the VCF with the most variant records
+
+    Candidates are ranked by a raw count of non-header lines so that only the selected VCF is parsed.
+    """
+    if not paths:
         return None
+    return max((count_data_lines(path), path) for path in paths)[1]
 
 
 def snpsift_selector(paths: List[Path]) -> Optional[Path]:
-    xs = []
-    for path in paths:
-        df = pd.read_table(path)
-        xs.append((df.shape[0], path))
-    xs.sort(reverse=True)
-    try:
-        return xs[0][1]
-    except KeyError:
+    """Select the SnpSift table with the most rows
+
+    Candidates are ranked by a raw line count so that only the selected table is parsed.
+    """
+    if not paths:
         return None
+    return max((count_data_lines(path), path) for path in paths)[1]
 
 
-def read_vcf(vcf_file: Path) -> Tuple[str, pd.DataFrame]:
-    """Read VCF file into a DataFrame"""
-    gzipped = vcf_file.name.endswith('.gz')
-    with os.popen(f'zcat < {vcf_file.absolute()}') if gzipped else open(vcf_file) as fh:
-        vcf_cols = []
-        variant_caller = ''
-        for line in fh:
-            if line.startswith('##source='):
-                variant_caller = line.strip().replace('##source=', '')
-            if line.startswith('##bcftools_callVersion'):
-                variant_caller = 'bcftools'
-            if line.startswith('##nanopolish'):
-                variant_caller = 'nanopolish'
-            if line.startswith('##medaka_version'):
-                variant_caller = 'medaka'
-            if line.startswith('#CHROM'):
-                vcf_cols = line[1:].strip().split('\t')
-                break
-        try:
+def open_vcf(vcf_file: Path) -> TextIO:
+    """Open a plain text or gzip/BGZF compressed VCF file for reading text"""
+    return gzip.open(vcf_file, 'rt') if vcf_file.name.endswith('.gz') else open(vcf_file)
+
+
+def read_vcf_header(fh: TextIO) -> Tuple[str, List[str]]:
+    """Read the variant caller and column names from the meta-information and header lines of a VCF stream
+
+    The stream is left at the first record.
+    """
+    vcf_cols = []
+    variant_caller = ''
+    while line := fh.readline():
+        if line.startswith('##source='):
+            variant_caller = line.strip().replace('##source=', '')
+        if line.startswith('##bcftools_callVersion'):
+            variant_caller = 'bcftools'
+        if line.startswith('##nanopolish'):
+            variant_caller = 'nanopolish'
+        if line.startswith('##medaka_version'):
+            variant_caller = 'medaka'
+        if line.startswith('#CHROM'):
+            vcf_cols = line[1:].strip().split('\t')
+            break
+    return variant_caller, vcf_cols
 
-            df = pd.read_table(vcf_file,
-                               sep='\t',
-                               comment='#',
-                               header=None,
-                               names=vcf_cols)
-            df = df[~df.duplicated(['CHROM', 'POS', 'ID', 'REF', 'ALT', 'FILTER'], keep='first')]
-        except pd.errors.EmptyDataError:
-            return variant_caller, pd.DataFrame()
-    return variant_caller, df
+
+def read_vcf_chunks(fh: TextIO, vcf_cols: List[str], pass_only: bool = False) -> Iterator[pd.DataFrame]:
+    """Read VCF records from a stream in chunks of `VCF_CHUNK_SIZE` records
+
+    Duplicate records are dropped from each chunk, including duplicates of records in previous chunks, which are
+    tracked by hashes of their `VCF_DUPLICATE_COLS` values. If `pass_only`, records that did not pass all filters are
+    dropped.
+    """
+    seen = np.empty(0, dtype=np.uint64)
+    try:
+        for chunk in pd.read_table(fh, sep='\t', comment='#', header=None, names=vcf_cols, chunksize=VCF_CHUNK_SIZE):
+            if pass_only:
+                chunk = chunk[chunk.FILTER.isin(PASS_FILTER_VALUES)]
+            hashes = pd.util.hash_pandas_object(chunk[VCF_DUPLICATE_COLS], index=False).to_numpy()
+            keep = ~pd.Series(hashes).duplicated(keep='first').to_numpy()
+            if seen.size:
+                # seen hashes are kept sorted for binary search
+                keep &= seen[np.minimum(np.searchsorted(seen, hashes), seen.size - 1)] != hashes
+            # stable sort (timsort) of two sorted runs is a linear merge
+            seen = np.sort(np.concatenate([seen, np.sort(hashes[keep])]), kind='stable')
+            yield chunk[keep]
+    except pd.errors.EmptyDataError:
+        return
+
+
+def read_vcf_records(fh: TextIO, vcf_cols: List[str], pass_only: bool = False) -> pd.DataFrame:
+    """Read VCF records from a stream into a DataFrame, dropping duplicate records
+
+    If `pass_only`, records are parsed in chunks and records that did not pass all filters are dropped from each
+    chunk, so they are never all held in memory.
+    """
+    if pass_only:
+        chunks = list(read_vcf_chunks(fh, vcf_cols, pass_only=True))
+        return pd.concat(chunks) if chunks else pd.DataFrame()
+    try:
+        df = pd.read_table(fh, sep='\t', comment='#', header=None, names=vcf_cols)
+    except pd.errors.EmptyDataError:
+        return pd.DataFrame()
+    return df[~df.duplicated(VCF_DUPLICATE_COLS, keep='first')]
+
+
+def read_vcf(vcf_file: Path, pass_only: bool = False) -> Tuple[str, pd.DataFrame]:
+    """Read VCF file into a DataFrame
+
+    The file is read in a single pass, decompressing gzip/BGZF files in-process. The variant caller and column
+    names are read from the meta-information and header lines, then the rest of the same stream is parsed into a
+    DataFrame. If `pass_only`, records are parsed in chunks and records that did not pass all filters are dropped
+    from each chunk, so they are never all held in memory.
+    """
+    with open_vcf(vcf_file) as fh:
+        variant_caller, vcf_cols = read_vcf_header(fh)
+        return variant_caller, read_vcf_records(fh, vcf_cols, pass_only)
 
 
 def parse_aa(gene: str,
@@ -317,105 +418,257 @@ def get_aa(s: str) -> str:
     return out
 
 
-def simplify_snpsift(df: pd.DataFrame, sample_name: str) -> Optional[pd.DataFrame]:
+def first_list_values(s: pd.Series) -> pd.Series:
+    """Get the first value of comma-delimited lists of strings, e.g. the first SnpEff annotation of each variant
+
+    Values are extracted with a single multiline regex pass over all values joined by newlines.
+
+    >>> first_list_values(pd.Series(['orf1ab,CHR_START-orf1ab', 'S', np.nan, '', '.,.'])).tolist()
+    ['orf1ab', 'S', nan, '', '.']
+    """
+    na = s.isna()
+    values = FIRST_LIST_VALUE_REGEX.findall('\n'.join(s.mask(na, '').tolist()))
+    return pd.Series(values, index=s.index, dtype=object).mask(na)
+
+
+def read_snpsift(path: Path) -> pd.DataFrame:
+    """Read the columns of a SnpSift table used for variant tables
+
+    Only the columns in `SNPSIFT_DTYPES` and the first column of each SnpEff annotation field in
+    `SNPSIFT_ANN_FIELDS` (e.g. "ANN[*].GENE" for "gene") are parsed, with dtypes declared up front instead of
+    inferred. Annotation columns are renamed to their field names and only have the first annotation of each
+    variant. Only empty values, and "." in the DP and AF columns, are missing values, so that strings like the
+    influenza gene name "NA" are not read as missing. AF values that are not a single number, e.g. "0.4,0.3" for a
+    multi-allelic variant, are missing values with a warning.
+    """
+    usecols = {}
+    for col in pd.read_table(path, nrows=0).columns:
+        idx = col.find('[*].')
+        field = col[idx + 4:].lower() if idx > 0 else None
+        if col in SNPSIFT_DTYPES:
+            usecols[col] = col
+        elif field in SNPSIFT_ANN_FIELDS and field not in usecols.values():
+            usecols[col] = field
+    df = pd.read_table(path,
+                       usecols=list(usecols),
+                       dtype={col: SNPSIFT_DTYPES.get(col, str) for col in usecols},
+                       keep_default_na=False,
+                       na_values={col: SNPSIFT_NA_VALUES.get(col, ['']) for col in usecols})
+    df.rename(columns=usecols, inplace=True)
+    for field in SNPSIFT_ANN_FIELDS:
+        if field in df.columns:
+            df[field] = first_list_values(df[field])
+    if 'AF' in df.columns:
+        af = pd.to_numeric(df.AF, errors='coerce')
+        invalid = af.isna() & df.AF.notna()
+        if invalid.any():
+            logger.warning(f'SnpSift table "{path}" has {invalid.sum()} AF values that are not a single number '
+                           f'(e.g. "{df.AF[invalid].iloc[0]}" of a multi-allelic variant), which are read as missing')
+        df['AF'] = af
+    return df
+
+
+def read_multi_sample_snpsift(path: Path) -> Dict[str, pd.DataFrame]:
+    """Read a SnpSift table of variants of multiple samples into a SnpSift table for each sample
+
+    The table must have a single header line and a `SNPSIFT_SAMPLE_COLUMN` column of the sample name of each row.
+    The whole table is parsed at once.
+    """
+    df = read_snpsift(path)
+    if SNPSIFT_SAMPLE_COLUMN not in df.columns:
+        raise ValueError(f'SnpSift table "{path}" has no "{SNPSIFT_SAMPLE_COLUMN}" column of sample names')
+    out = {sample: df_sample.drop(columns=SNPSIFT_SAMPLE_COLUMN)
+           for sample, df_sample in df.groupby(SNPSIFT_SAMPLE_COLUMN, sort=False)}
+    logger.info(f'Read {df.shape[0]} variants of {len(out)} samples from SnpSift table "{path}"')
+    return out
+
+
+def simplify_snpsift(
+        df: pd.DataFrame,
+        sample_name: str,
+        filters: Optional[VariantFilters] = None
+) -> Optional[pd.DataFrame]:
+    """Get variant table columns from a SnpSift table read by `read_snpsift`
+
+    Reference and alternate allele counts and frequencies are computed from AC or SR (strand read counts) values
+    if present. Variants not passing `filters` are dropped.
+    """
     if df.empty:
         return None
     df = df[~df.duplicated(keep='first')]
-    field_names = set()
-    series = []
-    for c in df.columns:
-        if c == 'AC':
-            df_ac = df[c].str.split(',', n=1, expand=True)
-            REF_AC = df_ac[0].astype(int)
-            REF_AC.name = 'REF_AC'
-            ALT_AC = df_ac[1].astype(int)
-            ALT_AC.name = 'ALT_AC'
-            AF = ALT_AC / (REF_AC + ALT_AC)
-            AF.name = 'AF'
-            series += [REF_AC, ALT_AC, AF]
-            continue
-        if c == 'SR':
-            df_ac = df[c].str.split(',', expand=True)
-            REF_AC = df_ac[0].astype(int) + df_ac[1].astype(int)
-            REF_AC.name = 'REF_AC'
-            ALT_AC = df_ac[2].astype(int) + df_ac[3].astype(int)
-            ALT_AC.name = 'ALT_AC'
-            AF = ALT_AC / (REF_AC + ALT_AC)
-            AF.name = 'AF'
-            series += [REF_AC, ALT_AC, AF]
-            continue
-        idx = c.find('[*].')
-        if idx > 0:
-            new_series_name = c[idx + 4:].lower()
-            if new_series_name in field_names:
-                continue
-            else:
-                field_names.add(new_series_name)
-            dfc = df[c]
-            if dfc.dtype == 'object' and isinstance(dfc.values[0], str):
-                new_series = dfc.str.split(',', n=1, expand=True)[0]
-            else:
-                new_series = dfc.astype('str')
-            new_series.name = new_series_name
-            series.append(new_series)
-        else:
-            series.append(df[c])
-    df_out = pd.concat(series, axis=1)
-    mutation_desc = [
-        parse_aa(
-            gene=row.gene,
-            ref=row.REF,
-            alt=row.ALT,
-            nt_pos=row.POS,
-            aa_pos=row.aa_pos,
-            snpeff_aa=row.aa,
-            effect=row.effect,
-        )
-        for row in df_out.itertuples()
-    ]
-    df_out['mutation'] = mutation_desc
+    if filters is not None and filters.pass_only and 'FILTER' in df.columns:
+        df = df[df.FILTER.isin(PASS_FILTER_VALUES)]
+        if df.empty:
+            return None
+    if 'AC' in df.columns:
+        df_ac = split_ints(df.AC, 2)
+        df = df.assign(REF_AC=df_ac[0], ALT_AC=df_ac[1])
+    elif 'SR' in df.columns:
+        df_sr = split_ints(df.SR, 4)
+        df = df.assign(REF_AC=df_sr[0] + df_sr[1], ALT_AC=df_sr[2] + df_sr[3])
+    if 'REF_AC' in df.columns:
+        df = df.assign(AF=df.ALT_AC / (df.REF_AC + df.ALT_AC))
+    mask = variant_filters_mask(filters,
+                                dp=df['DP'] if 'DP' in df.columns else None,
+                                alt_freq=df['AF'] if 'AF' in df.columns else None)
+    df_out = df[mask] if mask is not None else df.copy()
+    # mutation descriptions are added for all samples at once by `to_dataframe`
     df_out['sample'] = sample_name
     return df_out
 
 
-def parse_ivar_vcf(df: pd.DataFrame, sample_name: str = None) -> Optional[pd.DataFrame]:
+def vcf_info_fields(info: pd.Series, keys: Iterable[str]) -> pd.DataFrame:
+    """Extract values of INFO keys into string columns with NaN where a key is absent
+
+    Each key is extracted with a single multiline regex pass over all INFO values joined by newlines.
+
+    >>> vcf_info_fields(pd.Series(['DP=10;AF=0.5', 'F;AF=1.0;SDP=2;DP=3', '']), ['DP', 'AF']).to_dict('list')
+    {'DP': ['10', '3', nan], 'AF': ['0.5', '1.0', nan]}
+    """
+    text = '\n'.join(info.tolist())
+    out = {}
+    for key in keys:
+        # one match per line with an empty group if the line does not have the key
+        regex = re.compile(rf'^(?:(?:[^\n]*;)?{re.escape(key)}=([^;\n]*)[^\n]*|[^\n]*)$', re.MULTILINE)
+        values = pd.Series(regex.findall(text), index=info.index, dtype=object)
+        out[key] = values.mask(values == '')
+    return pd.DataFrame(out, index=info.index)
+
+
+def vcf_format_fields(fmt: pd.Series, values: pd.Series, keys: Iterable[str]) -> pd.DataFrame:
+    """Extract typed values of FORMAT keys from a sample column with NaN where a key is absent
+
+    Sample values with the same FORMAT string, usually all values in a VCF, are parsed together into typed columns
+    by the pandas C parser.
+
+    >>> df = vcf_format_fields(pd.Series(['GT:DP:AF', 'GT:AF']), pd.Series(['1:10:0.5', '1:1.0']), ['DP', 'AF'])
+    >>> df.to_dict('list')
+    {'DP': [10.0, nan], 'AF': [0.5, 1.0]}
+    """
+    keys = list(keys)
+    dfs = []
+    formats = fmt.unique()
+    for fmt_str in formats:
+        idx = values.index if len(formats) == 1 else values.index[fmt.to_numpy() == fmt_str]
+        fmt_keys = fmt_str.split(':')
+        df = pd.read_csv(io.StringIO('\n'.join(values.loc[idx])),
+                         sep=':',
+                         header=None,
+                         names=fmt_keys,
+                         usecols=[key for key in keys if key in fmt_keys],
+                         float_precision='round_trip')
+        df.index = idx
+        dfs.append(df)
+    return (pd.concat(dfs) if dfs else pd.DataFrame()).reindex(index=values.index, columns=keys)
+
+
+def split_ints(s: pd.Series, n: int) -> pd.DataFrame:
+    """Split comma-delimited integer values into `n` integer columns
+
+    >>> split_ints(pd.Series(['2,20,88,161', '0,1,2,3']), 4).values.tolist()
+    [[2, 20, 88, 161], [0, 1, 2, 3]]
+    """
+    return s.str.split(',', n=n - 1, expand=True).iloc[:, :n].astype(int)
+
+
+def select_variants_cols(df: pd.DataFrame) -> pd.DataFrame:
+    """Select variant report columns present in a DataFrame in report column order"""
+    cols = set(df.columns)
+    return df.loc[:, [x for x, _, _ in variants_cols if x in cols]]
+
+
+def apply_variants_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """Cast variant table columns to their compact `VARIANTS_SCHEMA` dtypes"""
+    return df.astype({col: dtype for col, dtype in VARIANTS_SCHEMA.items() if col in df.columns})
+
+
+def get_vcf_sample_name(df: pd.DataFrame, sample_name: Optional[str], default_column: str = 'SAMPLE') -> str:
+    if sample_name:
+        return sample_name
+    sample_name = df.columns[-1] if df.columns[-1] != default_column else None
+    if sample_name is None:
+        raise ValueError(f'Sample name is not defined for VCF: shape={df.shape}; columns={df.columns}')
+    return sample_name
+
+
+def variant_filters_mask(filters: Optional[VariantFilters],
+                         dp: Optional[pd.Series] = None,
+                         alt_freq: Optional[pd.Series] = None) -> Optional[pd.Series]:
+    """Get mask of variants passing min depth and min alternate allele frequency filters
+
+    Returns:
+        Boolean mask of variants to keep or None if no filters apply to the given values
+    """
+    if filters is None:
+        return None
+    mask = None
+    if dp is not None and filters.min_depth > 0:
+        mask = dp >= filters.min_depth
+    if alt_freq is not None and filters.min_alt_freq > 0:
+        af_mask = alt_freq >= filters.min_alt_freq
+        mask = af_mask if mask is None else mask & af_mask
+    return mask
+
+
+def variant_depths_dataframe(df: pd.DataFrame,
+                             sample_name: str,
+                             ref_dp: pd.Series,
+                             alt_dp: pd.Series,
+                             dp: pd.Series,
+                             alt_freq: pd.Series,
+                             filters: Optional[VariantFilters] = None) -> pd.DataFrame:
+    """Create a DataFrame of variant alleles with typed allele depth and frequency columns
+
+    Only variants passing `filters` are copied into the output DataFrame.
+    """
+    mask = variant_filters_mask(filters, dp, alt_freq)
+    if mask is not None:
+        df, ref_dp, alt_dp, dp, alt_freq = df[mask], ref_dp[mask], alt_dp[mask], dp[mask], alt_freq[mask]
+    df_out = df.loc[:, ['CHROM', 'POS', 'REF', 'ALT']].copy()
+    df_out['REF_DP'] = ref_dp
+    df_out['ALT_DP'] = alt_dp
+    df_out['DP'] = dp
+    df_out['ALT_FREQ'] = alt_freq
+    df_out['sample'] = sample_name
+    return select_variants_cols(df_out)
+
+
+def parse_ivar_vcf(
+        df: pd.DataFrame,
+        sample_name: str = None,
+        filters: Optional[VariantFilters] = None
+) -> Optional[pd.DataFrame]:
     if df.empty:
         return None
-    if not sample_name:
-        sample_name = df.columns[-1] if df.columns[-1] != 'SAMPLE' else None
-        if sample_name is None:
-            raise ValueError(f'Sample name is not defined for VCF: shape={df.shape}; columns={df.columns}')
-    pos_fmt_val = {}
-    for row in df.itertuples():
-        # An iVar VCF has the DP, total depth, in the INFO field, you cannot sum the alt and ref depths since the ref
-        # depth only applies to the first base in the ref allele rather than over the entire allele so the depth can be
-        # misleading for deletions
-        # See iVar issue: https://github.com/andersen-lab/ivar/issues/86
-        infos = parse_vcf_info(row.INFO)
-        total_dp = infos['DP']
-        ks = row.FORMAT.split(':')
-        vs = row[-1].split(':')
-        record: Dict[str, Union[float, int, str]] = {k: try_parse_number(v) for k, v in zip(ks, vs)}
-        ref_dp = record['REF_DP']
-        alt_dp = record['ALT_DP']
-        # if the sum of the ref and alt dp does not equal the total dp reported by iVar then recalculate the ref dp
-        # since it is likely only reporting the ref dp for the first base of a longer deletion. SNPs should be fine.
-        sum_ref_alt_dp = ref_dp + alt_dp
-        if sum_ref_alt_dp != total_dp:
-            record['REF_DP'] = total_dp - alt_dp
-            logger.warning(
-                f'iVar VCF for sample "{sample_name}" contains a variant at position {row.POS} where sum of ref allele '
-                f'depth ({ref_dp}) and alt allele depth ({alt_dp}) does not equal the total depth ({total_dp}) '
-                f'reported by iVar (i.e. {ref_dp} + {alt_dp} = {sum_ref_alt_dp}; {sum_ref_alt_dp} != {total_dp}). Ref '
-                f'allele is "{row.REF}", alt allele is "{row.ALT}". iVar alt allele frequency: {record["ALT_FREQ"]}')
-        pos_fmt_val[row.POS] = record
-        pos_fmt_val[row.POS]['DP'] = total_dp
-    df_ivar_info = pd.DataFrame(pos_fmt_val).transpose()
-    df_ivar_info.index.name = 'POS'
-    df_ivar_info.reset_index(inplace=True)
-    df_merge = pd.merge(df, df_ivar_info, on='POS')
-    df_merge['sample'] = sample_name
-    return df_merge.drop(columns=['ID', 'INFO', 'QUAL', 'FILTER', 'FORMAT', df.columns[-1], 'GT'])
+    sample_name = get_vcf_sample_name(df, sample_name)
+    # An iVar VCF has the DP, total depth, in the INFO field, you cannot sum the alt and ref depths since the ref
+    # depth only applies to the first base in the ref allele rather than over the entire allele so the depth can be
+    # misleading for deletions
+    # See iVar issue: https://github.com/andersen-lab/ivar/issues/86
+    total_dp = vcf_info_fields(df.INFO, ['DP']).DP.astype(int)
+    # drop low depth variants before parsing FORMAT values
+    mask = variant_filters_mask(filters, dp=total_dp)
+    if mask is not None:
+        df, total_dp = df[mask], total_dp[mask]
+    df_fmt = vcf_format_fields(df.FORMAT, df[df.columns[-1]], ['REF_DP', 'ALT_DP', 'ALT_FREQ'])
+    ref_dp = df_fmt.REF_DP
+    alt_dp = df_fmt.ALT_DP
+    alt_freq = df_fmt.ALT_FREQ
+    # if the sum of the ref and alt dp does not equal the total dp reported by iVar then recalculate the ref dp
+    # since it is likely only reporting the ref dp for the first base of a longer deletion. SNPs should be fine.
+    sum_ref_alt_dp = ref_dp + alt_dp
+    mismatch = sum_ref_alt_dp != total_dp
+    for pos, ref, alt, r_dp, a_dp, s_dp, t_dp, af in zip(df.POS[mismatch], df.REF[mismatch], df.ALT[mismatch],
+                                                          ref_dp[mismatch], alt_dp[mismatch],
+                                                          sum_ref_alt_dp[mismatch], total_dp[mismatch],
+                                                          alt_freq[mismatch]):
+        logger.warning(
+            f'iVar VCF for sample "{sample_name}" contains a variant at position {pos} where sum of ref allele '
+            f'depth ({r_dp}) and alt allele depth ({a_dp}) does not equal the total depth ({t_dp}) '
+            f'reported by iVar (i.e. {r_dp} + {a_dp} = {s_dp}; {s_dp} != {t_dp}). Ref '
+            f'allele is "{ref}", alt allele is "{alt}". iVar alt allele frequency: {af}')
+    ref_dp = ref_dp.where(~mismatch, total_dp - alt_dp)
+    return variant_depths_dataframe(df, sample_name, ref_dp, alt_dp, total_dp, alt_freq, filters)
 
 
 def merge_vcf_snpsift(df_vcf: Optional[pd.DataFrame],
@@ -423,340 +676,383 @@ def merge_vcf_snpsift(df_vcf: Optional[pd.DataFrame],
     if df_snpsift is None and df_vcf is None:
         return None
     if df_vcf is None:
-        snpsift_cols = set(df_snpsift.columns)
-        return df_snpsift.loc[:, [x for x, _, _ in variants_cols if x in snpsift_cols]]
+        return select_variants_cols(df_snpsift)
     if df_snpsift is None:
-        vcf_cols = set(df_vcf.columns)
-        return df_vcf.loc[:, [x for x, _, _ in variants_cols if x in vcf_cols]]
-
-    df_merge = pd.merge(df_vcf, df_snpsift)
-    merged_cols = set(df_merge.columns)
-    return df_merge.loc[:, [x for x, _, _ in variants_cols if x in merged_cols]]
+        return select_variants_cols(df_vcf)
+    return select_variants_cols(pd.merge(df_vcf, df_snpsift))
 
 
-def parse_longshot_vcf(df: pd.DataFrame, sample_name: str = None) -> Optional[pd.DataFrame]:
+def parse_longshot_vcf(
+        df: pd.DataFrame,
+        sample_name: str = None,
+        filters: Optional[VariantFilters] = None
+) -> Optional[pd.DataFrame]:
     if df.empty:
         return None
-    if not sample_name:
-        sample_name = df.columns[-1] if df.columns[-1] != 'SAMPLE' else None
-        if sample_name is None:
-            raise ValueError(f'Sample name is not defined for VCF: shape={df.shape}; columns={df.columns}')
-    pos_info_val = {}
-    for row in df.itertuples():
-        infos = parse_vcf_info(row.INFO)
-        ac_ref, ac_alt = infos['AC']
-        infos['REF_DP'] = ac_ref
-        infos['ALT_DP'] = ac_alt
-        pos_info_val[row.POS] = infos
-    df_longshot_info = pd.DataFrame(pos_info_val).transpose()
-    df_longshot_info.index.name = 'POS'
-    df_longshot_info.reset_index(inplace=True)
-    df_merge = pd.merge(df, df_longshot_info, on='POS')
-    df_merge['sample'] = sample_name
-    df_merge = df_merge[df_merge.DP > 0]
-    df_merge['ALT_FREQ'] = df_merge.ALT_DP / df_merge.DP
-    cols_to_keep = list({col for col, _, _ in variants_cols} & set(df_merge.columns))
-    return df_merge.loc[:, cols_to_keep]
+    sample_name = get_vcf_sample_name(df, sample_name)
+    df_info = vcf_info_fields(df.INFO, ['DP', 'AC'])
+    dp = df_info.DP.astype(int)
+    df_ac = split_ints(df_info.AC, 2)
+    df_out = variant_depths_dataframe(df, sample_name, df_ac[0], df_ac[1], dp, df_ac[1] / dp, filters)
+    return df_out[df_out.DP > 0]
 
 
 def parse_medaka_vcf(
         df: pd.DataFrame,
         sample_name: str = None,
-        qc_reqs: QualityRequirements = None
+        qc_reqs: QualityRequirements = None,
+        filters: Optional[VariantFilters] = None
 ) -> Optional[pd.DataFrame]:
     if df.empty:
         return None
-    if not sample_name:
-        sample_name = df.columns[-1] if df.columns[-1] != 'SAMPLE' else None
-        if sample_name is None:
-            raise ValueError(f'Sample name is not defined for VCF: shape={df.shape}; columns={df.columns}')
-    pos_info_val = {}
-    for row in df.itertuples():
-        # if there is no variant INFO available then this isn't the right file
-        if row.INFO == '.':
-            return None
-        infos = parse_vcf_info(row.INFO)
-        # no DP INFO? skip this file
-        if 'DP' not in infos:
-            return None
-        if infos['DP'] < qc_reqs.low_coverage_threshold:
-            continue
-        ac_ref_fwd, ac_ref_rev, ac_alt_fwd, ac_alt_rev = infos['SR']
-        infos['REF_DP'] = ac_ref_fwd + ac_ref_rev
-        infos['ALT_DP'] = ac_alt_fwd + ac_alt_rev
-        if infos['REF_DP'] + infos['ALT_DP'] < qc_reqs.low_coverage_threshold:
-            continue
-        pos_info_val[row.POS] = infos
-    if pos_info_val == {}:
+    sample_name = get_vcf_sample_name(df, sample_name)
+    df_info = vcf_info_fields(df.INFO, ['DP', 'SR'])
+    dp = df_info.DP.astype(int)
+    df = df[dp >= qc_reqs.low_coverage_threshold]
+    df_info = df_info[dp >= qc_reqs.low_coverage_threshold]
+    dp = dp[dp >= qc_reqs.low_coverage_threshold]
+    df_sr = split_ints(df_info.SR, 4)
+    ref_dp = df_sr[0] + df_sr[1]
+    alt_dp = df_sr[2] + df_sr[3]
+    df_out = variant_depths_dataframe(df, sample_name, ref_dp, alt_dp, dp, alt_dp / (alt_dp + ref_dp), filters)
+    df_out = df_out[(df_out.REF_DP + df_out.ALT_DP >= qc_reqs.low_coverage_threshold) & (df_out.DP > 0)]
+    if df_out.empty:
         return None
-    df_medaka_info = pd.DataFrame(pos_info_val).transpose()
-    df_medaka_info.index.name = 'POS'
-    df_medaka_info.reset_index(inplace=True)
-    df_merge = pd.merge(df, df_medaka_info, on='POS')
-    df_merge['sample'] = sample_name
-    df_merge = df_merge[df_merge.DP > 0]
-    df_merge['ALT_FREQ'] = df_merge.ALT_DP / (df_merge.ALT_DP + df_merge.REF_DP)
-    cols_to_keep = list({col for col, _, _ in variants_cols} & set(df_merge.columns))
-    return df_merge.loc[:, cols_to_keep]
+    return df_out
 
 
 def parse_nanopolish_vcf(
         df: pd.DataFrame,
-        sample_name: str = None
+        sample_name: str = None,
+        filters: Optional[VariantFilters] = None
 ) -> Optional[pd.DataFrame]:
     if df.empty:
         return None
-    if not sample_name:
-        sample_name = df.columns[-1] if df.columns[-1] != 'sample' else None
-        if sample_name is None:
-            raise ValueError(
-                f'Sample name is not defined for VCF: shape={df.shape}; '
-                f'columns={df.columns}'
-            )
-    pos_info_val = {}
-    for row in df.itertuples():
-        infos = parse_vcf_info(row.INFO)
-        fwd_ref, rev_ref, fwd_alt, rev_alt = infos['StrandSupport']
-        allele_count = infos['AlleleCount']
-        if allele_count > 1:
-            raise NotImplementedError(
-                f'Handling of allele count of {allele_count} is not supported. '
-                f'Only allele counts of 1 are supported.'
-            )
-        infos['DP'] = fwd_ref + fwd_alt + rev_ref + rev_alt
-        infos['REF_DP'] = fwd_ref + rev_ref
-        infos['ALT_DP'] = fwd_alt + rev_alt
-        pos_info_val[row.POS] = infos
-    df_nanopolish_info = pd.DataFrame(pos_info_val).transpose()
-    df_nanopolish_info.index.name = 'POS'
-    df_nanopolish_info.reset_index(inplace=True)
-    df_merge = pd.merge(df, df_nanopolish_info, on='POS')
-    df_merge['sample'] = sample_name
-    df_merge = df_merge[df_merge.DP > 0]
-    df_merge['ALT_FREQ'] = df_merge.ALT_DP / df_merge.DP
-    cols_to_keep = list({col for col, _, _ in variants_cols} & set(df_merge.columns))
-    return df_merge.loc[:, cols_to_keep]
-
-def parse_bcftools_vcf(df: pd.DataFrame, sample_name: str = None) -> Optional[pd.DataFrame]:
+    sample_name = get_vcf_sample_name(df, sample_name, default_column='sample')
+    df_info = vcf_info_fields(df.INFO, ['AlleleCount', 'StrandSupport'])
+    allele_count = df_info.AlleleCount.astype(int)
+    if (allele_count > 1).any():
+        raise NotImplementedError(
+            f'Handling of allele count of {allele_count.max()} is not supported. '
+            f'Only allele counts of 1 are supported.'
+        )
+    df_ss = split_ints(df_info.StrandSupport, 4)
+    fwd_ref, rev_ref, fwd_alt, rev_alt = df_ss[0], df_ss[1], df_ss[2], df_ss[3]
+    dp = fwd_ref + fwd_alt + rev_ref + rev_alt
+    alt_dp = fwd_alt + rev_alt
+    df_out = variant_depths_dataframe(df, sample_name, fwd_ref + rev_ref, alt_dp, dp, alt_dp / dp, filters)
+    return df_out[df_out.DP > 0]
+
+
+def parse_bcftools_vcf(
+        df: pd.DataFrame,
+        sample_name: str = None,
+        filters: Optional[VariantFilters] = None
+) -> Optional[pd.DataFrame]:
     if df.empty:
         return None
-    if not sample_name:
-        sample_name = df.columns[-1] if df.columns[-1] != 'sample' else None
-        if sample_name is None:
-            raise ValueError(f'Sample name is not defined for VCF: shape={df.shape}; columns={df.columns}')
-    pos_info_val = {}
-    for row in df.itertuples():
-        infos = parse_vcf_info(row.INFO)
-        allele_count = infos['AC']
-        if allele_count > 1:
-            raise NotImplementedError(f'Handling of allele count of {allele_count} is not supported. '
-                                      f'Only allele counts of 1 are supported.')
-        ref_dp, alt_dp = infos['AD']
-        infos['REF_DP'] = ref_dp
-        infos['ALT_DP'] = alt_dp
-        pos_info_val[row.POS] = infos
-    df_bcftools_info = pd.DataFrame(pos_info_val).transpose()
-    df_bcftools_info.index.name = 'POS'
-    df_bcftools_info.reset_index(inplace=True)
-    df_merge = pd.merge(df, df_bcftools_info, on='POS')
-    df_merge['sample'] = sample_name
-    df_merge = df_merge[df_merge.DP > 0]
-    df_merge['ALT_FREQ'] = df_merge.ALT_DP / df_merge.DP
-    cols_to_keep = list({col for col, _, _ in variants_cols} & set(df_merge.columns))
-    return df_merge.loc[:, cols_to_keep]
-
-
-def parse_vcf_info(s: str) -> dict:
-    out = {}
-    for x in s.split(';'):
-        if not x:
-            continue
-        if '=' not in x:
-            continue
-        key, val_str = x.split('=', maxsplit=1)
-        out[key] = try_parse_number(val_str)
-    return out
+    sample_name = get_vcf_sample_name(df, sample_name, default_column='sample')
+    df_info = vcf_info_fields(df.INFO, ['DP', 'AC', 'AD'])
+    allele_count = df_info.AC.astype(int)
+    if (allele_count > 1).any():
+        raise NotImplementedError(f'Handling of allele count of {allele_count.max()} is not supported. '
+                                  f'Only allele counts of 1 are supported.')
+    dp = df_info.DP.astype(int)
+    df_ad = split_ints(df_info.AD, 2)
+    df_out = variant_depths_dataframe(df, sample_name, df_ad[0], df_ad[1], dp, df_ad[1] / dp, filters)
+    return df_out[df_out.DP > 0]
 
 
 def parse_clair3_vcf(
         df: pd.DataFrame,
         sample_name: str,
-        qc_reqs: QualityRequirements
+        qc_reqs: QualityRequirements,
+        filters: Optional[VariantFilters] = None
 ) -> Optional[pd.DataFrame]:
     if df.empty:
         return None
-    if not sample_name:
-        sample_name = df.columns[-1] if df.columns[-1] != 'SAMPLE' else None
-        if sample_name is None:
-            raise ValueError(f'Sample name is not defined for VCF: shape={df.shape}; columns={df.columns}')
-    pos_info_val = {}
-    for row in df.itertuples():
-        infos = parse_vcf_info(row.INFO)
-        # no DP INFO? skip this file
-        if 'DP' not in infos:
-            return None
-        depth = infos['DP']
-        if depth < qc_reqs.low_coverage_threshold:
-            continue
-        allele_fraction = infos['AF']
-        alt_dp = int(depth * allele_fraction)
-        ref_dp = depth - alt_dp
-        infos['ALT_DP'] = alt_dp
-        infos['REF_DP'] = ref_dp
-        if infos['REF_DP'] + infos['ALT_DP'] < qc_reqs.low_coverage_threshold:
-            continue
-        pos_info_val[row.POS] = infos
-    if pos_info_val == {}:
+    sample_name = get_vcf_sample_name(df, sample_name)
+    df_info = vcf_info_fields(df.INFO, ['DP', 'AF'])
+    dp = df_info.DP.astype(int)
+    allele_fraction = df_info.AF.astype(float)
+    alt_dp = (dp * allele_fraction).astype(int)
+    df_out = variant_depths_dataframe(df, sample_name, dp - alt_dp, alt_dp, dp, allele_fraction, filters)
+    df_out = df_out[(df_out.DP >= qc_reqs.low_coverage_threshold) & (df_out.DP > 0)]
+    if df_out.empty:
         return None
-    df_clair3_info = pd.DataFrame(pos_info_val).transpose()
-    df_clair3_info.index.name = 'POS'
-    df_clair3_info.reset_index(inplace=True)
-    df_merge = pd.merge(df, df_clair3_info, on='POS')
-    df_merge['sample'] = sample_name
-    df_merge = df_merge[df_merge.DP > 0]
-    df_merge['ALT_FREQ'] = df_merge.AF
-    cols_to_keep = list({col for col, _, _ in variants_cols} & set(df_merge.columns))
-    return df_merge.loc[:, cols_to_keep]
-
-
-def get_info(basedir: Path, qc_reqs: QualityRequirements) -> Dict[str, pd.DataFrame]:
-    sample_vcf = find_file_for_each_sample(basedir=basedir,
-                                           glob_patterns=VCF_GLOB_PATTERNS,
-                                           sample_name_cleanup=VCF_SAMPLE_NAME_CLEANUP,
-                                           single_entry_selector_func=vcf_selector)
-    sample_dfvcf = {}
-    for sample, vcf_path in sample_vcf.items():
-        variant_caller, df_vcf = read_vcf(vcf_path)
-        if variant_caller.startswith(VariantCaller.iVar):
-            df_parsed_ivar_vcf = parse_ivar_vcf(df_vcf, sample)
-            if df_parsed_ivar_vcf is not None:
-                sample_dfvcf[sample] = df_parsed_ivar_vcf
-            else:
-                logger.warning(f'Sample "{sample}" has no entries in VCF "{vcf_path}"')
-        elif variant_caller.startswith(VariantCaller.Bcftools):
-            df_bcftools_vcf = parse_bcftools_vcf(df_vcf, sample)
-            if df_bcftools_vcf is not None:
-                sample_dfvcf[sample] = df_bcftools_vcf
-            else:
-                logger.warning(f'Sample "{sample}" has no entries in VCF "{vcf_path}"')
-        elif variant_caller.startswith(VariantCaller.Clair3):
-            df_clair3_vcf = parse_clair3_vcf(df_vcf, sample, qc_reqs)
-            if df_clair3_vcf is not None:
-                sample_dfvcf[sample] = df_clair3_vcf
-            else:
-                logger.warning(f'Sample "{sample}" has no entries in Clair3 VCF "{vcf_path}"')
-        elif variant_caller.startswith(VariantCaller.Medaka):
-            df_medaka_vcf = parse_medaka_vcf(df_vcf, sample, qc_reqs)
-            if df_medaka_vcf is not None:
-                sample_dfvcf[sample] = df_medaka_vcf
-            else:
-                logger.warning(f'Sample "{sample}" has no entries in VCF "{vcf_path}"')
-        elif variant_caller.startswith(VariantCaller.Longshot):
-            df_longshot_vcf = parse_longshot_vcf(df_vcf, sample)
-            if df_longshot_vcf is not None:
-                sample_dfvcf[sample] = df_longshot_vcf
-            else:
-                logger.warning(f'Sample "{sample}" has no entries in VCF "{vcf_path}"')
-        elif variant_caller.startswith(VariantCaller.Nanopolish):
-            df_nanopolish_vcf = parse_nanopolish_vcf(df_vcf, sample)
-            if df_nanopolish_vcf is not None:
-                sample_dfvcf[sample] = df_nanopolish_vcf
-            else:
-                logger.warning(f'Sample "{sample}" has no entries in VCF "{vcf_path}"')
-        else:
+    return df_out
+
+
+def get_vcf_parser(
+        variant_caller: str,
+        qc_reqs: QualityRequirements
+) -> Optional[Callable[..., Optional[pd.DataFrame]]]:
+    """Get the VCF parser for the variant caller that produced a VCF or None if the variant caller is not supported
+
+    Parsers are called with the VCF records DataFrame, sample name and `filters` keyword argument.
+    """
+    parsers = [
+        (VariantCaller.iVar, parse_ivar_vcf),
+        (VariantCaller.Bcftools, parse_bcftools_vcf),
+        (VariantCaller.Clair3, partial(parse_clair3_vcf, qc_reqs=qc_reqs)),
+        (VariantCaller.Medaka, partial(parse_medaka_vcf, qc_reqs=qc_reqs)),
+        (VariantCaller.Longshot, parse_longshot_vcf),
+        (VariantCaller.Nanopolish, parse_nanopolish_vcf),
+    ]
+    for caller, parser in parsers:
+        if variant_caller.startswith(caller):
+            return parser
+    return None
+
+
+def vcf_records_supported(variant_caller: str, df: pd.DataFrame) -> bool:
+    """Check that VCF records have the INFO values that the parser for the variant caller needs
+
+    A Medaka or Clair3 VCF where any record has no INFO or no DP INFO value isn't the right file and is skipped.
+    """
+    if df.empty:
+        return True
+    # if there is no variant INFO available then this isn't the right file
+    if variant_caller.startswith(VariantCaller.Medaka) and (df.INFO == '.').any():
+        return False
+    # no DP INFO? skip this file
+    if variant_caller.startswith((VariantCaller.Medaka, VariantCaller.Clair3)):
+        return not vcf_info_fields(df.INFO, ['DP']).DP.isna().any()
+    return True
+
+
+def parse_sample_vcf(
+        sample: str,
+        vcf_path: Path,
+        qc_reqs: QualityRequirements,
+        filters: Optional[VariantFilters] = None
+) -> Optional[pd.DataFrame]:
+    """Read and parse a sample VCF with the parser for the variant caller that produced it
+
+    Variant `filters` are applied while reading and parsing the VCF so that filtered out variants are not parsed
+    any further than needed to filter them. With depth or allele frequency filters, records are read and parsed in
+    chunks so that only variants passing the filters from all chunks are held in memory. Whether the file can be
+    parsed is decided for the whole file, so the output does not depend on where chunks start and end.
+    """
+    with open_vcf(vcf_path) as fh:
+        variant_caller, vcf_cols = read_vcf_header(fh)
+        parser = get_vcf_parser(variant_caller, qc_reqs)
+        if parser is None:
             logger.warning(
                 f'Sample "{sample}" VCF file "{vcf_path}" with '
                 f'variant_caller={variant_caller} not supported. Skipping...'
             )
-
-    sample_snpsift = find_file_for_each_sample(basedir=basedir,
-                                               glob_patterns=SNPSIFT_GLOB_PATTERNS,
-                                               sample_name_cleanup=SNPSIFT_SAMPLE_NAME_CLEANUP,
-                                               single_entry_selector_func=snpsift_selector)
-    if not sample_snpsift:
-        logger.warning(f'No SnpSift tables found in "{basedir}" using glob patterns "{SNPSIFT_GLOB_PATTERNS}"')
-    sample_dfsnpsift = {}
-    for sample, snpsift_path in sample_snpsift.items():
-        df_snpsift = simplify_snpsift(pd.read_table(snpsift_path), sample)
-        if df_snpsift is not None:
-            sample_dfsnpsift[sample] = df_snpsift
+            return None
+        pass_only = filters is not None and filters.pass_only
+        if filters is not None and (filters.min_depth > 0 or filters.min_alt_freq > 0):
+            parsed_chunks = []
+            for chunk in read_vcf_chunks(fh, vcf_cols, pass_only):
+                # skip the whole file if any chunk has unsupported records as when it is parsed all at once
+                if not vcf_records_supported(variant_caller, chunk):
+                    parsed_chunks = []
+                    break
+                df = parser(chunk, sample, filters=filters)
+                if df is not None:
+                    parsed_chunks.append(df)
+            non_empty_chunks = [df for df in parsed_chunks if not df.empty]
+            if non_empty_chunks:
+                df_parsed = pd.concat(non_empty_chunks)
+            else:
+                df_parsed = parsed_chunks[0] if parsed_chunks else None
         else:
-            logger.warning(f'Sample "{sample}" has no entries in VCF "{snpsift_path}"')
-    out = {}
-    set_vcf_samples = set(sample_dfvcf.keys())
-    set_snpsift_samples = set(sample_dfsnpsift.keys())
-    all_samples = set_vcf_samples | set_snpsift_samples
+            df = read_vcf_records(fh, vcf_cols, pass_only)
+            df_parsed = parser(df, sample, filters=filters) if vcf_records_supported(variant_caller, df) else None
+    if df_parsed is None:
+        logger.warning(f'Sample "{sample}" has no entries in VCF "{vcf_path}"')
+    return df_parsed
+
+
+def parse_sample_snpsift(
+        sample: str,
+        snpsift: Union[Path, pd.DataFrame],
+        filters: Optional[VariantFilters] = None
+) -> Optional[pd.DataFrame]:
+    """Read and simplify a sample SnpSift table or the sample's table from a multi-sample SnpSift table"""
+    df = read_snpsift(snpsift) if isinstance(snpsift, Path) else snpsift
+    df_snpsift = simplify_snpsift(df, sample, filters)
+    if df_snpsift is None:
+        source = f'"{snpsift}"' if isinstance(snpsift, Path) else 'multi-sample SnpSift table'
+        logger.warning(f'Sample "{sample}" has no entries in SnpSift table {source}')
+    return df_snpsift
+
+
+def get_sample_variants(
+        sample: str,
+        vcf_path: Optional[Path],
+        snpsift: Optional[Union[Path, pd.DataFrame]],
+        qc_reqs: QualityRequirements,
+        filters: Optional[VariantFilters] = None
+) -> Optional[pd.DataFrame]:
+    """Parse and merge the VCF and SnpSift table variant info for a sample into a `VARIANTS_SCHEMA` typed table"""
+    df_vcf = parse_sample_vcf(sample, vcf_path, qc_reqs, filters) if vcf_path else None
+    df_snpsift = parse_sample_snpsift(sample, snpsift, filters) if snpsift is not None else None
+    df = merge_vcf_snpsift(df_vcf, df_snpsift)
+    return apply_variants_schema(df) if df is not None else None
+
+
+def get_info(
+        basedir: Union[Path, FileIndex],
+        qc_reqs: QualityRequirements,
+        processes: int = 1,
+        filters: Optional[VariantFilters] = None,
+        snpsift_table: Optional[Path] = None
+) -> Dict[str, pd.DataFrame]:
+    """Get variant info for each sample from VCF files and SnpSift tables.
+
+    Samples are parsed in parallel in a process pool if `processes` > 1. Variants not passing `filters` are
+    dropped while parsing. If a multi-sample `snpsift_table` is given, it is used instead of per-sample SnpSift
+    tables found in `basedir`.
+    """
+    basedir = get_file_index(basedir)
+    sample_vcf = find_file_for_each_sample(basedir=basedir,
+                                           glob_patterns=VCF_GLOB_PATTERNS,
+                                           sample_name_cleanup=VCF_SAMPLE_NAME_CLEANUP,
+                                           single_entry_selector_func=vcf_selector)
+    if snpsift_table:
+        sample_snpsift = read_multi_sample_snpsift(snpsift_table)
+    else:
+        sample_snpsift = find_file_for_each_sample(basedir=basedir,
+                                                   glob_patterns=SNPSIFT_GLOB_PATTERNS,
+                                                   sample_name_cleanup=SNPSIFT_SAMPLE_NAME_CLEANUP,
+                                                   single_entry_selector_func=snpsift_selector)
+        if not sample_snpsift:
+            logger.warning(f'No SnpSift tables found in "{basedir}" using glob patterns "{SNPSIFT_GLOB_PATTERNS}"')
+    set_vcf_samples = set(sample_vcf.keys())
+    set_snpsift_samples = set(sample_snpsift.keys())
+    all_samples = sorted(set_vcf_samples | set_snpsift_samples)
     logger.debug(f'all_samples={len(all_samples)} | '
                  f'vcf only samples={set_vcf_samples - set_snpsift_samples} |'
                  f'snpsift only samples={set_snpsift_samples - set_vcf_samples}')
-    for sample in all_samples:
-        df_snpsift = sample_dfsnpsift.get(sample, None)
-        df_vcf = sample_dfvcf.get(sample, None)
-        df_merged = merge_vcf_snpsift(df_vcf, df_snpsift)
-        if df_merged is None:
-            continue
-        out[sample] = df_merged
+    dfs = map_samples(get_sample_variants,
+                      [(sample, sample_vcf.get(sample), sample_snpsift.get(sample), qc_reqs, filters)
+                       for sample in all_samples],
+                      processes=processes)
+    return {sample: df for sample, df in zip(all_samples, dfs) if df is not None}
 
-    return out
+
+def intern_mutations(df: pd.DataFrame) -> pd.Categorical:
+    """Get a categorical of mutation descriptions interning each unique mutation across all samples
+
+    Each unique (CHROM, POS, REF, ALT, gene, aa, effect) is described with `parse_aa` once no matter how many
+    samples have it. Categories are ordered by reference position then description, so the category codes are
+    cohort-wide mutation IDs in reference sequence order. Variants without SnpEff annotation have no mutation
+    description (code -1).
+    """
+    has_aa = df.aa.notna().to_numpy()
+    df_annotated = df.loc[has_aa, MUTATION_KEY_COLS]
+    # dropna=False so that keys with missing values, e.g. no gene for intergenic variants, are not dropped
+    key_ids = df_annotated.groupby(MUTATION_KEY_COLS, sort=False, observed=True, dropna=False).ngroup().to_numpy()
+    _, first_idx = np.unique(key_ids, return_index=True)
+    df_keys = df_annotated.iloc[first_idx]
+    df_descs = pd.DataFrame({
+        'mutation': [parse_aa(gene=row.gene,
+                              ref=row.REF,
+                              alt=row.ALT,
+                              nt_pos=row.POS,
+                              aa_pos=None,
+                              snpeff_aa=row.aa,
+                              effect=row.effect) for row in df_keys.itertuples()],
+        'POS': df_keys.POS.to_numpy(),
+    })
+    categories = df_descs.sort_values(['POS', 'mutation']).mutation.drop_duplicates()
+    mutations = np.full(df.shape[0], np.nan, dtype=object)
+    mutations[has_aa] = df_descs.mutation.to_numpy()[key_ids]
+    return pd.Categorical(mutations, categories=categories)
 
 
 def to_dataframe(dfs: Iterable[pd.DataFrame]) -> pd.DataFrame:
-    df = pd.concat(list(dfs))
+    """Concatenate per-sample variant tables into a table of variants of all samples
+
+    Numeric `VARIANTS_SCHEMA` dtypes are kept by concatenation, including for columns missing in some samples (e.g.
+    allele depths of samples with only a SnpSift table). Categorical columns have different categories in each
+    sample, so they are cast to categorical again with the categories of all samples.
+    """
+    df = apply_variants_schema(pd.concat(list(dfs)))
+    if set(MUTATION_KEY_COLS) <= set(df.columns):
+        df['mutation'] = intern_mutations(df)
+    df = select_variants_cols(df)
     df.sort_values(['sample', 'POS'], inplace=True)
     df.set_index('sample', inplace=True)
     df.index.name = 'Sample'
     return df.rename(columns={x: y for x, y, _ in variants_cols})
 
 
-def get_nt_position_int(s: str) -> int:
-    """Get the nucleotide position from the mutation string
+def to_variant_pivot_table(df: pd.DataFrame) -> pd.DataFrame:
+    """Pivot variants into a sparse matrix of alternate allele frequency for each sample and mutation
 
-    >>> get_nt_position_int('A1879G')
-    1879
-    >>> get_nt_position_int('S:Y145_H146del (TATTACC21992T)')
-    21992
+    Matrix columns are sparse arrays with a fill value of 0.0 built directly from the sample indices and allele
+    frequencies of each mutation, so only the allele frequencies of mutations observed in a sample are stored and no
+    dense column of every sample is allocated. Mutations are in reference position order, i.e. the category order of
+    an interned Mutation column (see `intern_mutations`), otherwise by position then name.
     """
-    if ':' in s:
-        return int(re.sub(r'.*\([AGTC]+(\d+).*', r'\1', s))
+    df_vars = df.reset_index()
+    df_vars = df_vars[df_vars.Mutation.notna() & df_vars['Alternate Allele Frequency'].notna()]
+    if isinstance(df_vars.Mutation.dtype, pd.CategoricalDtype):
+        mutations = df_vars.Mutation.cat.remove_unused_categories().array
     else:
-        return int(re.sub(r'[AGTC]+(\d+).*', r'\1', s))
-
-
-def to_variant_pivot_table(df: pd.DataFrame) -> pd.DataFrame:
-    df_vars = df.copy()
-    df_vars.reset_index(inplace=True)
-    df_pivot = pd.pivot_table(df_vars,
-                              index='Sample',
-                              columns='Mutation',
-                              values='Alternate Allele Frequency',
-                              aggfunc='first',
-                              fill_value=0.0)
-    nt_positions = [get_nt_position_int(x) for x in df_pivot.columns]
-    pivot_cols = list(zip(df_pivot.columns,
-                          nt_positions))
-    pivot_cols.sort(key=itemgetter(1))
-    return df_pivot[[x for x, y in pivot_cols]]
+        categories = df_vars.sort_values(['Position', 'Mutation']).Mutation.drop_duplicates()
+        mutations = pd.Categorical(df_vars.Mutation, categories=categories)
+    sample_codes, samples = pd.factorize(df_vars.Sample, sort=True)
+    mutation_codes = mutations.codes.astype(np.int64)
+    # keep the first allele frequency of each sample and mutation
+    first = ~pd.Series(mutation_codes * samples.size + sample_codes).duplicated().to_numpy()
+    sample_codes = sample_codes[first]
+    mutation_codes = mutation_codes[first]
+    afs = df_vars['Alternate Allele Frequency'].to_numpy(dtype=np.float64)[first]
+    # allele frequencies of 0.0 are the fill value and are not stored
+    order = np.lexsort((sample_codes, mutation_codes))
+    order = order[afs[order] != 0.0]
+    bounds = np.searchsorted(mutation_codes[order], np.arange(mutations.categories.size + 1))
+    dtype = pd.SparseDtype(np.float64, fill_value=0.0)
+    columns = {}
+    for i, mutation in enumerate(mutations.categories):
+        idx = order[bounds[i]:bounds[i + 1]]
+        # sample indices are sorted within each mutation as sparse index indices must be
+        sparse_index = IntIndex(samples.size, sample_codes[idx].astype(np.int32))
+        columns[str(mutation)] = pd.arrays.SparseArray(afs[idx], sparse_index=sparse_index, dtype=dtype)
+    df_pivot = pd.DataFrame(columns, index=pd.Index(samples, name='Sample'))
+    df_pivot.columns.name = 'Mutation'
+    return df_pivot
 
 
 def to_summary(df: pd.DataFrame) -> pd.DataFrame:
-    df_vars = df.copy()
-    df_vars.reset_index(inplace=True)
-    logger.debug(f'df_vars columns: {df_vars.columns}')
-    df_summary = df_vars.groupby('Mutation', sort=False).agg(
-        n_samples=('Sample', 'size'),
-        samples=('Sample', lambda x: '; '.join(x)),
-        gene=('Gene', 'first'),
-        effect=('Variant Effect', 'first'),
-        impact=('Variant Impact', 'first'),
-        aa=('Amino Acid Change', 'first'),
+    """Summarize variants by mutation across all samples
+
+    Variant rows are ordered by mutation code (the category code of an interned Mutation column), so the samples
+    with each mutation are joined once per mutation and depth and allele frequency stats are vectorized groupby
+    aggregations on the codes. Annotation columns are the same for all variants of a mutation and are taken from its
+    first variant.
+    """
+    if df.Mutation.isna().any():
+        df = df[df.Mutation.notna()]
+    codes, mutations = pd.factorize(df.Mutation, sort=True)
+    order = np.argsort(codes, kind='stable')
+    bounds = np.searchsorted(codes[order], np.arange(mutations.size + 1))
+    samples = df.index.to_numpy()[order].tolist()
+    df_first = df.iloc[order[bounds[:-1]]]
+    df_stats = df[['Alternate Allele Depth', 'Alternate Allele Frequency']].groupby(codes).agg(
         min_depth=('Alternate Allele Depth', 'min'),
         max_depth=('Alternate Allele Depth', 'max'),
-        mean_depth=('Alternate Allele Depth', lambda x: sum(x) / len(x)),
+        mean_depth=('Alternate Allele Depth', 'mean'),
         min_af=('Alternate Allele Frequency', 'min'),
         max_af=('Alternate Allele Frequency', 'max'),
-        mean_af=('Alternate Allele Frequency', lambda x: sum(x) / len(x)),
-        nt_pos=('Position', 'first'),
-        aa_pos=('Amino Acid Position', 'first')
+        mean_af=('Alternate Allele Frequency', 'mean'),
     )
-    df_summary.sort_values('nt_pos', inplace=True)
+    df_summary = pd.DataFrame({
+        'n_samples': np.diff(bounds),
+        'samples': ['; '.join(samples[start:end]) for start, end in zip(bounds[:-1], bounds[1:])],
+        'gene': df_first['Gene'].to_numpy(),
+        'effect': df_first['Variant Effect'].to_numpy(),
+        'impact': df_first['Variant Impact'].to_numpy(),
+        'aa': df_first['Amino Acid Change'].to_numpy(),
+        **{column: values.to_numpy() for column, values in df_stats.items()},
+        'nt_pos': df_first['Position'].to_numpy(),
+        'aa_pos': df_first['Amino Acid Position'].to_numpy(),
+    }, index=mutations.rename('Mutation'))
+    df_summary.sort_values('nt_pos', kind='stable', inplace=True)
     return df_summary.rename(columns={x: y for x, y, _ in (variant_summary_cols + variants_cols)})
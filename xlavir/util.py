@@ -1,9 +1,14 @@
 import contextlib
+import gzip
 import logging
+import logging.handlers
+import multiprocessing
+import os
 import re
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Union, List, Optional, Mapping, Callable, Iterator
+from typing import Union, List, Optional, Mapping, Callable, Iterator, Dict, Sequence, Iterable, Tuple, Any
 
 import numpy as np
 import pandas as pd
@@ -12,24 +17,331 @@ import pandas as pd
 logger = logging.getLogger(__name__)
 
 
+# Directories that are never searched for tool outputs, e.g. if the Nextflow launch directory is specified instead
+# of the results/publishDir directory, the "work/" directory and conda/Singularity caches can hold millions of files.
+# Non-hidden conda/Singularity cache directories are only excluded at the top level of the input directory (e.g.
+# NXF_CONDA_CACHEDIR/NXF_SINGULARITY_CACHEDIR in the launch directory; the default caches are under "work/"), so
+# that output directories with those names, e.g. "results/conda/", are still searched.
+DEFAULT_EXCLUDE_PATTERNS = [
+    'work',
+    '.nextflow',
+    '/conda/',
+    '.conda',
+    '/singularity/',
+    '.singularity',
+    '.git',
+]
+
+# File in the input directory with extra exclude glob patterns (one per line)
+IGNORE_FILENAME = '.xlavirignore'
+
+
+def read_ignore_file(path: Path) -> List[str]:
+    """Read exclude glob patterns from an ignore file skipping blank lines and "#" comments"""
+    with open(path) as fh:
+        return [line.strip() for line in fh if line.strip() and not line.lstrip().startswith('#')]
+
+
+class ExcludeRules:
+    """Glob pattern rules for excluding files and directories from the input directory search.
+
+    Patterns without a "/" are matched against the file or directory name, otherwise against the path relative to
+    the input directory. A leading "/" anchors a pattern to the top level of the input directory and a trailing "/"
+    restricts a pattern to directories.
+
+    >>> rules = ExcludeRules(['work', '*.log', 'results/tmp/', '/conda/'])
+    >>> rules.is_excluded('a/b/work', 'work', is_dir=True)
+    True
+    >>> rules.is_excluded('results/tmp', 'tmp', is_dir=False)
+    False
+    >>> rules.is_excluded('results/tmp', 'tmp', is_dir=True)
+    True
+    >>> rules.is_excluded('results/S1.log', 'S1.log', is_dir=False)
+    True
+    >>> rules.is_excluded('conda', 'conda', is_dir=True), rules.is_excluded('results/conda', 'conda', is_dir=True)
+    (True, False)
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns = list(patterns)
+        self._rules = []
+        for pattern in self.patterns:
+            dir_only = pattern.endswith('/')
+            anchored = pattern.startswith('/')
+            stripped = pattern.strip('/')
+            if not stripped:
+                continue
+            self._rules.append((pattern, anchored or '/' in stripped, dir_only, glob_to_regex(stripped)))
+
+    def matching_pattern(self, relpath: str, name: str, is_dir: bool) -> Optional[str]:
+        """Get the first pattern excluding a file or directory or None if it is not excluded"""
+        for pattern, match_relpath, dir_only, regex in self._rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(relpath if match_relpath else name):
+                return pattern
+        return None
+
+    def is_excluded(self, relpath: str, name: str, is_dir: bool) -> bool:
+        return self.matching_pattern(relpath, name, is_dir) is not None
+
+
+class FileIndex:
+    """In-memory index of all files under a directory built with a single `os.scandir` walk.
+
+    Files are indexed by basename suffix (final extension, e.g. ".gz") and by parent directory name so that
+    glob pattern queries only need to check a small subset of all files instead of walking the directory tree
+    again for each pattern.
+
+    Directories matching the built-in `DEFAULT_EXCLUDE_PATTERNS`, patterns in a `.xlavirignore` file in `basedir` or
+    user specified `exclude` patterns are pruned from the walk. Files are de-duplicated by (device, inode) so that
+    the same file linked into several places (e.g. symlinked Nextflow publishDir outputs) is only found once.
+
+    >>> index = FileIndex(Path('tests/data'))
+    >>> [p.name for p in index.glob('**/nanopolish/*.pass.vcf.gz')]
+    ['Sample1.pass.vcf.gz', 'Sample2.pass.vcf.gz']
+    """
+
+    def __init__(self,
+                 basedir: Path,
+                 exclude: Optional[Iterable[str]] = None,
+                 use_default_excludes: bool = True):
+        self.basedir = basedir
+        patterns = list(DEFAULT_EXCLUDE_PATTERNS) if use_default_excludes else []
+        ignore_file = basedir / IGNORE_FILENAME
+        if ignore_file.is_file():
+            ignore_patterns = read_ignore_file(ignore_file)
+            logger.info(f'Excluding {len(ignore_patterns)} patterns from "{ignore_file}"')
+            patterns += ignore_patterns
+        if exclude:
+            patterns += list(exclude)
+        self.exclude = ExcludeRules(patterns)
+        self.paths: List[Path] = []
+        self._relpaths: List[str] = []
+        self._by_suffix: Dict[str, List[int]] = defaultdict(list)
+        self._by_parent: Dict[str, List[int]] = defaultdict(list)
+        # (device, inode) -> index of file in self.paths
+        self._file_ids: Dict[Tuple[int, int], int] = {}
+        self._is_symlink: List[bool] = []
+        self.n_duplicates = 0
+        self._walk(str(basedir), '')
+        self._build_indices()
+        logger.debug(f'Indexed {len(self.paths)} files in "{basedir}" '
+                     f'(skipped {self.n_duplicates} duplicate links to the same file)')
+
+    def __str__(self) -> str:
+        return str(self.basedir)
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def _walk(self, dirpath: str, reldir: str) -> None:
+        try:
+            dev = os.stat(dirpath).st_dev
+            with os.scandir(dirpath) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError as ex:
+            logger.warning(f'Could not list directory "{dirpath}": {ex}')
+            return
+        for entry in entries:
+            relpath = f'{reldir}/{entry.name}' if reldir else entry.name
+            try:
+                # like pathlib's "**", do not descend into symlinked directories
+                if entry.is_dir(follow_symlinks=False):
+                    pattern = self.exclude.matching_pattern(relpath, entry.name, is_dir=True)
+                    if pattern is None:
+                        self._walk(entry.path, relpath)
+                    elif pattern in DEFAULT_EXCLUDE_PATTERNS:
+                        logger.info(f'Excluding directory "{entry.path}" from search matching default exclude '
+                                    f'pattern "{pattern}"')
+                    else:
+                        logger.debug(f'Excluding directory "{entry.path}" from search matching "{pattern}"')
+                    continue
+                if not entry.is_file() or self.exclude.is_excluded(relpath, entry.name, is_dir=False):
+                    continue
+                is_symlink = entry.is_symlink()
+                if is_symlink:
+                    st = os.stat(entry.path)
+                    file_id = (st.st_dev, st.st_ino)
+                else:
+                    # files are on the same device as their directory, so avoid a stat call per file
+                    file_id = (dev, entry.inode())
+            except OSError:
+                continue
+            if file_id in self._file_ids:
+                self.n_duplicates += 1
+                idx = self._file_ids[file_id]
+                # prefer the real file over a symlink to it
+                if self._is_symlink[idx] and not is_symlink:
+                    self.paths[idx] = Path(entry.path)
+                    self._relpaths[idx] = relpath
+                    self._is_symlink[idx] = False
+                continue
+            self._file_ids[file_id] = len(self.paths)
+            self.paths.append(Path(entry.path))
+            self._relpaths.append(relpath)
+            self._is_symlink.append(is_symlink)
+
+    def _build_indices(self) -> None:
+        order = sorted(range(len(self.paths)), key=self._relpaths.__getitem__)
+        self.paths = [self.paths[i] for i in order]
+        self._relpaths = [self._relpaths[i] for i in order]
+        for idx, relpath in enumerate(self._relpaths):
+            parent, _, name = relpath.rpartition('/')
+            self._by_suffix[os.path.splitext(name)[1]].append(idx)
+            self._by_parent[parent.rsplit('/', 1)[-1]].append(idx)
+
+    def _candidates(self, glob_pattern: str) -> Sequence[int]:
+        """Get indices of files that could match a glob pattern using the parent directory or suffix indices"""
+        parts = glob_pattern.split('/')
+        suffix = os.path.splitext(parts[-1])[1]
+        if len(parts) > 1 and not has_glob_magic(parts[-2]):
+            return self._by_parent.get(parts[-2], [])
+        if suffix and not has_glob_magic(suffix):
+            return self._by_suffix.get(suffix, [])
+        return range(len(self.paths))
+
+    def glob(self, glob_pattern: str) -> List[Path]:
+        """Get indexed files with a path relative to the base directory matching a `Path.glob` style pattern"""
+        regex = glob_to_regex(glob_pattern)
+        return [self.paths[i] for i in self._candidates(glob_pattern) if regex.match(self._relpaths[i])]
+
+
+def has_glob_magic(s: str) -> bool:
+    """Check if a string contains glob wildcard characters
+
+    >>> has_glob_magic('*.vcf.gz')
+    True
+    >>> has_glob_magic('ivar')
+    False
+    """
+    return any(c in s for c in '*?[')
+
+
+def glob_to_regex(glob_pattern: str) -> re.Pattern:
+    """Convert a `Path.glob` style pattern into a regex for matching relative POSIX paths
+
+    >>> bool(glob_to_regex('**/mosdepth/**/*.per-base.bed.gz').match('a/mosdepth/b/c/S1.per-base.bed.gz'))
+    True
+    >>> bool(glob_to_regex('**/ivar/*.vcf.gz').match('a/ivar/b/S1.vcf.gz'))
+    False
+    >>> bool(glob_to_regex('**/*.vcf').match('S1.vcf'))
+    True
+    """
+    regex_parts = []
+    parts = glob_pattern.split('/')
+    for i, part in enumerate(parts):
+        is_last = i == len(parts) - 1
+        if part == '**':
+            regex_parts.append('.*' if is_last else '(?:[^/]+/)*')
+            continue
+        part_regex = _glob_part_to_regex(part)
+        regex_parts.append(part_regex if is_last else part_regex + '/')
+    return re.compile(''.join(regex_parts) + r'\Z')
+
+
+def _glob_part_to_regex(part: str) -> str:
+    """Translate a single path component glob into a regex where wildcards never match "/"."""
+    out = []
+    i = 0
+    while i < len(part):
+        c = part[i]
+        i += 1
+        if c == '*':
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[' and (j := part.find(']', i + 1)) != -1:
+            chars = part[i:j]
+            if chars.startswith('!'):
+                chars = '^' + chars[1:]
+            out.append(f'[{chars}]')
+            i = j + 1
+        else:
+            out.append(re.escape(c))
+    return ''.join(out)
+
+
+def get_file_index(basedir: Union[Path, FileIndex]) -> FileIndex:
+    """Get a `FileIndex` for a directory, reusing `basedir` if it is already a `FileIndex`"""
+    return basedir if isinstance(basedir, FileIndex) else FileIndex(basedir)
+
+
 def find_file_for_each_sample(
-        basedir: Path,
-        glob_patterns: List[str],
+        basedir: Union[Path, FileIndex],
+        glob_patterns: List[Union[str, List[str]]],
         sample_name_cleanup: Optional[List[Union[str, re.Pattern]]] = None,
         single_entry_selector_func: Optional[Callable] = None
 ) -> Mapping[str, Path]:
-    sample_files = defaultdict(list)
-    for glob_pattern in glob_patterns:
-        for p in basedir.glob(glob_pattern):
-            sample = extract_sample_name(p.name,
-                                         remove=sample_name_cleanup)
-            sample_files[sample].append(p)
-    return {
-        sample: single_entry_selector_func(files)
-        if single_entry_selector_func
-        else files[0]
-        for sample, files in sample_files.items()
-    }
+    """Find a file for each sample using priority-ordered tiers of glob patterns.
+
+    Each item in `glob_patterns` is a tier, either a single glob pattern or a list of glob patterns. Tiers are
+    searched in order and once a tier yields files for a sample, files for that sample matching lower priority
+    tiers are ignored, so catch-all patterns like "**/*.vcf" only provide files for samples without a more
+    specific match. If a tier yields multiple files for a sample, `single_entry_selector_func` picks one,
+    otherwise the first file is used.
+
+    Args:
+        basedir: Directory or `FileIndex` of directory to search
+        glob_patterns: Priority-ordered tiers of glob patterns
+        sample_name_cleanup: Strings or regex patterns to remove from filenames to get sample names
+        single_entry_selector_func: Function to select a single file from multiple files for a sample
+
+    Returns:
+        Dict of sample name to file path
+    """
+    index = get_file_index(basedir)
+    out: Dict[str, Path] = {}
+    # sample -> (tier index, glob pattern that matched selected file, number of candidates in tier)
+    sample_tier: Dict[str, Tuple[int, str, int]] = {}
+    for tier_idx, tier in enumerate(glob_patterns):
+        tier_patterns = [tier] if isinstance(tier, str) else tier
+        sample_files = defaultdict(list)
+        path_pattern: Dict[Path, str] = {}
+        for glob_pattern in tier_patterns:
+            for p in index.glob(glob_pattern):
+                sample = extract_sample_name(p.name,
+                                             remove=sample_name_cleanup)
+                if sample in out or p in path_pattern:
+                    continue
+                sample_files[sample].append(p)
+                path_pattern[p] = glob_pattern
+        for sample, files in sample_files.items():
+            path = single_entry_selector_func(files) \
+                if single_entry_selector_func and len(files) > 1 \
+                else files[0]
+            out[sample] = path
+            sample_tier[sample] = (tier_idx, path_pattern[path], len(files))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(format_tier_report(out, sample_tier))
+    return out
+
+
+def flatten_glob_patterns(glob_patterns: List[Union[str, List[str]]]) -> List[str]:
+    """Flatten priority-ordered tiers of glob patterns into a list of glob patterns
+
+    >>> flatten_glob_patterns(['**/ivar/*.vcf.gz', ['**/*.vcf', '**/*.vcf.gz']])
+    ['**/ivar/*.vcf.gz', '**/*.vcf', '**/*.vcf.gz']
+    """
+    return [x for tier in glob_patterns for x in ([tier] if isinstance(tier, str) else tier)]
+
+
+def format_tier_report(
+        sample_paths: Mapping[str, Path],
+        sample_tier: Mapping[str, Tuple[int, str, int]],
+) -> str:
+    """Format a report of which glob pattern tier produced the file for each sample
+
+    >>> print(format_tier_report({'S1': Path('a/S1.vcf')}, {'S1': (2, '**/*.vcf', 1)}))
+    Found files for 1 samples:
+      S1: tier=2 pattern="**/*.vcf" candidates=1 path="a/S1.vcf"
+    """
+    lines = [f'Found files for {len(sample_paths)} samples:']
+    for sample in sorted(sample_paths):
+        tier_idx, glob_pattern, n_candidates = sample_tier[sample]
+        lines.append(f'  {sample}: tier={tier_idx} pattern="{glob_pattern}" '
+                     f'candidates={n_candidates} path="{sample_paths[sample]}"')
+    return '\n'.join(lines)
 
 
 def extract_sample_name(
@@ -69,6 +381,86 @@ def extract_sample_name(
     return out
 
 
+def _init_worker_logging(log_queue: multiprocessing.Queue, level: int) -> None:
+    """Send log records from a worker process to the parent process"""
+    root = logging.getLogger()
+    root.handlers = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(level)
+
+
+def map_samples(
+        func: Callable[..., Any],
+        sample_args: Iterable[Sequence[Any]],
+        processes: int = 1
+) -> List[Any]:
+    """Apply `func` to the arguments for each sample, in a process pool if `processes` > 1
+
+    Results are returned in the same order as `sample_args` regardless of which worker process finishes first.
+    `func` must be a module level function and its arguments and results must be picklable, so compact results
+    like pydantic models or small DataFrames should be returned. Log records from worker processes are handled by
+    the logging handlers of the parent process.
+
+    Worker processes are started with the "spawn" method since this may be called from a thread (see
+    `xlavir.xlavir.collect`) and forking a multithreaded process is unsafe.
+
+    Args:
+        func: Function to apply to each sample's arguments
+        sample_args: Arguments for each sample
+        processes: Max number of worker processes
+
+    Returns:
+        List of `func` results in the same order as `sample_args`
+    """
+    args = [tuple(x) for x in sample_args]
+    if processes <= 1 or len(args) <= 1:
+        return [func(*x) for x in args]
+    n_workers = min(processes, len(args))
+    ctx = multiprocessing.get_context('spawn')
+    log_queue = ctx.Queue()
+    listener = logging.handlers.QueueListener(log_queue, *logging.getLogger().handlers, respect_handler_level=True)
+    listener.start()
+    try:
+        with ProcessPoolExecutor(max_workers=n_workers,
+                                 mp_context=ctx,
+                                 initializer=_init_worker_logging,
+                                 initargs=(log_queue, logging.getLogger().getEffectiveLevel())) as executor:
+            return list(executor.map(func, *zip(*args), chunksize=max(1, len(args) // (n_workers * 4))))
+    finally:
+        listener.stop()
+
+
+def count_data_lines(path: Path, comment: bytes = b'#', chunk_size: int = 1 << 20) -> int:
+    """Count lines not starting with `comment` using a buffered byte scan, decompressing gzip/BGZF files in-process
+
+    This is much cheaper than parsing a file into a DataFrame just to count its rows, e.g. for ranking multiple
+    candidate VCF files for the same sample.
+
+    Args:
+        path: File path. Files with a ".gz" extension are decompressed.
+        comment: Comment/header line prefix
+        chunk_size: Number of bytes to read at a time
+
+    Returns:
+        Number of non-comment lines
+    """
+    n_lines = 0
+    n_comment_lines = 0
+    prev = b'\n'
+    opener = gzip.open if path.name.endswith('.gz') else open
+    with opener(path, 'rb') as fh:
+        while chunk := fh.read(chunk_size):
+            n_lines += chunk.count(b'\n')
+            n_comment_lines += chunk.count(b'\n' + comment)
+            # comment line at the start of the file or starting right at a chunk boundary
+            if prev == b'\n' and chunk.startswith(comment):
+                n_comment_lines += 1
+            prev = chunk[-1:]
+    # last line without a trailing newline
+    if prev != b'\n':
+        n_lines += 1
+    return n_lines - n_comment_lines
+
+
 def get_col_widths(
         df: pd.DataFrame,
         index=False,
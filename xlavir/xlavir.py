@@ -1,36 +1,121 @@
 """Main module."""
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import Optional, List
+from typing import Optional, List, Dict, Callable, Any
 
 from xlavir import qc
 from xlavir.io import ct
 from xlavir.io.excel_sheet_dataframe import ExcelSheetDataFrame, SheetName
+from xlavir.io.primer_bed import read_primer_bed
 from xlavir.tools import mosdepth, samtools, consensus, pangolin, variants, nextclade, fastp
 from xlavir.tools.nextflow import exec_report
 from xlavir.tools.nextflow.exec_report import to_dataframe
+from xlavir.util import FileIndex
 
 logger = logging.getLogger(__name__)
 
+# maximum number of columns in an Excel worksheet
+EXCEL_MAX_COLUMNS = 16384
+
+
+def collect(collectors: Dict[str, Callable[[], Any]], threads: int = 1) -> Dict[str, Any]:
+    """Run independent tool info collectors, concurrently in a thread pool if `threads` > 1
+
+    All collectors are run to completion before returning so that an error in one collector does not hide errors
+    in others. Each collector error is logged and a `RuntimeError` listing all failed collectors is raised.
+
+    Args:
+        collectors: Dict of collector name to function with no arguments returning collected info
+        threads: Number of threads to run collectors with
+
+    Returns:
+        Dict of collector name to collected info
+    """
+    out = {}
+    errors = {}
+    if threads > 1:
+        with ThreadPoolExecutor(max_workers=threads, thread_name_prefix='xlavir-collect') as executor:
+            futures = {name: executor.submit(func) for name, func in collectors.items()}
+            for name, future in futures.items():
+                try:
+                    out[name] = future.result()
+                except Exception as ex:
+                    errors[name] = ex
+    else:
+        for name, func in collectors.items():
+            try:
+                out[name] = func()
+            except Exception as ex:
+                errors[name] = ex
+    for name, ex in errors.items():
+        logger.error(f'Error collecting "{name}" info: {ex!r}', exc_info=ex)
+    if errors:
+        raise RuntimeError(f'Failed to collect info for {len(errors)} of {len(collectors)} collectors: '
+                           + '; '.join(f'{name}: {ex!r}' for name, ex in errors.items())) \
+            from next(iter(errors.values()))
+    return out
+
 
 def run(
         input_dir: Path,
         quality_reqs: Optional[qc.QualityRequirements],
         pangolin_lineage_csv: Optional[Path] = None,
-        ct_values_table: Optional[Path] = None
+        ct_values_table: Optional[Path] = None,
+        exclude: Optional[List[str]] = None,
+        threads: int = 1,
+        processes: int = 1,
+        coverage_source: mosdepth.CoverageSource = mosdepth.CoverageSource.auto,
+        depth_store: Optional[Path] = None,
+        primer_bed: Optional[Path] = None,
+        coverage_window: Optional[int] = None,
+        low_coverage_bed: Optional[Path] = None,
+        variant_filters: Optional[qc.VariantFilters] = None,
+        snpsift_table: Optional[Path] = None
 ) -> List[ExcelSheetDataFrame]:
     if quality_reqs is None:
         quality_reqs = qc.QualityRequirements()
-    nf_exec_info = exec_report.get_info(input_dir)
-    sample_depth_info = mosdepth.get_info(input_dir, low_coverage_threshold=quality_reqs.low_coverage_threshold)
+    amplicons = read_primer_bed(primer_bed) if primer_bed else None
+    # walk the input directory once and share the file index with all tool output parsers
+    file_index = FileIndex(input_dir, exclude=exclude)
+    # tool outputs are independent of each other until they are merged below, so they can be collected concurrently
+    info = collect({
+        'exec_report': partial(exec_report.get_info, file_index),
+        'mosdepth': partial(mosdepth.get_info, file_index,
+                            low_coverage_threshold=quality_reqs.low_coverage_threshold,
+                            coverage_thresholds=quality_reqs.coverage_thresholds,
+                            processes=processes,
+                            bam_threads=threads,
+                            coverage_source=coverage_source,
+                            depth_store=depth_store,
+                            amplicons=amplicons,
+                            coverage_window=coverage_window),
+        'samtools': partial(samtools.get_info, file_index),
+        'fastp': partial(fastp.get_info, file_index),
+        'ct': partial(ct.read_ct_table, ct_values_table) if ct_values_table else dict,
+        'variants': partial(variants.get_info,
+                            file_index,
+                            qc_reqs=quality_reqs,
+                            processes=processes,
+                            filters=variant_filters,
+                            snpsift_table=snpsift_table),
+        'pangolin': partial(pangolin.get_info, basedir=file_index, pangolin_lineage_csv=pangolin_lineage_csv),
+        'nextclade': partial(nextclade.get_info, basedir=file_index),
+        'consensus': partial(consensus.get_info, basedir=file_index),
+    }, threads=threads)
+    nf_exec_info = info['exec_report']
+    sample_depth_info = info['mosdepth']
     if logger.level == logging.DEBUG:
-        for sample, info in sample_depth_info.items():
-            logger.debug(info.dict())
-    sample_mapping_info = samtools.get_info(input_dir)
+        for sample, depth_info in sample_depth_info.items():
+            logger.debug(depth_info.dict())
+    if low_coverage_bed:
+        mosdepth.write_low_coverage_bed(sample_depth_info, low_coverage_bed)
+    sample_mapping_info = info['samtools']
     if logger.level == logging.DEBUG:
-        for sample, info in sample_mapping_info.items():
-            logger.debug(info.dict())
-    sample_total_reads = fastp.get_info(input_dir)
+        for sample, mapping_info in sample_mapping_info.items():
+            logger.debug(mapping_info.dict())
+    sample_total_reads = info['fastp']
     for sample, total_reads in sample_total_reads.items():
         mapping_info = sample_mapping_info.get(sample, None)
         if mapping_info is None:
@@ -49,8 +134,8 @@ def run(
                 f'Using fastp value for total reads.'
             )
             mapping_info.n_total_reads = total_reads
-    sample_cts = ct.read_ct_table(ct_values_table) if ct_values_table else {}
-    sample_variants = variants.get_info(input_dir, qc_reqs=quality_reqs)
+    sample_cts = info['ct']
+    sample_variants = info['variants']
 
     dfs: List[ExcelSheetDataFrame] = []
     df_stats = qc.create_qc_stats_dataframe(sample_depth_info,
@@ -59,18 +144,44 @@ def run(
                                             quality_reqs=quality_reqs)
     dfs.append(ExcelSheetDataFrame(sheet_name=SheetName.qc_stats.value,
                                    df=qc.report_format(df_stats,
-                                                       low_coverage_threshold=quality_reqs.low_coverage_threshold),
+                                                       low_coverage_threshold=quality_reqs.low_coverage_threshold,
+                                                       coverage_thresholds=quality_reqs.coverage_thresholds),
                                    pd_to_excel_kwargs=dict(freeze_panes=(1, 1), na_rep='NA'),
                                    header_comments={x: y for _, x, y in
-                                                    qc.columns(quality_reqs.low_coverage_threshold)}))
-    df_pangolin = pangolin.get_info(basedir=input_dir,
-                                    pangolin_lineage_csv=pangolin_lineage_csv)
+                                                    qc.columns(quality_reqs.low_coverage_threshold,
+                                                               coverage_thresholds=quality_reqs.coverage_thresholds)}))
+    if any(depth_info.contigs for depth_info in sample_depth_info.values()):
+        dfs.append(ExcelSheetDataFrame(sheet_name=SheetName.segment_depth.value,
+                                       df=qc.create_segment_depth_dataframe(sample_depth_info,
+                                                                            quality_reqs.low_coverage_threshold),
+                                       pd_to_excel_kwargs=dict(freeze_panes=(1, 2)),
+                                       header_comments={x: y for _, x, y in
+                                                        qc.segment_columns(quality_reqs.low_coverage_threshold)}))
+    if amplicons is not None:
+        dfs.append(ExcelSheetDataFrame(sheet_name=SheetName.amplicon_depth.value,
+                                       df=qc.create_amplicon_depth_dataframe(sample_depth_info, amplicons),
+                                       pd_to_excel_kwargs=dict(freeze_panes=(1, 2), na_rep='NA'),
+                                       header_comments={x: y for _, x, y in qc.amplicon_columns}))
+    if coverage_window:
+        df_covmat = qc.create_coverage_matrix_dataframe(sample_depth_info)
+        if df_covmat.shape[1] >= EXCEL_MAX_COLUMNS:
+            logger.warning(f'Not adding "{SheetName.covmat.value}" sheet since the number of {coverage_window}bp '
+                           f'reference sequence windows ({df_covmat.shape[1]}) exceeds the maximum number of Excel '
+                           f'columns ({EXCEL_MAX_COLUMNS}). Try a larger coverage window.')
+        elif not df_covmat.empty:
+            dfs.append(ExcelSheetDataFrame(sheet_name=SheetName.covmat.value,
+                                           df=df_covmat,
+                                           pd_to_excel_kwargs=dict(freeze_panes=(1, 1), na_rep='NA'),
+                                           autofit=False,
+                                           column_widths=[df_covmat.index.str.len().max() + 2] + [6 for _ in
+                                                                                             range(df_covmat.shape[1])]))
+    df_pangolin = info['pangolin']
     if df_pangolin is not None:
         dfs.append(ExcelSheetDataFrame(sheet_name=SheetName.pangolin.value,
                                        df=df_pangolin,
                                        pd_to_excel_kwargs=dict(freeze_panes=(1, 1)),
                                        header_comments={x: y for _, x, y in pangolin.pangolin_cols}))
-    sample_nextclade = nextclade.get_info(basedir=input_dir)
+    sample_nextclade = info['nextclade']
     if sample_nextclade:
         dfs.append(ExcelSheetDataFrame(sheet_name=SheetName.nextclade.value,
                                        df=nextclade.to_dataframe(sample_nextclade),
@@ -91,13 +202,18 @@ def run(
                                            header_comments={name: desc for _, name, desc in
                                                             variants.variant_summary_cols + variants.variants_cols}))
             df_varmap = variants.to_variant_pivot_table(df_variants)
-            max_index_length = df_varmap.index.str.len().max()
-            dfs.append(ExcelSheetDataFrame(sheet_name=SheetName.varmat.value,
-                                           df=df_varmap,
-                                           pd_to_excel_kwargs=dict(freeze_panes=(1, 1), na_rep=0.0),
-                                           autofit=False,
-                                           column_widths=[max_index_length + 2] + [3 for _ in
-                                                                                   range(df_varmap.columns.size)]))
+            if df_varmap.shape[1] >= EXCEL_MAX_COLUMNS:
+                logger.warning(f'Not adding "{SheetName.varmat.value}" sheet since the number of mutations '
+                               f'({df_varmap.shape[1]}) exceeds the maximum number of Excel columns '
+                               f'({EXCEL_MAX_COLUMNS}).')
+            else:
+                max_index_length = df_varmap.index.str.len().max()
+                dfs.append(ExcelSheetDataFrame(sheet_name=SheetName.varmat.value,
+                                               df=df_varmap,
+                                               pd_to_excel_kwargs=dict(freeze_panes=(1, 1)),
+                                               autofit=False,
+                                               column_widths=[max_index_length + 2] + [3 for _ in
+                                                                                       range(df_varmap.columns.size)]))
         else:
             logger.warning(
                 'No column "Mutation" found in variant info dataframe. '
@@ -105,7 +221,7 @@ def run(
             )
 
     dfs.append(ExcelSheetDataFrame(sheet_name=SheetName.consensus.value,
-                                   df=consensus.get_info(basedir=input_dir),
+                                   df=info['consensus'],
                                    autofit=False,
                                    pd_to_excel_kwargs=dict(index=None, header=None)))
     if nf_exec_info: